@@ -0,0 +1,274 @@
+import logging
+import re
+import time
+from datetime import datetime
+import numpy as np
+import pytz
+from config import Config
+from history_store import HistoryStore
+from indicator_store import IndicatorStore
+from nbu_history import NbuRateHistory
+
+logger = logging.getLogger("backtester")
+
+DAY = 86400
+
+
+class Backtester:
+    """
+    Перевірка історичних рекомендацій на фактичних цінах. Усі рекомендації
+    з історії розгортаються в масиви (актив, дія, впевненість, горизонт, час),
+    ціни входу й виходу беруться з часових рядів одним векторним зверненням
+    на джерело: курси НБУ по днях і показники запусків (крипта, товари).
+    Звіт: частка влучань, прибутковість за діями, калібрування впевненості —
+    у розрізі активів і горизонтів.
+    """
+
+    ACTION_CODES = {'STRONG_BUY': 2, 'BUY': 1, 'NEUTRAL': 0, 'AVOID': -1, 'STRONG_AVOID': -2}
+    ACTIONS = np.array(['STRONG_AVOID', 'AVOID', 'NEUTRAL', 'BUY', 'STRONG_BUY'])
+
+    # Межі кошиків калібрування впевненості
+    CALIBRATION_BINS = np.array([0.0, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0001])
+
+    def __init__(self, history=None, rate_history=None, indicator_store=None, horizons=None):
+        self.history = history
+        self.rate_history = rate_history
+        self.indicator_store = indicator_store
+        self.horizons = tuple(horizons or Config.BACKTEST_HORIZONS)
+
+    def run(self, days=None, horizons=None):
+        """Бектест рекомендацій за останні days днів (усієї історії, якщо None)"""
+        started = time.perf_counter()
+        history = self.history or HistoryStore()
+        entries = history.since(days) if days else history.range()
+
+        recs = self.flatten(entries)
+        report = self.evaluate(recs, self.load_prices(), horizons)
+
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"🧪 Бектест: {report['count']} рекомендацій за {report['elapsed_ms']} мс")
+        return report
+
+    def flatten(self, entries):
+        """Рекомендації з записів історії -> словник масивів"""
+        assets, codes, confidence, times, timeframes = [], [], [], [], []
+        parsed = {}
+
+        for entry in entries:
+            recommendations = entry.get('recommendations') or entry.get('top_recommendations', [])
+            for rec in recommendations:
+                code = self.ACTION_CODES.get(rec.get('action'))
+                if code is None or not rec.get('asset'):
+                    continue
+                stamp = rec.get('generated_at') or entry.get('timestamp')
+                if stamp not in parsed:
+                    parsed[stamp] = self._parse_time(stamp)
+                if parsed[stamp] is None:
+                    continue
+
+                assets.append(rec['asset'])
+                codes.append(code)
+                confidence.append(float(rec.get('confidence', 0) or 0))
+                times.append(parsed[stamp])
+                timeframes.append(rec.get('timeframe', ''))
+
+        unique_frames = {frame: self._timeframe_days(frame) for frame in set(timeframes)}
+        return {
+            'asset': np.array(assets, dtype=object),
+            'code': np.array(codes, dtype=np.int8),
+            'confidence': np.array(confidence, dtype=np.float64),
+            'time': np.array(times, dtype=np.float64),
+            'timeframe_days': np.array([unique_frames[f] for f in timeframes], dtype=np.float64)
+        }
+
+    def load_prices(self):
+        """
+        Джерела цін: [(ключі в секундах, колонки, матриця з заповненими пропусками)].
+        Курси НБУ — у гривнях за одиницю; UAH — у доларах за гривню.
+        """
+        sources = []
+
+        rate_history = self.rate_history or NbuRateHistory()
+        dates, columns, values = rate_history.load()
+        if len(dates):
+            values = np.array(values, dtype=np.float64)
+            columns = list(columns)
+            if 'USD' in columns:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    uah = 1.0 / values[:, columns.index('USD')]
+                values = np.column_stack((values, uah))
+                columns.append('UAH')
+            keys = dates.astype(np.int64).astype(np.float64) * DAY
+            sources.append((keys, columns, IndicatorStore._forward_fill(values)))
+
+        indicator_store = self.indicator_store or IndicatorStore()
+        keys, columns, values = indicator_store.store.load()
+        if len(keys):
+            sources.append((np.asarray(keys, dtype=np.float64), list(columns),
+                            IndicatorStore._forward_fill(np.asarray(values, dtype=np.float64))))
+
+        return sources
+
+    def evaluate(self, recs, sources, horizons=None):
+        """Звіт бектесту для масивів рекомендацій і джерел цін"""
+        horizons = tuple(horizons or self.horizons)
+        n = len(recs['code'])
+        report = {'count': n, 'horizons': {}}
+        if not n:
+            return report
+
+        asset_names, asset_index = np.unique(recs['asset'].astype(str), return_inverse=True)
+        source_of, column_of = self._locate(asset_names, sources)
+
+        for horizon in horizons + ('timeframe',):
+            if horizon == 'timeframe':
+                offsets = recs['timeframe_days'] * DAY
+                label = 'timeframe'
+            else:
+                offsets = np.full(n, float(horizon) * DAY)
+                label = f'{horizon}d'
+
+            returns = self._returns(recs['time'], offsets, source_of[asset_index], column_of[asset_index], sources)
+            report['horizons'][label] = self._summarize(recs, returns, asset_names, asset_index)
+
+        return report
+
+    def _returns(self, times, offsets, source, column, sources):
+        """Прибутковість активу (у %) від моменту рекомендації до моменту + offset; NaN — немає даних"""
+        returns = np.full(len(times), np.nan)
+
+        for s, (keys, _, filled) in enumerate(sources):
+            mask = source == s
+            if not mask.any() or not len(keys):
+                continue
+            start = times[mask]
+            end = start + offsets[mask]
+            cols = column[mask]
+
+            entry_rows = np.searchsorted(keys, start, side='right') - 1
+            exit_rows = np.searchsorted(keys, end, side='right') - 1
+            entry = filled[np.clip(entry_rows, 0, None), cols]
+            exit_ = filled[np.clip(exit_rows, 0, None), cols]
+
+            # Горизонт ще не настав або ціни на момент входу немає
+            valid = (entry_rows >= 0) & (end <= keys[-1]) & (entry > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[mask] = np.where(valid, (exit_ / entry - 1) * 100, np.nan)
+
+        return returns
+
+    def _summarize(self, recs, returns, asset_names, asset_index):
+        evaluated = np.isfinite(returns)
+        direction = np.sign(recs['code']).astype(np.float64)
+        signed = direction * returns
+
+        # Влучання рахуються лише для спрямованих дій (не NEUTRAL)
+        scored = evaluated & (direction != 0)
+        hit = (signed > 0).astype(np.float64)
+
+        summary = {
+            'evaluated': int(evaluated.sum()),
+            'overall': self._group_stats(scored, hit, returns, signed, np.zeros(len(returns), dtype=np.int64), 1)[0],
+            'by_action': {},
+            'by_asset': {},
+            'calibration': [],
+            'brier': None
+        }
+
+        action_index = recs['code'].astype(np.int64) + 2
+        for i, stats in enumerate(self._group_stats(scored, hit, returns, signed, action_index, len(self.ACTIONS))):
+            if stats['count']:
+                summary['by_action'][str(self.ACTIONS[i])] = stats
+
+        for i, stats in enumerate(self._group_stats(scored, hit, returns, signed, asset_index, len(asset_names))):
+            if stats['count']:
+                summary['by_asset'][str(asset_names[i])] = stats
+
+        # Калібрування: впевненість проти фактичної частки влучань
+        if scored.any():
+            confidence = recs['confidence'][scored]
+            outcome = hit[scored]
+            bins = np.clip(np.digitize(confidence, self.CALIBRATION_BINS) - 1, 0, len(self.CALIBRATION_BINS) - 2)
+            counts = np.bincount(bins, minlength=len(self.CALIBRATION_BINS) - 1)
+            conf_sum = np.bincount(bins, weights=confidence, minlength=len(counts))
+            hit_sum = np.bincount(bins, weights=outcome, minlength=len(counts))
+            for b in np.nonzero(counts)[0]:
+                summary['calibration'].append({
+                    'bin': f"{self.CALIBRATION_BINS[b]:.1f}-{min(self.CALIBRATION_BINS[b + 1], 1.0):.1f}",
+                    'count': int(counts[b]),
+                    'avg_confidence': round(float(conf_sum[b] / counts[b]), 3),
+                    'hit_rate': round(float(hit_sum[b] / counts[b]), 3)
+                })
+            summary['brier'] = round(float(np.mean((confidence - outcome) ** 2)), 4)
+
+        return summary
+
+    @staticmethod
+    def _group_stats(scored, hit, returns, signed, groups, size):
+        """Статистика по групах одним проходом bincount"""
+        evaluated = np.isfinite(returns)
+        count = np.bincount(groups[evaluated], minlength=size)
+        return_sum = np.bincount(groups[evaluated], weights=returns[evaluated], minlength=size)
+        signed_sum = np.bincount(groups[evaluated], weights=signed[evaluated], minlength=size)
+        scored_count = np.bincount(groups[scored], minlength=size)
+        hit_sum = np.bincount(groups[scored], weights=hit[scored], minlength=size)
+
+        stats = []
+        for g in range(size):
+            c = int(count[g])
+            stats.append({
+                'count': c,
+                'hit_rate': round(float(hit_sum[g] / scored_count[g]), 3) if scored_count[g] else None,
+                'avg_return': round(float(return_sum[g] / c), 4) if c else None,
+                'avg_signed_return': round(float(signed_sum[g] / c), 4) if c else None
+            })
+        return stats
+
+    @staticmethod
+    def _locate(asset_names, sources):
+        """Для кожного активу — перше джерело, що його містить, і номер колонки (-1 — немає)"""
+        source_of = np.full(len(asset_names), -1, dtype=np.int64)
+        column_of = np.zeros(len(asset_names), dtype=np.int64)
+        for i, asset in enumerate(asset_names):
+            for s, (_, columns, _) in enumerate(sources):
+                if asset in columns:
+                    source_of[i], column_of[i] = s, columns.index(asset)
+                    break
+        return source_of, column_of
+
+    @staticmethod
+    def _timeframe_days(timeframe):
+        """'1-2 дні' -> 2, '1 тиждень' -> 7; без чисел — 1 день"""
+        numbers = [float(n) for n in re.findall(r'\d+(?:[.,]\d+)?', str(timeframe).replace(',', '.'))]
+        days = max(numbers) if numbers else 1.0
+        text = str(timeframe).lower()
+        if 'тиж' in text or 'недел' in text or 'week' in text:
+            days *= 7
+        elif 'год' in text or 'час' in text or 'hour' in text:
+            days /= 24
+        return days
+
+    @staticmethod
+    def _parse_time(value):
+        try:
+            moment = datetime.fromisoformat(value)
+            if moment.tzinfo is None:
+                moment = pytz.UTC.localize(moment)
+            return moment.timestamp()
+        except (TypeError, ValueError):
+            return None
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Бектест історичних рекомендацій")
+    parser.add_argument('--days', type=int, default=None, help="Глибина історії (днів)")
+    parser.add_argument('--horizons', type=str, default=None, help="Горизонти в днях через кому")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    horizons = [float(h) if '.' in h else int(h) for h in args.horizons.split(',')] if args.horizons else None
+    print(json.dumps(Backtester(horizons=horizons).run(days=args.days), ensure_ascii=False, indent=2))
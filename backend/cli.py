@@ -0,0 +1,225 @@
+"""
+Запуск окремих етапів конвеєра з кешованими проміжними результатами.
+
+    python cli.py fetch-news            # новини -> data/stages/news
+    python cli.py fetch-indicators      # показники -> data/stages/indicators
+    python cli.py score                 # вплив на валюти -> data/stages/score
+    python cli.py generate              # рекомендації -> data/stages/generate
+    python cli.py publish               # збереження і публікація останньої генерації
+    python cli.py run                   # усі етапи поспіль
+    python cli.py stats                 # статистика історії та версії етапів
+
+Кожен етап бере останні (або вказані через --<етап> ВЕРСІЯ) версії своїх входів,
+тож перезапуск генерації чи публікації не повторює збір даних, а етапи можна
+виконувати на різних машинах, переносячи каталог data/stages.
+"""
+import argparse
+import json
+import logging
+import sys
+from config import Config
+from stage_cache import StageCache
+
+logger = logging.getLogger("cli")
+
+STAGES = ('news', 'indicators', 'score', 'generate')
+
+
+class StageError(Exception):
+    """Немає вхідних даних для етапу"""
+
+
+class PipelineCli:
+    def __init__(self, cache=None):
+        self.cache = cache or StageCache()
+        self._advisor = None
+
+    @property
+    def advisor(self):
+        # CurrencyAdvisor створюється лише для етапів, яким він потрібен
+        if self._advisor is None:
+            from currency_advisor import CurrencyAdvisor
+            self._advisor = CurrencyAdvisor()
+        return self._advisor
+
+    async def fetch_news(self, max_age=None):
+        reused = self._reuse_fresh('news', max_age)
+        if reused:
+            return reused
+        news_data = await self.advisor.fetch_news()
+        return self.cache.write('news', {'news': news_data})
+
+    async def fetch_indicators(self, max_age=None):
+        reused = self._reuse_fresh('indicators', max_age)
+        if reused:
+            return reused
+        try:
+            economic_data = await self.advisor.fetch_indicators()
+        finally:
+            await self.advisor.economic_data.drain()
+        return self.cache.write('indicators', {'economic_data': economic_data})
+
+    def score(self, news=None, indicators=None, force=False):
+        news_meta, news_data = self._input('news', news)
+        indicators_meta, indicators_data = self._input('indicators', indicators)
+        inputs = {'news': news_meta['version'], 'indicators': indicators_meta['version']}
+
+        cached = None if force else self.cache.find('score', inputs)
+        if cached:
+            logger.info(f"♻️ Скоринг для цих входів уже є: {cached[0]['version']}")
+            return cached[0]
+
+        currency_impact = self.advisor.score(news_data['news'], indicators_data['economic_data'])
+        return self.cache.write('score', {'currency_impact': currency_impact}, inputs)
+
+    async def generate(self, score=None, force=False):
+        score_meta, score_data = self._input('score', score)
+        inputs = {'score': score_meta['version']}
+
+        cached = None if force else self.cache.find('generate', inputs)
+        if cached:
+            logger.info(f"♻️ Рекомендації для цього скорингу вже є: {cached[0]['version']}")
+            return cached[0]
+
+        _, news_data = self._input('news', score_meta['inputs']['news'])
+        _, indicators_data = self._input('indicators', score_meta['inputs']['indicators'])
+        news_data = news_data['news']
+        economic_data = indicators_data['economic_data']
+
+        # Ті самі правила пропуску, що й у повному аналізі (--force або FORCE_ANALYSIS їх вимикають)
+        result = None if force else self.advisor._reusable_result(
+            economic_data, self.advisor._news_fingerprint(news_data)
+        )
+        if result is None:
+            result = await self.advisor.generate(news_data, economic_data, score_data['currency_impact'])
+        return self.cache.write('generate', {'result': result}, inputs)
+
+    def publish(self, generate=None):
+        meta, data = self._input('generate', generate)
+        result = data['result']
+        if result.get('skipped'):
+            logger.info(f"⏭️ Генерація {meta['version']} повторює попередні рекомендації — публікувати нічого")
+            return True
+        if not result.get('recommendations'):
+            logger.warning(f"⚠️ Генерація {meta['version']} не містить рекомендацій")
+            return False
+        return self.advisor.publish(result, self._news_for(meta))
+
+    async def run(self, max_age=None, force=False):
+        await self.fetch_news(max_age)
+        await self.fetch_indicators(max_age)
+        self.score(force=force)
+        await self.generate(force=force)
+        return self.publish()
+
+    def stats(self, window=30):
+        from data_handler import DataHandler
+
+        stages = {}
+        for stage in STAGES:
+            latest = self.cache.latest(stage)
+            if latest:
+                age = self.cache.age_minutes(stage)
+                stages[stage] = {
+                    'version': latest['version'],
+                    'created_at': latest['created_at'],
+                    'age_minutes': round(age, 1),
+                    'inputs': latest['inputs'],
+                    'versions': len(self.cache.versions(stage))
+                }
+        return {'history': DataHandler().get_statistics(window), 'stages': stages}
+
+    def _input(self, stage, version=None):
+        record = self.cache.read(stage, version)
+        if record is None:
+            raise StageError(f"Немає результату етапу {stage}" + (f"@{version}" if version else "") +
+                             " — спершу виконайте відповідну команду")
+        return record
+
+    def _news_for(self, generate_meta):
+        """Новини, з яких отримано генерацію (generate -> score -> news), для кешу новин"""
+        score = self.cache.read('score', generate_meta['inputs'].get('score'))
+        if score is None:
+            return None
+        news = self.cache.read('news', score[0]['inputs'].get('news'))
+        return news[1]['news'] if news else None
+
+    def _reuse_fresh(self, stage, max_age):
+        if max_age is None:
+            return None
+        age = self.cache.age_minutes(stage)
+        if age is not None and age <= max_age:
+            latest = self.cache.latest(stage)
+            logger.info(f"♻️ Етап {stage}: версія {latest['version']} свіжа ({age:.0f} хв), збір пропущено")
+            return latest
+        return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Етапи конвеєра курсового радника")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('fetch-news', 'fetch-indicators'):
+        command = commands.add_parser(name)
+        command.add_argument('--max-age', type=float, default=None,
+                             help="Не збирати заново, якщо остання версія молодша за N хвилин")
+
+    command = commands.add_parser('score')
+    command.add_argument('--news', default=None, help="Версія етапу news (типово — остання)")
+    command.add_argument('--indicators', default=None, help="Версія етапу indicators")
+    command.add_argument('--force', action='store_true')
+
+    command = commands.add_parser('generate')
+    command.add_argument('--score', default=None, help="Версія етапу score")
+    command.add_argument('--force', action='store_true', help="Генерувати навіть без змін у входах")
+
+    command = commands.add_parser('publish')
+    command.add_argument('--generate', default=None, help="Версія етапу generate")
+
+    command = commands.add_parser('run')
+    command.add_argument('--max-age', type=float, default=None)
+    command.add_argument('--force', action='store_true')
+
+    command = commands.add_parser('stats')
+    command.add_argument('--window', type=int, default=30, help="Вікно статистики (днів)")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, Config.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    cli = PipelineCli()
+    try:
+        if args.command == 'stats':
+            print(json.dumps(cli.stats(args.window), ensure_ascii=False, indent=2, default=str))
+            return 0
+        if args.command == 'score':
+            meta = cli.score(args.news, args.indicators, args.force)
+        elif args.command == 'publish':
+            return 0 if cli.publish(args.generate) else 1
+        else:
+            import asyncio
+            if args.command == 'fetch-news':
+                meta = asyncio.run(cli.fetch_news(args.max_age))
+            elif args.command == 'fetch-indicators':
+                meta = asyncio.run(cli.fetch_indicators(args.max_age))
+            elif args.command == 'generate':
+                meta = asyncio.run(cli.generate(args.score, args.force))
+            else:
+                return 0 if asyncio.run(cli.run(args.max_age, args.force)) else 1
+    except StageError as e:
+        logger.error(f"❌ {e}")
+        return 1
+
+    print(f"{meta['stage']}@{meta['version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,28 +3,52 @@ import sys
 import json
 import logging
 from pathlib import Path
-from dotenv import load_dotenv
 from datetime import datetime
 import pytz
 
-# Додаємо шляхи до Python PATH
-sys.path.insert(0, str(Path(__file__).parent.parent))
+BASE_DIR = Path(__file__).parent.parent
 
-load_dotenv()
+# Додаємо корінь проєкту до Python PATH (один раз)
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
 
-logger = logging.getLogger("currency_advisor")
 
-BASE_DIR = Path(__file__).parent.parent
+def _load_env_file():
+    """Завантажити .env, якщо він є (у CI змінні приходять з оточення — dotenv не імпортується)"""
+    for candidate in (Path.cwd() / '.env', Path(__file__).parent / '.env', BASE_DIR / '.env'):
+        if candidate.is_file():
+            from dotenv import load_dotenv
+            load_dotenv(candidate)
+            return
+
+
+_load_env_file()
+
+logger = logging.getLogger("currency_advisor")
 
 class Config:
     # Groq AI
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     GROQ_MODEL = os.getenv('GROQ_MODEL', 'openai/gpt-oss-120b')
     
+    # Ланцюжок резервних моделей (через кому, опційно "модель:дедлайн_секунд")
+    GROQ_FALLBACK_MODELS = os.getenv('GROQ_FALLBACK_MODELS', 'llama-3.1-8b-instant')
+    GROQ_MODEL_DEADLINE = float(os.getenv('GROQ_MODEL_DEADLINE', 45))       # Секунд на основну модель
+    GROQ_FALLBACK_DEADLINE = float(os.getenv('GROQ_FALLBACK_DEADLINE', 20))  # Секунд на резервну модель
+    
+    # Хеджування: паралельний запит до наступної моделі, коли основна повільніша за перцентиль
+    GROQ_HEDGE_ENABLED = os.getenv('GROQ_HEDGE_ENABLED', 'true').lower() == 'true'
+    GROQ_HEDGE_PERCENTILE = float(os.getenv('GROQ_HEDGE_PERCENTILE', 90))
+    
+    # Ансамбль: N паралельних вибірок, зупинка при досягненні частки згоди
+    GROQ_ENSEMBLE_SIZE = int(os.getenv('GROQ_ENSEMBLE_SIZE', 1))  # 1 = вимкнено
+    GROQ_ENSEMBLE_CONSENSUS = float(os.getenv('GROQ_ENSEMBLE_CONSENSUS', 0.6))
+    
     # API ключі для новин та економічних даних
     NEWS_API_KEY = os.getenv('NEWS_API_KEY', '')
     ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY', '')
     FRED_API_KEY = os.getenv('FRED_API_KEY', '')
+    CRYPTOCOMPARE_API_KEY = os.getenv('CRYPTOCOMPARE_API_KEY', '')
     
     # Налаштування аналізу
     LANGUAGE = os.getenv('LANGUAGE', 'uk')
@@ -34,6 +58,9 @@ class Config:
     # Мінімальна впевненість для рекомендацій
     MIN_CONFIDENCE = float(os.getenv('MIN_CONFIDENCE', 0.65))
     
+    # Шлях генерації рекомендацій: 'ai' (Groq + локальний тайбрейкер) або 'local' (тільки локальний скоринг)
+    SCORING_MODE = os.getenv('SCORING_MODE', 'ai')
+    
     # Часовий пояс
     KYIV_TZ = pytz.timezone('Europe/Kiev')
     
@@ -44,9 +71,84 @@ class Config:
     # Шляхи до файлів
     DATA_DIR = BASE_DIR / 'data'
     RECOMMENDATIONS_FILE = DATA_DIR / 'recommendations.json'
-    HISTORY_FILE = DATA_DIR / 'history_recommendations.json'
+    HISTORY_FILE = DATA_DIR / 'history_recommendations.json'           # Старий формат (лише для міграції)
+    HISTORY_DIR = DATA_DIR / 'history'                                 # Шарди історії + index.json
+    HISTORY_SHARD_BY = os.getenv('HISTORY_SHARD_BY', 'week')           # 'week' або 'day'
+    HISTORY_STATS_FILE = DATA_DIR / 'history_stats.json'              # Агрегати для get_statistics
+    BACKTEST_HORIZONS = tuple(int(h) for h in os.getenv('BACKTEST_HORIZONS', '1,3,7').split(','))  # Днів
+    HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', 3 * 365))
     NEWS_CACHE_FILE = DATA_DIR / 'news_cache.json'
+    NEWS_ARCHIVE_DIR = DATA_DIR / 'news_archive'                       # Усі зібрані новини + пошуковий індекс
     ECONOMIC_INDICATORS_FILE = DATA_DIR / 'economic_indicators.json'
+    MANIFEST_FILE = DATA_DIR / 'manifest.json'                         # Версія та хеші опублікованих файлів
+    DELTA_FILE = DATA_DIR / 'delta.json'                               # Зміни відносно recommendations.json
+    FULL_SNAPSHOT_EVERY = int(os.getenv('FULL_SNAPSHOT_EVERY', 4))     # Повний знімок раз на N публікацій
+    DATA_LOCK_FILE = DATA_DIR / '.lock'                                # Блокування записів між процесами
+    DATA_LOCK_TIMEOUT = float(os.getenv('DATA_LOCK_TIMEOUT', 120))     # Секунд очікування; -1 — без обмеження
+    MODEL_LATENCY_FILE = DATA_DIR / 'model_latency.json'
+    RATE_LIMITS_FILE = DATA_DIR / 'rate_limits.json'
+    CACHE_DIR = DATA_DIR / 'cache'
+    STAGES_DIR = DATA_DIR / 'stages'                                   # Проміжні результати етапів (cli.py)
+    STAGE_KEEP_VERSIONS = int(os.getenv('STAGE_KEEP_VERSIONS', 10))   # Версій на етап
+    TIMESERIES_DIR = DATA_DIR / 'timeseries'
+    
+    # Режим демона: потоковий фід цін криптовалют + аналіз з інтервалом
+    DAEMON_INTERVAL_MINUTES = int(os.getenv('DAEMON_INTERVAL_MINUTES', 60))
+    CRYPTO_STREAM_URL = os.getenv(
+        'CRYPTO_STREAM_URL',
+        f"wss://streamer.cryptocompare.com/v2?api_key={os.getenv('CRYPTOCOMPARE_API_KEY', '')}"
+    )
+    CRYPTO_STREAM_TICKS = int(os.getenv('CRYPTO_STREAM_TICKS', 4096))       # Тиків у буфері на символ
+    CRYPTO_STREAM_BARS = int(os.getenv('CRYPTO_STREAM_BARS', 1440))         # Барів у буфері на символ
+    CRYPTO_STREAM_BAR_SECONDS = int(os.getenv('CRYPTO_STREAM_BAR_SECONDS', 60))
+    CRYPTO_STREAM_MAX_AGE = int(os.getenv('CRYPTO_STREAM_MAX_AGE', 120))    # Секунд, поки ціна вважається свіжою
+    CRYPTO_STREAM_STATS_WINDOW = int(os.getenv('CRYPTO_STREAM_STATS_WINDOW', 3600))
+    
+    # Економічний календар
+    CALENDAR_SOURCE_FILE = DATA_DIR / 'calendar_source.json'      # Файлове джерело подій (ведеться вручну)
+    CALENDAR_STORE_FILE = DATA_DIR / 'economic_calendar.json'     # Індексоване сховище
+    CALENDAR_LOOKAHEAD_HOURS = int(os.getenv('CALENDAR_LOOKAHEAD_HOURS', 48))
+    CALENDAR_TRIGGER_DELAY_MINUTES = int(os.getenv('CALENDAR_TRIGGER_DELAY_MINUTES', 15))
+    CALENDAR_KEEP_PAST_HOURS = int(os.getenv('CALENDAR_KEEP_PAST_HOURS', 24))  # Минулі події зберігаються стільки годин
+    
+    # Історія курсів НБУ
+    NBU_BACKFILL_DAYS = int(os.getenv('NBU_BACKFILL_DAYS', 365))          # Глибина початкового завантаження
+    NBU_BACKFILL_CONCURRENCY = int(os.getenv('NBU_BACKFILL_CONCURRENCY', 4))
+    NBU_GAP_FILL_DAYS = int(os.getenv('NBU_GAP_FILL_DAYS', 31))           # Максимум днів дозавантаження за запуск
+    
+    # TTL кешу показників (секунд): ttl — запис свіжий, max_stale — ще можна
+    # віддати застарілим, оновлюючи у фоні. Курс НБУ змінюється раз на добу,
+    # тому курси, раніші за поточну дату НБУ, завжди запитуються синхронно.
+    CACHE_TTL = {
+        'exchange_rates': {'ttl': int(os.getenv('CACHE_TTL_EXCHANGE_RATES', 12 * 3600)), 'max_stale': 24 * 3600},
+        'interest_rates': {'ttl': 24 * 3600, 'max_stale': 7 * 24 * 3600},
+        'crypto_prices': {'ttl': int(os.getenv('CACHE_TTL_CRYPTO', 5 * 60)), 'max_stale': 15 * 60},
+        'commodity_prices': {'ttl': 3600, 'max_stale': 24 * 3600}
+    }
+    
+    # Поріг суттєвої зміни показників між запусками (у % від попереднього значення).
+    # Якщо суттєвих змін немає і новини ті самі — аналіз повторно не виконується.
+    INDICATOR_CHANGE_THRESHOLDS = {
+        'exchange_rates': float(os.getenv('CHANGE_THRESHOLD_EXCHANGE_RATES', 0.05)),
+        'interest_rates': 0.0,
+        'crypto': float(os.getenv('CHANGE_THRESHOLD_CRYPTO', 0.5)),
+        'commodities': float(os.getenv('CHANGE_THRESHOLD_COMMODITIES', 0.2))
+    }
+    FORCE_ANALYSIS = os.getenv('FORCE_ANALYSIS', 'false').lower() == 'true'
+    
+    # Ліміти запитів до зовнішніх API (уточнюються з заголовків відповідей)
+    RATE_LIMITS = {
+        'groq': {
+            'requests_per_minute': int(os.getenv('GROQ_RPM', 30)),
+            'tokens_per_minute': int(os.getenv('GROQ_TPM', 8000))
+        },
+        'cryptocompare': {
+            'requests_per_minute': int(os.getenv('CRYPTOCOMPARE_RPM', 30))
+        },
+        'nbu': {
+            'requests_per_minute': int(os.getenv('NBU_RPM', 60))
+        }
+    }
     
     # Налаштування новинних джерел
     NEWS_SOURCES = [
@@ -93,6 +195,11 @@ class Config:
         'BTC', 'ETH', 'BNB', 'XRP', 'SOL', 'ADA', 'DOT', 'DOGE'
     ]
     
+    # Товари
+    COMMODITIES = [
+        'GOLD', 'SILVER', 'OIL_BRENT', 'NATURAL_GAS'
+    ]
+    
     # Ключові слова для аналізу новин
     KEYWORDS = {
         'positive': ['зростання', 'підвищення', 'покращення', 'сильний', 'стабільність',
@@ -109,12 +216,34 @@ class Config:
         """Отримання поточного часу в Києві"""
         return datetime.now(Config.KYIV_TZ)
 
+    @classmethod
+    def get_model_chain(cls):
+        """Ланцюжок моделей з дедлайнами (основна модель перша)"""
+        chain = [{'model': cls.GROQ_MODEL, 'deadline': cls.GROQ_MODEL_DEADLINE}]
+        
+        for item in cls.GROQ_FALLBACK_MODELS.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            
+            model, _, deadline = item.rpartition(':')
+            try:
+                deadline = float(deadline)
+            except ValueError:
+                model, deadline = item, cls.GROQ_FALLBACK_DEADLINE
+            
+            if model and model != cls.GROQ_MODEL:
+                chain.append({'model': model, 'deadline': deadline})
+        
+        return chain
+
     @classmethod
     def validate(cls):
         """Перевірка конфігурації"""
         errors = []
         
-        if not cls.GROQ_API_KEY:
+        # Локальний скоринг працює без Groq
+        if cls.SCORING_MODE != 'local' and not cls.GROQ_API_KEY:
             errors.append("❌ GROQ_API_KEY не встановлено")
         
         if not cls.CURRENCIES:
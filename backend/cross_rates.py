@@ -0,0 +1,68 @@
+import logging
+from datetime import timedelta
+import numpy as np
+from config import Config
+
+logger = logging.getLogger("cross_rates")
+
+
+class CrossRateEngine:
+    """
+    Крос-курси між усіма валютами з Config.CURRENCIES з офіційних курсів НБУ.
+    Курс НБУ — гривень за одиницю валюти, тож BASE/QUOTE = rate[BASE] / rate[QUOTE]
+    для всієї матриці однією операцією. Результат кешується на дату курсу НБУ.
+    """
+
+    CACHE_KEY = 'cross_rates'
+
+    def __init__(self, history, cache, currencies=None):
+        self.history = history
+        self.cache = cache
+        self.currencies = list(currencies or Config.CURRENCIES)
+
+    @staticmethod
+    def matrix(uah_rates):
+        """N×N матриця: [i, j] — ціна валюти i у валюті j"""
+        rates = np.asarray(uah_rates, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.divide.outer(rates, rates)
+
+    def compute(self, today=None):
+        """Пари з курсами та зміною відносно попередньої дати НБУ"""
+        today = today or Config.get_kyiv_time().date()
+        dates, _, values = self.history.load(self.currencies, start=today - timedelta(days=14))
+        if not len(dates):
+            return {}
+
+        rate_date = str(dates[-1])
+        cached = self.cache.get(self.CACHE_KEY)
+        if cached and cached.get('date') == rate_date:
+            return cached
+
+        rates = np.array(values, dtype=np.float64)
+        if 'UAH' in self.currencies:
+            rates[:, self.currencies.index('UAH')] = 1.0
+
+        current = self.matrix(rates[-1])
+        previous = self.matrix(rates[-2]) if len(rates) > 1 else np.full_like(current, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (current / previous - 1) * 100
+
+        # Лише наявні пари без діагоналі
+        valid = np.isfinite(current) & ~np.eye(len(self.currencies), dtype=bool)
+        pairs = {}
+        for i, j in zip(*np.nonzero(valid)):
+            pairs[f"{self.currencies[i]}/{self.currencies[j]}"] = {
+                'rate': float(f"{current[i, j]:.6g}"),
+                'change_pct': round(float(change[i, j]), 4) if np.isfinite(change[i, j]) else None
+            }
+
+        result = {
+            'date': rate_date,
+            'previous_date': str(dates[-2]) if len(dates) > 1 else None,
+            'pairs': pairs
+        }
+        self.cache.set(self.CACHE_KEY, result)
+
+        logger.debug(f"💱 Крос-курси на {rate_date}: {len(pairs)} пар")
+        return result
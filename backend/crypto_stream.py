@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+import numpy as np
+from config import Config
+
+logger = logging.getLogger("crypto_stream")
+
+
+class RingBuffer:
+    """Кільцевий буфер фіксованої ємності з рядками однакової ширини"""
+
+    def __init__(self, capacity, width):
+        self.data = np.full((capacity, width), np.nan)
+        self.capacity = capacity
+        self.count = 0
+        self.pos = 0
+
+    def append(self, row):
+        self.data[self.pos] = row
+        self.pos = (self.pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self):
+        """Останній рядок (посилання, можна оновлювати на місці)"""
+        if not self.count:
+            return None
+        return self.data[(self.pos - 1) % self.capacity]
+
+    def view(self):
+        """Рядки від найстарішого до найновішого"""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return np.concatenate((self.data[self.pos:], self.data[:self.pos]))
+
+
+class CryptoStream:
+    """
+    Потоковий фід цін криптовалют через WebSocket (протокол CryptoCompare streamer).
+    Для кожного символу тримає останню ціну, тики та OHLC-бари в кільцевих буферах,
+    тож аналіз читає поточні значення без жодного запиту.
+    Адреса підключення задається ззовні — у тестах можна підставити локальний сервер.
+    """
+
+    TICK_FIELDS = 2   # час, ціна
+    BAR_FIELDS = 5    # початок бару, open, high, low, close
+
+    def __init__(self, symbols=None, url=None, quote='USD', tick_capacity=None,
+                 bar_capacity=None, bar_seconds=None, clock=time.time):
+        self.symbols = list(symbols or Config.CRYPTO)
+        self.url = url or Config.CRYPTO_STREAM_URL
+        self.quote = quote
+        self.bar_seconds = bar_seconds or Config.CRYPTO_STREAM_BAR_SECONDS
+        self.clock = clock
+
+        tick_capacity = tick_capacity or Config.CRYPTO_STREAM_TICKS
+        bar_capacity = bar_capacity or Config.CRYPTO_STREAM_BARS
+        self.ticks = {s: RingBuffer(tick_capacity, self.TICK_FIELDS) for s in self.symbols}
+        self.bars = {s: RingBuffer(bar_capacity, self.BAR_FIELDS) for s in self.symbols}
+        self.last_price = {}
+        self.last_update = {}
+
+        self._task = None
+        self._running = False
+
+    def start(self):
+        """Запустити фід у фоні"""
+        if self._task is None or self._task.done():
+            self._running = True
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Зупинити фід"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        """Підключення з перепідключенням (експоненційна пауза до 60 с)"""
+        import aiohttp
+        self._running = True
+        backoff = 1
+
+        while self._running:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.url, heartbeat=30) as ws:
+                        await ws.send_json(self._subscribe_message())
+                        logger.info(f"📡 Потік цін підключено: {len(self.symbols)} символів")
+                        backoff = 1
+
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self.handle_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Потік цін розірвано: {e}")
+
+            if self._running:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def handle_message(self, message):
+        """Обробка повідомлення CURRENTAGG (TYPE 5); решта ігнорується"""
+        if str(message.get('TYPE')) != '5' or 'PRICE' not in message:
+            return
+        if message.get('TOSYMBOL', self.quote) != self.quote:
+            return
+
+        symbol = message.get('FROMSYMBOL')
+        if symbol not in self.ticks:
+            return
+
+        timestamp = float(message.get('LASTUPDATE') or self.clock())
+        self.on_tick(symbol, float(message['PRICE']), timestamp)
+
+    def on_tick(self, symbol, price, timestamp):
+        """Новий тик: буфер тиків, останній бар (OHLC) і остання ціна"""
+        self.ticks[symbol].append((timestamp, price))
+        self.last_price[symbol] = price
+        self.last_update[symbol] = timestamp
+
+        bar_start = timestamp - timestamp % self.bar_seconds
+        bars = self.bars[symbol]
+        bar = bars.last()
+
+        if bar is not None and bar[0] == bar_start:
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+        else:
+            bars.append((bar_start, price, price, price, price))
+
+    def is_fresh(self, max_age=None):
+        """Чи є свіжі ціни для всіх символів"""
+        max_age = max_age or Config.CRYPTO_STREAM_MAX_AGE
+        now = self.clock()
+        return bool(self.last_update) and all(
+            now - self.last_update.get(symbol, 0) <= max_age for symbol in self.symbols
+        )
+
+    def statistics(self, symbol, window=3600):
+        """Ковзна статистика тиків за window секунд"""
+        ticks = self.ticks[symbol].view()
+        if not len(ticks):
+            return {}
+
+        recent = ticks[ticks[:, 0] >= self.clock() - window][:, 1]
+        if not len(recent):
+            return {}
+
+        return {
+            'mean': float(recent.mean()),
+            'std': float(recent.std()),
+            'min': float(recent.min()),
+            'max': float(recent.max()),
+            'change_pct': float((recent[-1] / recent[0] - 1) * 100) if recent[0] else 0.0,
+            'ticks': int(len(recent))
+        }
+
+    def get_bars(self, symbol):
+        """OHLC-бари символу від найстарішого: масив [початок, open, high, low, close]"""
+        return self.bars[symbol].view()
+
+    def snapshot(self, window=None):
+        """Поточні ціни у форматі EconomicDataCollector._get_crypto_prices"""
+        window = window or Config.CRYPTO_STREAM_STATS_WINDOW
+        result = {}
+
+        for symbol, price in self.last_price.items():
+            stats = self.statistics(symbol, window)
+            result[symbol] = {
+                self.quote: price,
+                'updated': datetime.fromtimestamp(self.last_update[symbol]).isoformat(),
+                'change_pct': round(stats.get('change_pct', 0.0), 3),
+                'volatility': round(stats.get('std', 0.0), 6),
+                'source': 'stream'
+            }
+
+        return result
+
+    def _subscribe_message(self):
+        return {
+            'action': 'SubAdd',
+            'subs': [f"5~CCCAGG~{symbol}~{self.quote}" for symbol in self.symbols]
+        }
@@ -1,27 +1,47 @@
-import asyncio
+import hashlib
 import logging
 import json
+import sys
 from datetime import datetime, timedelta
+from functools import cached_property
 import pytz
 from config import Config
-from news_analyzer import NewsAnalyzer
-from economic_data import EconomicDataCollector
-from groq_analyzer import GroqAnalyzer
 from data_handler import DataHandler
 
 logger = logging.getLogger("currency_advisor")
 
 class CurrencyAdvisor:
     def __init__(self):
-        self.news_analyzer = NewsAnalyzer()
-        self.economic_data = EconomicDataCollector()
-        self.groq_analyzer = GroqAnalyzer()
         self.data_handler = DataHandler()
         
         # Налаштування
         self.cache_hours = Config.CACHE_HOURS
         self.max_recommendations = Config.MAX_RECOMMENDATIONS
         self.language = Config.LANGUAGE
+        
+        # Останній запуск моделі (AI або локальний скоринг) для результату аналізу
+        self.last_run = {}
+
+    # Етапи (aiohttp, feedparser, groq, numpy) імпортуються лише тоді, коли етап виконується
+    @cached_property
+    def news_analyzer(self):
+        from news_analyzer import NewsAnalyzer
+        return NewsAnalyzer()
+
+    @cached_property
+    def economic_data(self):
+        from economic_data import EconomicDataCollector
+        return EconomicDataCollector()
+
+    @cached_property
+    def groq_analyzer(self):
+        from groq_analyzer import GroqAnalyzer
+        return GroqAnalyzer()
+
+    @cached_property
+    def local_scorer(self):
+        from local_scorer import LocalScorer
+        return LocalScorer()
 
     async def analyze_market(self):
         """Основний метод аналізу ринку"""
@@ -34,66 +54,36 @@ class CurrencyAdvisor:
 
         try:
             # 1. Збір новин
-            logger.info("📰 Збір останніх новин...")
-            news_data = await self.news_analyzer.get_latest_news()
-            
-            if not news_data or len(news_data) < 5:
-                logger.warning("⚠️  Отримано замало новин, використовуємо кешовані дані")
-                news_data = self.data_handler.get_cached_news()
+            news_data = await self.fetch_news()
 
             # 2. Збір економічних показників
-            logger.info("📊 Збір економічних показників...")
-            economic_data = await self.economic_data.get_latest_indicators()
-            
-            # 3. Аналіз впливу на валюти
-            logger.info("🔍 Аналіз впливу новин на валюти...")
-            currency_impact = self._analyze_currency_impact(news_data, economic_data)
+            economic_data = await self.fetch_indicators()
             
-            # 4. Генерація рекомендацій через AI
-            logger.info("🧠 Генерація рекомендацій через AI...")
-            recommendations = await self.groq_analyzer.generate_recommendations(
-                news_data, 
-                economic_data, 
-                currency_impact,
-                language=self.language
-            )
+            # Якщо ні показники, ні новини суттєво не змінилися — попередні рекомендації актуальні
+            previous = self._reusable_result(economic_data, self._news_fingerprint(news_data))
+            if previous:
+                # Дані ті самі, але час наступного аналізу в маніфесті має бути актуальним
+                import asyncio
+                previous['next_analysis'] = await asyncio.to_thread(
+                    self.data_handler.refresh_next_analysis, previous['analysis_triggers']
+                )
+                await self.economic_data.drain()
+                logger.info("=" * 60)
+                return previous
             
-            # 5. Формування результату
-            market_overview = self._create_market_overview(news_data, economic_data, currency_impact)
+            # 3. Аналіз впливу на валюти
+            currency_impact = self.score(news_data, economic_data)
             
-            result = {
-                'timestamp': Config.get_kyiv_time().isoformat(),
-                'timestamp_utc': datetime.utcnow().isoformat() + 'Z',
-                'timezone': 'Europe/Kiev (UTC+2)',
-                'language': self.language,
-                'recommendations': recommendations[:self.max_recommendations],
-                'market_overview': market_overview,
-                'news_count': len(news_data),
-                'economic_indicators_count': len(economic_data.get('indicators', {})),
-                'currency_impact_summary': self._summarize_impact(currency_impact),
-                'analysis_id': f"analysis_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            }
+            # 4-5. Генерація рекомендацій (AI або локальний скоринг) і формування результату
+            result = await self.generate(news_data, economic_data, currency_impact)
             
-            # 6. Збереження результатів
-            logger.info("💾 Збереження результатів...")
-            save_result = self.data_handler.save_recommendations(result)
+            # 6. Збереження результатів — в окремому потоці: очікування блокування
+            # каталогу даних і запис файлів не зупиняють цикл подій (потік цін у демоні)
+            import asyncio
+            await asyncio.to_thread(self.publish, result, news_data)
             
-            if save_result:
-                logger.info(f"✅ Збережено {len(recommendations)} рекомендацій")
-                
-                # Вивід результатів
-                logger.info(f"\n🎯 ЗГЕНЕРОВАНО РЕКОМЕНДАЦІЙ: {len(recommendations)}")
-                for i, rec in enumerate(recommendations[:5], 1):
-                    action_icon = '✅' if 'BUY' in rec['action'] else '❌'
-                    logger.info(f"   {i}. {action_icon} {rec['asset']}: {rec['action']} ({rec['confidence']*100:.1f}%)")
-                    logger.info(f"      Причина: {rec['reason'][:80]}...")
-                
-                logger.info(f"\n📊 ОГЛЯД РИНКУ:")
-                logger.info(f"   • Загальний настрій: {market_overview.get('overall_sentiment', 'НЕЙТРАЛЬНИЙ')}")
-                logger.info(f"   • Найкраща валюта: {market_overview.get('top_currency', 'N/A')}")
-                logger.info(f"   • Найгірша валюта: {market_overview.get('worst_currency', 'N/A')}")
-            else:
-                logger.error("❌ Помилка збереження рекомендацій")
+            # Фонові оновлення кешу мають завершитися до виходу процесу
+            await self.economic_data.drain()
             
             logger.info("=" * 60)
             return result
@@ -104,6 +94,136 @@ class CurrencyAdvisor:
             logger.error(f"📋 Трейс: {traceback.format_exc()}")
             return {}
 
+    async def fetch_news(self):
+        """Етап 1: останні новини (кешовані, якщо свіжих замало)"""
+        logger.info("📰 Збір останніх новин...")
+        news_data = await self.news_analyzer.get_latest_news()
+        
+        if not news_data or len(news_data) < 5:
+            logger.warning("⚠️  Отримано замало новин, використовуємо кешовані дані")
+            news_data = self.data_handler.get_cached_news()
+        return news_data
+
+    async def fetch_indicators(self):
+        """Етап 2: економічні показники"""
+        logger.info("📊 Збір економічних показників...")
+        return await self.economic_data.get_latest_indicators()
+
+    def score(self, news_data, economic_data):
+        """Етап 3: вплив новин і показників на окремі валюти"""
+        logger.info("🔍 Аналіз впливу новин на валюти...")
+        return self._analyze_currency_impact(news_data, economic_data)
+
+    async def generate(self, news_data, economic_data, currency_impact):
+        """Етап 4: рекомендації (AI або локальний скоринг) і повний результат аналізу"""
+        if Config.SCORING_MODE == 'local':
+            logger.info("⚡ Генерація рекомендацій локальним скорингом...")
+            recommendations = self.local_scorer.recommend(currency_impact, economic_data, self.language)
+            # GroqAnalyzer не створюється: локальному шляху не потрібен ні клієнт, ні ключ
+            self.last_run = {'model': 'local', 'latency_ms': 0, 'total_ms': 0, 'hedged': False, 'fallback': False}
+        else:
+            logger.info("🧠 Генерація рекомендацій через AI...")
+            recommendations = await self.groq_analyzer.generate_recommendations(
+                news_data, 
+                economic_data, 
+                currency_impact,
+                language=self.language
+            )
+            recommendations = self.local_scorer.rank_with_ai(recommendations, currency_impact, economic_data)
+            self.last_run = self.groq_analyzer.last_run
+        
+        market_overview = self._create_market_overview(news_data, economic_data, currency_impact)
+        
+        return {
+            'timestamp': Config.get_kyiv_time().isoformat(),
+            'timestamp_utc': datetime.utcnow().isoformat() + 'Z',
+            'timezone': 'Europe/Kiev (UTC+2)',
+            'language': self.language,
+            'recommendations': recommendations[:self.max_recommendations],
+            'market_overview': market_overview,
+            'news_count': len(news_data),
+            'economic_indicators_count': len(economic_data.get('indicators', {})),
+            'currency_impact_summary': self._summarize_impact(currency_impact),
+            'ai_model': self.last_run,
+            'analysis_triggers': economic_data.get('calendar', {}).get('analysis_triggers', []),
+            'news_fingerprint': self._news_fingerprint(news_data),
+            'indicator_changes': len(economic_data.get('changes', {}).get('material_fields', [])),
+            'analysis_id': f"analysis_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        }
+
+    def publish(self, result, news_data=None):
+        """Етап 5: збереження і публікація результату разом з кешем новин"""
+        logger.info("💾 Збереження результатів...")
+        save_result = self.data_handler.save_recommendations(result, news_data)
+        
+        if save_result:
+            recommendations = result['recommendations']
+            market_overview = result['market_overview']
+            logger.info(f"✅ Збережено {len(recommendations)} рекомендацій")
+            
+            # Вивід результатів
+            logger.info(f"\n🎯 ЗГЕНЕРОВАНО РЕКОМЕНДАЦІЙ: {len(recommendations)}")
+            for i, rec in enumerate(recommendations[:5], 1):
+                action_icon = '✅' if 'BUY' in rec['action'] else '❌'
+                logger.info(f"   {i}. {action_icon} {rec['asset']}: {rec['action']} ({rec['confidence']*100:.1f}%)")
+                logger.info(f"      Причина: {rec['reason'][:80]}...")
+            
+            logger.info(f"\n📊 ОГЛЯД РИНКУ:")
+            logger.info(f"   • Загальний настрій: {market_overview.get('overall_sentiment', 'НЕЙТРАЛЬНИЙ')}")
+            logger.info(f"   • Найкраща валюта: {market_overview.get('top_currency', 'N/A')}")
+            logger.info(f"   • Найгірша валюта: {market_overview.get('worst_currency', 'N/A')}")
+        else:
+            logger.error("❌ Помилка збереження рекомендацій")
+        return save_result
+
+    async def run_daemon(self):
+        """Режим демона: потік цін криптовалют у фоні та аналіз з інтервалом"""
+        import asyncio
+        from crypto_stream import CryptoStream
+        
+        stream = CryptoStream()
+        self.economic_data.price_stream = stream
+        stream.start()
+        
+        logger.info(f"🔁 Режим демона: аналіз кожні {Config.DAEMON_INTERVAL_MINUTES} хв")
+        try:
+            while True:
+                result = await self.analyze_market()
+                await asyncio.sleep(self._seconds_until_next_run(result))
+        finally:
+            await stream.stop()
+
+    def _seconds_until_next_run(self, result):
+        """Пауза до наступного аналізу: інтервал або раніше, якщо є важлива подія"""
+        delay = Config.DAEMON_INTERVAL_MINUTES * 60
+        now = Config.get_kyiv_time()
+        
+        for trigger in (result or {}).get('analysis_triggers', []):
+            seconds = (datetime.fromisoformat(trigger) - now).total_seconds()
+            if 0 < seconds < delay:
+                delay = seconds
+        
+        return delay
+
+    def _news_fingerprint(self, news_data):
+        """Відбиток набору новин: однаковий для тих самих новин у будь-якому порядку"""
+        keys = sorted(n.get('link') or n.get('title', '') for n in news_data)
+        return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+    def _reusable_result(self, economic_data, news_fingerprint):
+        """Попередній результат, якщо входи аналізу не змінилися (FORCE_ANALYSIS вимикає перевірку)"""
+        if Config.FORCE_ANALYSIS or economic_data.get('changes', {}).get('material', True):
+            return None
+        
+        previous = self.data_handler.load_recommendations()
+        if not previous.get('recommendations') or previous.get('news_fingerprint') != news_fingerprint:
+            return None
+        
+        logger.info("⏭️ Показники та новини без суттєвих змін — використовуємо попередні рекомендації")
+        previous['skipped'] = True
+        previous['analysis_triggers'] = economic_data.get('calendar', {}).get('analysis_triggers', [])
+        return previous
+
     def _analyze_currency_impact(self, news_data, economic_data):
         """Аналіз впливу новин на окремі валюти"""
         impact = {}
@@ -227,7 +347,7 @@ class CurrencyAdvisor:
         
         return summary
 
-async def main():
+async def main(daemon=False):
     """Головна функція"""
     print("\n" + "="*60)
     print(f"🎯 ЗАПУСК КУРСОВОГО РАДНИКА - {Config.get_kyiv_time().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -251,6 +371,11 @@ async def main():
     
     # Запуск аналізу
     advisor = CurrencyAdvisor()
+    
+    if daemon:
+        await advisor.run_daemon()
+        return {}
+    
     result = await advisor.analyze_market()
     
     if result and result.get('recommendations'):
@@ -301,5 +426,24 @@ async def main():
     
     return result
 
+def print_statistics():
+    """Статистика історії без завантаження етапів аналізу"""
+    stats = DataHandler().get_statistics()
+    print(json.dumps(stats, ensure_ascii=False, indent=2, default=str))
+
+
+def check_config():
+    """Перевірка конфігурації без запуску аналізу"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    valid = Config.validate()
+    print("✅ Конфігурація коректна" if valid else "❌ Конфігурація містить помилки")
+    return valid
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    if '--stats' in sys.argv:
+        print_statistics()
+    elif '--check-config' in sys.argv:
+        sys.exit(0 if check_config() else 1)
+    else:
+        import asyncio
+        asyncio.run(main(daemon='--daemon' in sys.argv))
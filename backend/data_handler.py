@@ -1,9 +1,15 @@
 import json
 import os
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import pytz
 from config import Config
+from file_lock import data_lock
+from history_store import HistoryStore
+from history_stats import HistoryStatistics
+from publisher import ArtifactPublisher, Serialized
+from recommendation_delta import compute_delta, apply_delta, is_empty
 
 logger = logging.getLogger("data_handler")
 
@@ -12,6 +18,18 @@ class DataHandler:
         self.data_dir = Config.DATA_DIR
         self.kyiv_tz = pytz.timezone('Europe/Kiev')
         self.create_data_dir()
+        
+        # Історія аналізів: журнал для дописування з індексом за часом і analysis_id
+        self.history = HistoryStore()
+        
+        # Агрегати історії для статистики без перечитування журналу
+        self.stats = HistoryStatistics()
+        
+        # Міграція і перебудова агрегатів — лише на шляху запису (migrate у transaction)
+        self._migrated = False
+        
+        # Атомарна публікація артефактів під спільним маніфестом
+        self.publisher = ArtifactPublisher()
 
     def create_data_dir(self):
         """Створення директорій для даних"""
@@ -30,10 +48,6 @@ class DataHandler:
                     "next_analysis": None
                 }, f, indent=2, ensure_ascii=False)
         
-        if not os.path.exists(Config.HISTORY_FILE):
-            with open(Config.HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump([], f, indent=2, ensure_ascii=False)
-                
         if not os.path.exists(Config.NEWS_CACHE_FILE):
             with open(Config.NEWS_CACHE_FILE, 'w', encoding='utf-8') as f:
                 json.dump({
@@ -51,8 +65,8 @@ class DataHandler:
                     "market_status": {}
                 }, f, indent=2, ensure_ascii=False)
 
-    def save_recommendations(self, data):
-        """Збереження рекомендацій"""
+    def save_recommendations(self, data, news_data=None):
+        """Збереження рекомендацій (і кешу новин, якщо передано список новин) однією версією"""
         try:
             if not data or 'recommendations' not in data:
                 logger.error("⚠️ Немає даних для збереження")
@@ -77,25 +91,35 @@ class DataHandler:
                 "total_recommendations": len(recommendations),
                 "news_count": data.get('news_count', 0),
                 "language": data.get('language', 'uk'),
-                "next_analysis": self._calculate_next_analysis_time()
+                "ai_model": data.get('ai_model', {}),
+                "news_fingerprint": data.get('news_fingerprint'),
+                "next_analysis": self._calculate_next_analysis_time(data.get('analysis_triggers', []))
             }
             
-            # Зберігаємо в основний файл
-            with open(Config.RECOMMENDATIONS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False, default=str)
-            
-            # Додаємо в історію
-            self._add_to_history(data)
-            
-            # Оновлюємо кеш новин
-            if 'news_summary' in data:
-                self._update_news_cache(data.get('news_data', []))
+            # Знімок, маніфест та історію читаємо й оновлюємо під одним блокуванням
+            with self.transaction():
+                # Повний знімок — періодично; між ними лише дельта відносно нього
+                artifacts, delta_info = self._recommendation_artifacts(data_to_save)
+                
+                # Публікуємо рекомендації і кеш новин однією версією
+                news_cache = self._news_cache_payload(news_data)
+                if news_cache:
+                    artifacts['news_cache'] = (Config.NEWS_CACHE_FILE, news_cache)
+                
+                self.publisher.publish(artifacts, generated_at=data_to_save['last_update'], extra={
+                    'analysis_id': data_to_save['analysis_id'],
+                    'next_analysis': data_to_save['next_analysis'],
+                    **delta_info
+                }, compact=('recommendations',))
+                
+                # Додаємо в історію
+                self._add_to_history(data)
+                
+                # Очищаємо старі дані з історії
+                self._cleanup_old_history()
             
             logger.info(f"💾 Збережено {len(recommendations)} рекомендацій")
             
-            # Очищаємо старі дані з історії
-            self._cleanup_old_history()
-            
             return True
             
         except Exception as e:
@@ -104,71 +128,152 @@ class DataHandler:
             logger.error(f"Деталі: {traceback.format_exc()}")
             return False
 
-    def _calculate_next_analysis_time(self):
-        """Розрахунок часу наступного аналізу"""
+    @contextmanager
+    def transaction(self):
+        """
+        Транзакція запису в каталог даних: блокування між процесами (з таймаутом)
+        і свіжий стан історії та агрегатів, які могли оновити паралельні запуски.
+        Вкладені транзакції в межах процесу повторно використовують блокування.
+        Очікування синхронне — з корутин викликайте через asyncio.to_thread.
+        """
+        with data_lock():
+            self.history.reload()
+            self.stats.reload()
+            if not self._migrated:
+                self.migrate()
+            yield
+
+    def migrate(self):
+        """
+        Перенести стару історію і перебудувати порожні агрегати (під блокуванням).
+        Викликається з transaction() один раз за процес: читання (--stats,
+        cli.py stats) не бере блокування і нічого не записує.
+        """
+        with data_lock():
+            self.history.migrate_legacy()
+            if self.stats.empty and len(self.history):
+                self.stats.rebuild(self.history.since(max(self.stats.windows)))
+                self.stats.save()
+        self._migrated = True
+
+    def refresh_next_analysis(self, analysis_triggers=None):
+        """
+        Аналіз пропущено (входи не змінилися): перепублікувати в маніфесті лише
+        час наступного аналізу. Артефакти і їхній хеш не змінюються, тож клієнти
+        не перезавантажують дані. Повертає новий час.
+        """
+        next_analysis = self._calculate_next_analysis_time(analysis_triggers or [])
+        try:
+            with self.transaction():
+                self.publisher.publish({}, extra={'next_analysis': next_analysis})
+        except Exception as e:
+            logger.error(f"❌ Не вдалося оновити час наступного аналізу: {e}")
+        return next_analysis
+
+    def _recommendation_artifacts(self, data_to_save):
+        """Артефакти рекомендацій: дельта відносно знімка або новий повний знімок"""
+        base = self._load_json(Config.RECOMMENDATIONS_FILE)
+        deltas = self.publisher.load_manifest().get('deltas_since_snapshot', 0)
+        
+        delta = compute_delta(base, data_to_save) if base and base.get('analysis_id') else None
+        # Дельта без змін (лише meta) не віддаляє стан від знімка і не наближає новий
+        step = 0 if delta is not None and is_empty(delta) else 1
+        # Серіалізуємо один раз: ці ж байти порівнюємо за розміром і публікуємо
+        snapshot = Serialized(data_to_save)
+        delta = Serialized(delta) if delta is not None else None
+        full = (
+            delta is None
+            or deltas + step >= Config.FULL_SNAPSHOT_EVERY
+            or len(delta.minified) > len(snapshot.minified) / 2
+        )
+        
+        if full:
+            logger.debug("📸 Публікуємо повний знімок рекомендацій")
+            return {
+                'recommendations': (Config.RECOMMENDATIONS_FILE, snapshot),
+                'delta': (Config.DELTA_FILE, compute_delta(data_to_save, data_to_save))
+            }, {'delta_base': data_to_save['analysis_id'], 'deltas_since_snapshot': 0}
+        
+        logger.debug(f"🧩 Публікуємо дельту відносно {base['analysis_id']}")
+        return {
+            'delta': (Config.DELTA_FILE, delta)
+        }, {'delta_base': base['analysis_id'], 'deltas_since_snapshot': deltas + step}
+
+    def _load_json(self, path):
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.debug(f"Помилка читання {path}: {e}")
+        return None
+
+    def _calculate_next_analysis_time(self, extra_times=None):
+        """Розрахунок часу наступного аналізу (з урахуванням важливих подій календаря)"""
         now_kyiv = Config.get_kyiv_time()
         analysis_hours = [8, 12, 16, 20]
         
+        next_time = None
         for hour in analysis_hours:
             if now_kyiv.hour < hour:
                 next_time = now_kyiv.replace(hour=hour, minute=0, second=0, microsecond=0)
-                return next_time.isoformat()
+                break
         
         # Якщо всі години минули сьогодні, беремо першу годину завтра
-        next_time = (now_kyiv + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        if next_time is None:
+            next_time = (now_kyiv + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+        
+        # Додатковий аналіз після важливої події, якщо вона раніше за плановий
+        for extra in extra_times or []:
+            try:
+                extra_time = datetime.fromisoformat(extra)
+            except (TypeError, ValueError):
+                continue
+            if now_kyiv < extra_time < next_time:
+                next_time = extra_time
+        
         return next_time.isoformat()
 
     def _add_to_history(self, data):
         """Додавання даних до історії"""
         try:
-            history = []
-            if os.path.exists(Config.HISTORY_FILE):
-                with open(Config.HISTORY_FILE, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
+            recommendations = data.get('recommendations', [])
+            
+            # Повторна публікація тієї ж генерації (cli.py publish) не дублює запис історії
+            analysis_id = data.get('analysis_id')
+            if analysis_id and self.history.get(analysis_id) is not None:
+                logger.info(f"⏭️ Аналіз {analysis_id} уже є в історії — запис не додається")
+                return
             
-            # Створюємо запис історії
+            # Створюємо запис історії (повний список рекомендацій для подальшого аналізу)
             history_entry = {
                 'timestamp': data.get('timestamp', Config.get_kyiv_time().isoformat()),
                 'analysis_id': data.get('analysis_id', ''),
-                'recommendations_count': len(data.get('recommendations', [])),
+                'recommendations_count': len(recommendations),
                 'market_overview': data.get('market_overview', {}),
-                'top_recommendations': data.get('recommendations', [])[:3]
+                'top_recommendations': recommendations[:3],
+                'recommendations': recommendations
             }
             
-            history.append(history_entry)
-            
-            # Обмежуємо історію останніми 100 записами
-            if len(history) > 100:
-                history = history[-100:]
+            self.history.append(history_entry)
             
-            with open(Config.HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump(history, f, indent=2, ensure_ascii=False, default=str)
-                
-            logger.debug(f"📚 Додано запис до історії: {history_entry['analysis_id']}")
+            self.stats.add(history_entry)
+            self.stats.save()
                 
         except Exception as e:
             logger.error(f"❌ Помилка додавання в історію: {e}")
 
-    def _update_news_cache(self, news_data):
-        """Оновлення кешу новин"""
-        try:
-            if not news_data:
-                return
-            
-            cache_data = {
-                'last_update': Config.get_kyiv_time().isoformat(),
-                'news': news_data[:50],  # Кешуємо максимум 50 новин
-                'news_count': len(news_data),
-                'cache_expiry': (Config.get_kyiv_time() + timedelta(hours=Config.CACHE_HOURS)).isoformat()
-            }
-            
-            with open(Config.NEWS_CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False, default=str)
-            
-            logger.debug(f"💾 Оновлено кеш новин: {len(news_data)} записів")
-            
-        except Exception as e:
-            logger.error(f"❌ Помилка оновлення кешу новин: {e}")
+    def _news_cache_payload(self, news_data):
+        """Вміст кешу новин або None, якщо новин немає"""
+        if not news_data:
+            return None
+        
+        return {
+            'last_update': Config.get_kyiv_time().isoformat(),
+            'news': news_data[:50],  # Кешуємо максимум 50 новин
+            'news_count': len(news_data),
+            'cache_expiry': (Config.get_kyiv_time() + timedelta(hours=Config.CACHE_HOURS)).isoformat()
+        }
 
     def get_cached_news(self):
         """Отримати кешовані новини"""
@@ -190,12 +295,14 @@ class DataHandler:
         return []
 
     def load_recommendations(self):
-        """Завантаження поточних рекомендацій"""
+        """Завантаження поточних рекомендацій (знімок з застосованою дельтою)"""
         try:
-            if os.path.exists(Config.RECOMMENDATIONS_FILE):
-                with open(Config.RECOMMENDATIONS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data
+            data = self._load_json(Config.RECOMMENDATIONS_FILE)
+            if data is not None:
+                delta = self._load_json(Config.DELTA_FILE)
+                if delta and delta.get('base') and delta.get('base') == data.get('analysis_id'):
+                    data = apply_delta(data, delta)
+                return data
             return {
                 "last_update": None,
                 "recommendations": [],
@@ -212,88 +319,33 @@ class DataHandler:
     def load_history(self, days=7):
         """Завантаження історії за останні дні"""
         try:
-            if os.path.exists(Config.HISTORY_FILE):
-                with open(Config.HISTORY_FILE, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-                
-                # Фільтруємо за датою
-                filtered_history = []
-                cutoff_date = Config.get_kyiv_time() - timedelta(days=days)
-                
-                for entry in history:
-                    entry_date_str = entry.get('timestamp')
-                    if entry_date_str:
-                        try:
-                            entry_date = datetime.fromisoformat(entry_date_str)
-                            if entry_date.tzinfo is None:
-                                entry_date = pytz.UTC.localize(entry_date)
-                            
-                            if entry_date >= cutoff_date:
-                                filtered_history.append(entry)
-                        except:
-                            continue
-                
-                return filtered_history
-        
+            return self.history.since(days)
         except Exception as e:
             logger.error(f"❌ Помилка завантаження історії: {e}")
         
         return []
 
     def _cleanup_old_history(self):
-        """Очищення старої історії"""
+        """Очищення старої історії (ущільнення журналу у фоні)"""
         try:
-            # Завантажуємо всю історію
-            history = self.load_history(days=365)  # Завантажуємо за рік
-            
-            # Залишаємо тільки останні 100 записів
-            if len(history) > 100:
-                history = history[-100:]
-                
-                with open(Config.HISTORY_FILE, 'w', encoding='utf-8') as f:
-                    json.dump(history, f, indent=2, ensure_ascii=False, default=str)
-                
-                logger.debug(f"🧹 Очищено історію: залишено {len(history)} записів")
-                
+            self.history.maybe_compact()
         except Exception as e:
             logger.error(f"❌ Помилка очищення історії: {e}")
 
-    def get_statistics(self):
-        """Отримання статистики"""
-        stats = {
+    def get_statistics(self, window=30):
+        """Отримання статистики (з агрегатів, що оновлюються при кожному збереженні)"""
+        try:
+            if self.stats.empty and len(self.history):
+                # Агрегати ще не збережено (це зробить перший запис) — рахуємо в пам'яті
+                self.stats.rebuild(self.history.since(max(self.stats.windows)))
+            return self.stats.summary(window)
+        except Exception as e:
+            logger.error(f"❌ Помилка отримання статистики: {e}")
+        
+        return {
             'total_analyses': 0,
             'last_analysis': None,
             'avg_recommendations': 0,
             'most_recommended': [],
             'least_recommended': []
         }
-        
-        try:
-            history = self.load_history(days=30)
-            
-            if history:
-                stats['total_analyses'] = len(history)
-                stats['last_analysis'] = history[-1].get('timestamp') if history else None
-                
-                # Рахуємо середню кількість рекомендацій
-                total_recs = sum(h.get('recommendations_count', 0) for h in history)
-                stats['avg_recommendations'] = round(total_recs / len(history), 1) if history else 0
-                
-                # Аналізуємо найбільш рекомендовані активи
-                asset_counts = {}
-                for entry in history:
-                    for rec in entry.get('top_recommendations', []):
-                        asset = rec.get('asset')
-                        action = rec.get('action')
-                        
-                        if asset and ('BUY' in action or 'STRONG_BUY' in action):
-                            asset_counts[asset] = asset_counts.get(asset, 0) + 1
-                
-                if asset_counts:
-                    sorted_assets = sorted(asset_counts.items(), key=lambda x: x[1], reverse=True)
-                    stats['most_recommended'] = sorted_assets[:5]
-        
-        except Exception as e:
-            logger.error(f"❌ Помилка отримання статистики: {e}")
-        
-        return stats
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import re
+import time
+from config import Config
+from publisher import atomic_write
+
+logger = logging.getLogger("disk_cache")
+
+
+class DiskCache:
+    """
+    Файловий кеш, спільний для всіх запусків: один JSON-файл на ключ.
+    Зберігається час отримання, а не час закінчення, тому TTL
+    задається під час читання і може відрізнятися для різних споживачів.
+    """
+
+    def __init__(self, directory=None, clock=time.time):
+        self.directory = directory or Config.CACHE_DIR
+        self.clock = clock
+        self._memory = {}
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key, default=None):
+        """Значення з кешу незалежно від віку"""
+        entry = self._load(key)
+        return entry['value'] if entry else default
+
+    def age(self, key):
+        """Вік запису в секундах або None, якщо запису немає"""
+        entry = self._load(key)
+        if not entry:
+            return None
+        return max(0.0, self.clock() - entry['fetched_at'])
+
+    def is_fresh(self, key, ttl):
+        """Запис молодший за ttl секунд"""
+        age = self.age(key)
+        return age is not None and age < ttl
+
+    def is_usable(self, key, max_stale):
+        """Запис ще можна віддати як застарілий (поки оновлюється у фоні)"""
+        age = self.age(key)
+        return age is not None and age < max_stale
+
+    def set(self, key, value):
+        """Записати значення з поточним часом отримання"""
+        entry = {'fetched_at': self.clock(), 'value': value}
+        self._memory[key] = entry
+
+        try:
+            payload = json.dumps(entry, ensure_ascii=False, default=str).encode('utf-8')
+            atomic_write(self._path(key), payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося записати кеш {key}: {e}")
+
+    def delete(self, key):
+        """Видалити запис"""
+        self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _load(self, key):
+        if key in self._memory:
+            return self._memory[key]
+
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if 'fetched_at' in entry and 'value' in entry:
+                self._memory[key] = entry
+                return entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"Пошкоджений запис кешу {key}: {e}")
+
+        return None
+
+    def _path(self, key):
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        return os.path.join(self.directory, f"{safe_key}.json")
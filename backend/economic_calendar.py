@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from config import Config
+
+logger = logging.getLogger("economic_calendar")
+
+
+class CalendarSource(ABC):
+    """Джерело подій економічного календаря"""
+
+    @abstractmethod
+    def fetch(self):
+        """Список подій (словники з date/time або datetime, country/currency, event, importance)"""
+
+
+class FileCalendarSource(CalendarSource):
+    """
+    Події з JSON-файлу (список подій або {"events": [...]}). Типовий файл
+    data/calendar_source.json ведеться вручну: до нього додаються офіційні
+    розклади засідань центробанків. Подія — {"datetime": ISO з поясом або
+    "date"+"time" за Києвом, "country" або "currency", "event", "importance"}.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.CALENDAR_SOURCE_FILE
+
+    def fetch(self):
+        if not os.path.exists(self.path):
+            logger.warning(f"⚠️ Джерело календаря {self.path} не знайдено — події не оновлюються")
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('events', []) if isinstance(data, dict) else data
+
+
+class CalendarStore:
+    """
+    Індексоване сховище подій: відсортований за часом список і окремий
+    відсортований індекс для кожної валюти. Вибірка "події для валют
+    у найближчі N годин" — бінарний пошук по індексах, O(k·log n).
+    """
+
+    COUNTRY_CURRENCY = {
+        'USA': 'USD', 'US': 'USD', 'EU': 'EUR', 'EZ': 'EUR', 'UK': 'GBP', 'GB': 'GBP',
+        'Japan': 'JPY', 'JP': 'JPY', 'Switzerland': 'CHF', 'CH': 'CHF', 'Canada': 'CAD',
+        'CA': 'CAD', 'Australia': 'AUD', 'AU': 'AUD', 'New Zealand': 'NZD', 'NZ': 'NZD',
+        'China': 'CNY', 'CN': 'CNY', 'Ukraine': 'UAH', 'UA': 'UAH', 'Poland': 'PLN',
+        'PL': 'PLN', 'Turkey': 'TRY', 'TR': 'TRY', 'India': 'INR', 'IN': 'INR',
+        'Brazil': 'BRL', 'BR': 'BRL', 'Mexico': 'MXN', 'MX': 'MXN', 'Russia': 'RUB', 'RU': 'RUB'
+    }
+
+    IMPORTANCE = {'low': 1, 'medium': 2, 'high': 3}
+
+    def __init__(self, path=None):
+        self.path = path or Config.CALENDAR_STORE_FILE
+        self.events = []
+        self.times = []
+        self.by_currency = {}
+        self._load()
+
+    def ingest(self, events):
+        """Додати/оновити події, відкинувши минулі; повертає кількість нових"""
+        merged = {event['id']: event for event in self.events}
+        known = set(merged)
+
+        for raw in events:
+            event = self._normalize(raw)
+            if event:
+                merged[event['id']] = event
+
+        cutoff = (Config.get_kyiv_time() - timedelta(hours=Config.CALENDAR_KEEP_PAST_HOURS)).timestamp()
+        kept = [event for event in merged.values() if event['timestamp'] >= cutoff]
+        pruned = len(merged) - len(kept)
+        if pruned:
+            logger.debug(f"🧹 Календар: видалено {pruned} минулих подій")
+
+        self._rebuild(kept)
+        self._save()
+        return sum(1 for event in kept if event['id'] not in known)
+
+    def ingest_from(self, source):
+        """Завантажити події з джерела"""
+        try:
+            added = self.ingest(source.fetch())
+            logger.info(f"📅 Календар: +{added} подій, всього {len(self.events)}")
+            return added
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка завантаження календаря: {e}")
+            return 0
+
+    def window(self, hours=24, currencies=None, start=None, min_importance='low'):
+        """Події в [start, start + hours] для валют (усі валюти, якщо None)"""
+        start = (start or Config.get_kyiv_time()).timestamp()
+        end = start + hours * 3600
+        level = self.IMPORTANCE.get(min_importance, 1)
+
+        if currencies is None:
+            indices = range(bisect_left(self.times, start), bisect_right(self.times, end))
+        else:
+            indices = set()
+            for currency in currencies:
+                times, positions = self.by_currency.get(currency, ([], []))
+                indices.update(positions[bisect_left(times, start):bisect_right(times, end)])
+            indices = sorted(indices)
+
+        return [
+            self.events[i] for i in indices
+            if self.IMPORTANCE.get(self.events[i]['importance'], 1) >= level
+        ]
+
+    def next_event(self, currencies=None, min_importance='high', start=None):
+        """Найближча подія з потрібною важливістю або None"""
+        start = (start or Config.get_kyiv_time()).timestamp()
+        level = self.IMPORTANCE.get(min_importance, 1)
+
+        for i in range(bisect_right(self.times, start), len(self.times)):
+            event = self.events[i]
+            if currencies is not None and event['currency'] not in currencies:
+                continue
+            if self.IMPORTANCE.get(event['importance'], 1) >= level:
+                return event
+        return None
+
+    def analysis_triggers(self, hours=24, delay_minutes=None, currencies=None):
+        """Моменти для додаткових аналізів: невдовзі після важливих подій"""
+        delay = timedelta(minutes=Config.CALENDAR_TRIGGER_DELAY_MINUTES if delay_minutes is None else delay_minutes)
+        return [
+            datetime.fromisoformat(event['datetime']) + delay
+            for event in self.window(hours, currencies, min_importance='high')
+        ]
+
+    def _normalize(self, raw):
+        """Подія у внутрішньому форматі з часом у часовому поясі Києва"""
+        try:
+            if raw.get('datetime'):
+                moment = datetime.fromisoformat(raw['datetime'])
+                if moment.tzinfo is None:
+                    moment = Config.KYIV_TZ.localize(moment)
+            else:
+                moment = Config.KYIV_TZ.localize(
+                    datetime.strptime(f"{raw['date']} {raw.get('time', '00:00')}", '%Y-%m-%d %H:%M')
+                )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"Подію пропущено: {e}")
+            return None
+
+        moment = moment.astimezone(Config.KYIV_TZ)
+        country = raw.get('country', '')
+        currency = raw.get('currency') or self.COUNTRY_CURRENCY.get(country, '')
+
+        return {
+            'id': raw.get('id') or f"{moment.strftime('%Y%m%d%H%M')}_{currency or country}_{raw.get('event', '')}",
+            'datetime': moment.isoformat(),
+            'timestamp': moment.timestamp(),
+            'date': moment.strftime('%Y-%m-%d'),
+            'time': moment.strftime('%H:%M'),
+            'country': country,
+            'currency': currency,
+            'event': raw.get('event', ''),
+            'importance': raw.get('importance', 'medium'),
+            'previous': raw.get('previous'),
+            'forecast': raw.get('forecast')
+        }
+
+    def _rebuild(self, events):
+        events.sort(key=lambda e: e['timestamp'])
+        self.events = events
+        self.times = [e['timestamp'] for e in events]
+
+        by_currency = {}
+        for i, event in enumerate(events):
+            times, positions = by_currency.setdefault(event['currency'], ([], []))
+            times.append(event['timestamp'])
+            positions.append(i)
+        self.by_currency = by_currency
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._rebuild(json.load(f))
+        except Exception as e:
+            logger.debug(f"Помилка читання календаря: {e}")
+
+    def _save(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.events, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося зберегти календар: {e}")
@@ -1,4 +1,3 @@
-import aiohttp
 import asyncio
 import json
 import logging
@@ -6,11 +5,20 @@ from datetime import datetime, timedelta
 import pytz
 from typing import Dict, Any, List
 from config import Config
+from rate_limiter import get_rate_limiter
+from disk_cache import DiskCache
+from single_flight import get_single_flight
+from nbu_history import NbuRateHistory
+from indicator_store import IndicatorStore
+from cross_rates import CrossRateEngine
+from economic_calendar import CalendarStore, FileCalendarSource
+from market_sessions import get_market_sessions
+from indicator_snapshots import IndicatorSnapshots
 
 logger = logging.getLogger("economic_data")
 
 class EconomicDataCollector:
-    def __init__(self):
+    def __init__(self, cache=None, price_stream=None, calendar_source=None):
         self.kyiv_tz = pytz.timezone('Europe/Kiev')
         self.session = None
         
@@ -22,9 +30,32 @@ class EconomicDataCollector:
             'metal_api': 'https://api.metalpriceapi.com/v1/latest'  # Потребує API ключ
         }
         
-        # Кешовані дані
-        self.cache = {}
-        self.cache_expiry = {}
+        self.rate_limiter = get_rate_limiter()
+        self.flight = get_single_flight()
+        
+        # Кеш, спільний між запусками (TTL для кожного типу показників у Config.CACHE_TTL)
+        self.cache = cache or DiskCache()
+        self._refresh_tasks = {}
+        
+        # Історія курсів НБУ (колонкове сховище)
+        self.rate_history = NbuRateHistory()
+        self.cross_rates = CrossRateEngine(self.rate_history, self.cache)
+        
+        # Економічний календар (джерело підключається ззовні)
+        self.calendar = CalendarStore()
+        self.calendar_source = calendar_source or FileCalendarSource()
+        
+        # Розклад торгових сесій з урахуванням свят і літнього часу
+        self.market_sessions = get_market_sessions()
+        
+        # Потоковий фід цін криптовалют (режим демона)
+        self.price_stream = price_stream
+        
+        # Історія показників по запусках (для ковзних статистик)
+        self.indicator_store = IndicatorStore()
+        
+        # Знімок показників і різниця з попереднім запуском
+        self.snapshots = IndicatorSnapshots()
 
     async def get_latest_indicators(self) -> Dict[str, Any]:
         """Отримати останні економічні показники"""
@@ -38,6 +69,7 @@ class EconomicDataCollector:
         }
         
         # Виконуємо всі запити паралельно
+        import aiohttp
         async with aiohttp.ClientSession() as session:
             self.session = session
             
@@ -65,9 +97,19 @@ class EconomicDataCollector:
             indicators['indicators']['commodities'] = commodity_prices
             indicators['market_status'] = market_status
             
+            # Найближчі важливі події календаря
+            indicators['calendar'] = self._get_calendar()
+            
+            # Крос-курси між усіма валютами
+            indicators['indicators']['cross_rates'] = self._get_cross_rates()
+            
+            # Ковзні статистики (прибутковість, волатильність, z-score)
+            indicators['indicators']['statistics'] = self._update_statistics(indicators['indicators'])
+            
             # Додаємо примітки про джерела
             indicators['sources'] = {
                 'exchange_rates': 'НБУ',
+                'cross_rates': 'НБУ (розрахунок)',
                 'market_status': 'Розрахунковий',
                 'crypto': 'CryptoCompare',
                 'commodities': 'Різні джерела'
@@ -79,21 +121,26 @@ class EconomicDataCollector:
             
             if not market_status:
                 indicators['warnings'].append('Немає інформації про статус ринків')
+            
+            # Що змінилося від попереднього запуску
+            indicators['changes'] = await self._record_snapshot(indicators)
         
         logger.info(f"✅ Отримано {len(indicators['indicators'])} категорій економічних даних")
         return indicators
 
     async def _get_exchange_rates(self) -> Dict[str, float]:
         """Отримати курси валют від НБУ"""
+        return await self._get_cached('exchange_rates', self._fetch_exchange_rates)
+
+    async def _fetch_exchange_rates(self, session) -> Dict[str, float]:
+        """Запит курсів валют до НБУ"""
         try:
-            # Перевіряємо кеш
-            cache_key = 'exchange_rates'
-            if self._is_cache_valid(cache_key):
-                return self.cache[cache_key]
-            
-            async with self.session.get(self.api_endpoints['nbu_exchange'], timeout=10) as response:
+            await self.rate_limiter.acquire('nbu')
+            async with session.get(self.api_endpoints['nbu_exchange'], timeout=10) as response:
+                self.rate_limiter.observe('nbu', response.status, response.headers)
                 if response.status == 200:
                     data = await response.json()
+                    self._schedule_history_update(data)
                     
                     exchange_rates = {}
                     currencies_needed = ['USD', 'EUR', 'GBP', 'JPY', 'CHF', 'PLN']
@@ -114,125 +161,113 @@ class EconomicDataCollector:
                         'name': 'Українська гривня'
                     }
                     
-                    # Кешуємо результати на 1 годину
-                    self._update_cache(cache_key, exchange_rates, hours=1)
-                    
                     return exchange_rates
                     
         except Exception as e:
             logger.warning(f"⚠️ Помилка отримання курсів валют: {e}")
         
-        # Повертаємо останні кешовані дані або пустий словник
-        return self.cache.get('exchange_rates', {})
+        return {}
 
-    async def _get_market_status(self) -> Dict[str, str]:
-        """Визначити статус ринків (відкриті/закриті)"""
-        now_kyiv = datetime.now(self.kyiv_tz)
-        weekday = now_kyiv.weekday()  # 0 - понеділок, 6 - неділя
-        hour = now_kyiv.hour
-        
-        status = {}
-        
-        # Форекс працює 24/5 (з неділі 23:00 до п'ятниці 23:00)
-        if weekday < 5 or (weekday == 5 and hour < 23) or (weekday == 6 and hour >= 23):
-            status['forex'] = {
-                'status': 'OPEN',
-                'next_change': 'Пт 23:00' if weekday < 5 else 'Нд 23:00'
-            }
-        else:
-            status['forex'] = {
-                'status': 'CLOSED',
-                'next_change': 'Нд 23:00'
-            }
-        
-        # Криптовалютний ринок працює 24/7
-        status['crypto'] = {
-            'status': 'OPEN',
-            'next_change': 'Немає'
-        }
-        
-        # Європейські ринки (09:00-17:30 за Києвом)
-        if weekday < 5 and 8 <= hour < 17:
-            status['european_stocks'] = {
-                'status': 'OPEN',
-                'next_change': '17:30'
-            }
-        else:
-            status['european_stocks'] = {
-                'status': 'CLOSED',
-                'next_change': 'Пн 09:00' if weekday >= 5 else '09:00'
-            }
-        
-        # Американські ринки (16:30-23:00 за Києвом)
-        if weekday < 5 and 16 <= hour < 23:
-            status['us_stocks'] = {
-                'status': 'OPEN',
-                'next_change': '23:00'
-            }
-        else:
-            status['us_stocks'] = {
-                'status': 'CLOSED',
-                'next_change': 'Пн 16:30' if weekday >= 5 else '16:30'
-            }
-        
-        # Український ринок (10:00-18:00 за Києвом)
-        if weekday < 5 and 10 <= hour < 18:
-            status['ukrainian_stocks'] = {
-                'status': 'OPEN',
-                'next_change': '18:00'
-            }
-        else:
-            status['ukrainian_stocks'] = {
-                'status': 'CLOSED',
-                'next_change': 'Пн 10:00' if weekday >= 5 else '10:00'
-            }
-        
-        # Загальний статус
-        if any(s['status'] == 'OPEN' for s in status.values()):
-            status['overall'] = 'ACTIVE'
-        else:
-            status['overall'] = 'INACTIVE'
-        
-        return status
+    def _update_statistics(self, collected):
+        """Записати показники запуску та порахувати ковзні статистики"""
+        try:
+            self.indicator_store.record(collected)
+            return self.indicator_store.statistics()
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка оновлення історії показників: {e}")
+            return {}
 
-    async def _get_interest_rates(self) -> Dict[str, float]:
-        """Отримати відсоткові ставки центральних банків"""
+    async def _record_snapshot(self, indicators):
+        """Зберегти знімок показників і повернути різницю з попереднім"""
         try:
-            cache_key = 'interest_rates'
-            if self._is_cache_valid(cache_key):
-                return self.cache[cache_key]
-            
-            # Ставки центральних банків (можна отримати з API, поки що статичні дані)
-            rates = {
-                'ФРС США': 5.25,      # Federal Reserve
-                'ЄЦБ': 4.0,           # European Central Bank
-                'Банк Англії': 5.25,   # Bank of England
-                'НБУ': 15.0,           # Національний банк України
-                'Банк Японії': -0.1,   # Bank of Japan (негативна ставка)
-                'ШНБ': 1.75            # Швейцарський національний банк
+            return await self.snapshots.record_async(indicators)
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка збереження знімка показників: {e}")
+            return {'material': True}
+
+    def _get_calendar(self):
+        """Найближчі важливі події та моменти для додаткових аналізів"""
+        try:
+            self.calendar.ingest_from(self.calendar_source)
+            hours = Config.CALENDAR_LOOKAHEAD_HOURS
+            return {
+                'upcoming': self.calendar.window(hours, Config.CURRENCIES, min_importance='high'),
+                'analysis_triggers': [t.isoformat() for t in self.calendar.analysis_triggers(hours, currencies=Config.CURRENCIES)]
             }
-            
-            self._update_cache(cache_key, rates, hours=24)
-            return rates
-            
         except Exception as e:
-            logger.warning(f"⚠️ Помилка отримання ставок: {e}")
+            logger.warning(f"⚠️ Помилка економічного календаря: {e}")
             return {}
 
+    def _get_cross_rates(self):
+        """Крос-курси всіх валют (кешуються на дату курсу НБУ)"""
+        try:
+            return self.cross_rates.compute()
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка розрахунку крос-курсів: {e}")
+            return {}
+
+    def _schedule_history_update(self, nbu_items):
+        """Зберегти знімок НБУ в історію одразу, пропущені дні дозавантажити у фоні"""
+        try:
+            self.rate_history.append_snapshot(nbu_items)
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка збереження курсів НБУ в історію: {e}")
+        
+        task = self._refresh_tasks.get('nbu_history')
+        if task and not task.done():
+            return
+        self._refresh_tasks['nbu_history'] = asyncio.create_task(self._backfill_rate_history())
+
+    async def _backfill_rate_history(self):
+        """
+        Пропущені дні за NBU_BACKFILL_DAYS, не більше NBU_GAP_FILL_DAYS за запуск:
+        пропуски шукаються за наявними днями сховища, тож початкова історія
+        і дірки до сьогоднішнього знімка добираються за кілька запусків.
+        """
+        try:
+            await self.rate_history.backfill(end=datetime.now(self.kyiv_tz).date(), max_days=Config.NBU_GAP_FILL_DAYS)
+        except Exception as e:
+            logger.warning(f"⚠️ Помилка оновлення історії курсів НБУ: {e}")
+
+    async def _get_market_status(self) -> Dict[str, str]:
+        """Визначити статус ринків (відкриті/закриті) за наперед розрахованим розкладом сесій"""
+        return self.market_sessions.market_status()
+
+    async def _get_interest_rates(self) -> Dict[str, float]:
+        """Отримати відсоткові ставки центральних банків"""
+        return await self._get_cached('interest_rates', self._fetch_interest_rates)
+
+    async def _fetch_interest_rates(self, session) -> Dict[str, float]:
+        """Ставки центральних банків"""
+        # Ставки центральних банків (можна отримати з API, поки що статичні дані)
+        return {
+            'ФРС США': 5.25,      # Federal Reserve
+            'ЄЦБ': 4.0,           # European Central Bank
+            'Банк Англії': 5.25,   # Bank of England
+            'НБУ': 15.0,           # Національний банк України
+            'Банк Японії': -0.1,   # Bank of Japan (негативна ставка)
+            'ШНБ': 1.75            # Швейцарський національний банк
+        }
+
     async def _get_crypto_prices(self) -> Dict[str, Any]:
         """Отримати ціни криптовалют"""
+        # У режимі демона ціни вже є в пам'яті — без запиту
+        if self.price_stream and self.price_stream.is_fresh():
+            return self.price_stream.snapshot()
+        
+        return await self._get_cached('crypto_prices', self._fetch_crypto_prices)
+
+    async def _fetch_crypto_prices(self, session) -> Dict[str, Any]:
+        """Запит цін криптовалют до CryptoCompare"""
         try:
-            cache_key = 'crypto_prices'
-            if self._is_cache_valid(cache_key, minutes=5):  # Крипта часто змінюється
-                return self.cache[cache_key]
-            
-            # Використовуємо CryptoCompare API
             cryptos = ['BTC', 'ETH', 'BNB', 'XRP', 'SOL', 'ADA', 'DOT', 'DOGE']
             fsyms = ','.join(cryptos)
             
             url = f"{self.api_endpoints['cryptocompare']}?fsyms={fsyms}&tsyms=USD,EUR"
             
-            async with self.session.get(url, timeout=10) as response:
+            await self.rate_limiter.acquire('cryptocompare')
+            async with session.get(url, timeout=10) as response:
+                self.rate_limiter.observe('cryptocompare', response.status, response.headers)
                 if response.status == 200:
                     data = await response.json()
                     
@@ -245,7 +280,6 @@ class EconomicDataCollector:
                                 'updated': datetime.now().isoformat()
                             }
                     
-                    self._update_cache(cache_key, crypto_data, minutes=5)
                     return crypto_data
                     
         except Exception as e:
@@ -255,62 +289,130 @@ class EconomicDataCollector:
 
     async def _get_commodity_prices(self) -> Dict[str, float]:
         """Отримати ціни на товари (золото, нафта)"""
-        try:
-            cache_key = 'commodity_prices'
-            if self._is_cache_valid(cache_key, hours=1):
-                return self.cache[cache_key]
-            
-            # Тут можна додати реальні API для товарів
-            # Поки що статичні дані або симуляція
-            commodities = {
-                'GOLD': {
-                    'price': 1950.50,
-                    'currency': 'USD',
-                    'unit': 'за тройську унцію',
-                    'change': '+0.5%'
-                },
-                'OIL_BRENT': {
-                    'price': 82.30,
-                    'currency': 'USD',
-                    'unit': 'за барель',
-                    'change': '-0.3%'
-                },
-                'SILVER': {
-                    'price': 23.15,
-                    'currency': 'USD',
-                    'unit': 'за тройську унцію',
-                    'change': '+0.2%'
-                },
-                'NATURAL_GAS': {
-                    'price': 2.85,
-                    'currency': 'USD',
-                    'unit': 'за млн BTU',
-                    'change': '-1.1%'
-                }
+        return await self._get_cached('commodity_prices', self._fetch_commodity_prices)
+
+    async def _fetch_commodity_prices(self, session) -> Dict[str, float]:
+        """Ціни на товари"""
+        # Тут можна додати реальні API для товарів
+        # Поки що статичні дані або симуляція
+        return {
+            'GOLD': {
+                'price': 1950.50,
+                'currency': 'USD',
+                'unit': 'за тройську унцію',
+                'change': '+0.5%'
+            },
+            'OIL_BRENT': {
+                'price': 82.30,
+                'currency': 'USD',
+                'unit': 'за барель',
+                'change': '-0.3%'
+            },
+            'SILVER': {
+                'price': 23.15,
+                'currency': 'USD',
+                'unit': 'за тройську унцію',
+                'change': '+0.2%'
+            },
+            'NATURAL_GAS': {
+                'price': 2.85,
+                'currency': 'USD',
+                'unit': 'за млн BTU',
+                'change': '-1.1%'
             }
+        }
+
+    async def _get_cached(self, key, fetch):
+        """
+        Кешований показник зі stale-while-revalidate:
+        свіжий запис — одразу; застарілий — одразу, з фоновим оновленням;
+        надто старий, відсутній або застарілий за змістом — синхронний запит.
+        """
+        if not self._is_outdated(key):
+            if self._is_cache_valid(key):
+                return self.cache.get(key)
             
-            self._update_cache(cache_key, commodities, hours=1)
-            return commodities
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Помилка отримання цін товарів: {e}")
-            return {}
+            if self.cache.is_usable(key, Config.CACHE_TTL[key]['max_stale']):
+                self._schedule_refresh(key, fetch)
+                return self.cache.get(key)
+        
+        data = await self._fetch_once(key, fetch, self.session)
+        if data:
+            return data
+        
+        # Повертаємо останні кешовані дані або пустий словник
+        return self.cache.get(key, {})
 
-    def _is_cache_valid(self, key: str, minutes: int = 60, hours: int = 0) -> bool:
-        """Перевірити, чи кеш ще дійсний"""
-        if key not in self.cache or key not in self.cache_expiry:
+    def _is_outdated(self, key):
+        """Курси НБУ в кеші за дату, раніші за поточну (НБУ вже опублікував новіші)"""
+        if key != 'exchange_rates':
+            return False
+        rates = self.cache.get(key)
+        if not rates:
             return False
         
-        expiry_time = self.cache_expiry[key]
-        return datetime.now() < expiry_time
+        dates = []
+        for currency, item in rates.items():
+            if currency == 'UAH':
+                continue
+            try:
+                dates.append(datetime.strptime(item.get('date', ''), '%d.%m.%Y').date())
+            except (AttributeError, ValueError):
+                continue
+        if not dates:
+            return False
+        
+        today = datetime.fromtimestamp(self.cache.clock(), self.kyiv_tz).date()
+        if min(dates) < today:
+            logger.info(f"📅 Курси НБУ в кеші за {min(dates):%d.%m.%Y} — запитуємо актуальні")
+            return True
+        return False
 
-    def _update_cache(self, key: str, data: Any, minutes: int = 0, hours: int = 0):
-        """Оновити кеш"""
-        self.cache[key] = data
+    def _schedule_refresh(self, key, fetch):
+        """Фонове оновлення застарілого запису (одне на ключ)"""
+        task = self._refresh_tasks.get(key)
+        if task and not task.done():
+            return
         
-        # Розраховуємо час закінчення
-        expiry = datetime.now() + timedelta(minutes=minutes, hours=hours)
-        self.cache_expiry[key] = expiry
+        logger.debug(f"🔄 Фонове оновлення кешу {key}")
+        self._refresh_tasks[key] = asyncio.create_task(self._refresh(key, fetch))
+
+    async def _refresh(self, key, fetch):
+        # Власна сесія: основна може закритися раніше за фонове оновлення
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            await self._fetch_once(key, fetch, session)
+
+    async def _fetch_once(self, key, fetch, session):
+        """Запит через single-flight: одночасні виклики за ключем чекають один запит"""
+        return await self.flight.do(f"economic:{key}", self._fetch_and_store, key, fetch, session)
+
+    async def _fetch_and_store(self, key, fetch, session):
+        data = await fetch(session)
+        if data:
+            self._update_cache(key, data)
+        return data
+
+    async def drain(self):
+        """Дочекатися фонових оновлень кешу (перед завершенням процесу)"""
+        # Фонове оновлення може запустити нові задачі (дозавантаження історії НБУ) — чекаємо, доки їх не стане
+        while True:
+            tasks = [task for task in self._refresh_tasks.values() if not task.done()]
+            if not tasks:
+                break
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._refresh_tasks.clear()
+
+    def _is_cache_valid(self, key: str, minutes: int = 0, hours: int = 0) -> bool:
+        """Перевірити, чи кеш ще дійсний (без аргументів — TTL з Config.CACHE_TTL)"""
+        ttl = timedelta(minutes=minutes, hours=hours).total_seconds()
+        if not ttl:
+            ttl = Config.CACHE_TTL.get(key, {}).get('ttl', 3600)
+        return self.cache.is_fresh(key, ttl)
+
+    def _update_cache(self, key: str, data: Any):
+        """Оновити кеш"""
+        self.cache.set(key, data)
 
     def get_cached_data(self, key: str) -> Any:
         """Отримати кешовані дані"""
@@ -318,25 +420,10 @@ class EconomicDataCollector:
 
     async def get_economic_calendar(self, days: int = 7) -> List[Dict]:
         """Отримати економічний календар (майбутні події)"""
-        # Заглушка для майбутньої реалізації
-        # Можна використати API як Investing.com, ForexFactory тощо
+        if not self.calendar.events:
+            self.calendar.ingest_from(self.calendar_source)
+        
         return [
-            {
-                'date': '2024-01-15',
-                'time': '15:30',
-                'country': 'USA',
-                'event': 'Рішення ФРС щодо процентної ставки',
-                'importance': 'high',
-                'previous': '5.25%',
-                'forecast': '5.25%'
-            },
-            {
-                'date': '2024-01-16',
-                'time': '11:00',
-                'country': 'EU',
-                'event': 'Інфляція в Єврозоні',
-                'importance': 'medium',
-                'previous': '2.4%',
-                'forecast': '2.3%'
-            }
+            {key: event[key] for key in ('date', 'time', 'country', 'event', 'importance', 'previous', 'forecast')}
+            for event in self.calendar.window(hours=days * 24)
         ]
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокування між процесами недоступне, лише між потоками
+    fcntl = None
+
+logger = logging.getLogger("file_lock")
+
+
+class LockTimeout(TimeoutError):
+    """Не вдалося отримати блокування за відведений час"""
+
+
+class FileLock:
+    """
+    Рекомендаційне (advisory) блокування файлу між процесами через fcntl.flock
+    з таймаутом. Повторний вхід не блокується: flock прив'язаний до відкритого
+    дескриптора, тому лічильник вкладеності тримає один дескриптор на весь час
+    транзакції. Власник — потік, а в циклі подій — ще й поточна asyncio-задача:
+    корутини одного потоку виключають одна одну, як і різні потоки.
+    У корутинах слід використовувати acquire_async: очікування через
+    asyncio.sleep не блокує цикл подій.
+    """
+
+    def __init__(self, path, timeout=None, poll_interval=0.05):
+        self.path = str(path)
+        self.timeout = Config.DATA_LOCK_TIMEOUT if timeout is None else timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+        self._depth = 0
+        self._owner = None
+        self._inner = threading.Lock()
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        owner = self._current_owner()
+        if self._owner == owner:
+            self._depth += 1
+            return
+
+        if not self._inner.acquire(timeout=timeout if timeout >= 0 else -1):
+            raise LockTimeout(f"Блокування {self.path} зайняте іншим потоком або задачею")
+        try:
+            self._fd = self._lock_file(timeout)
+        except BaseException:
+            self._inner.release()
+            raise
+        self._owner = owner
+        self._depth = 1
+
+    def try_acquire(self):
+        """Спроба отримати блокування без очікування; True, якщо вдалося"""
+        owner = self._current_owner()
+        if self._owner == owner:
+            self._depth += 1
+            return True
+
+        if not self._inner.acquire(blocking=False):
+            return False
+        try:
+            fd = self._try_lock_file()
+        except BaseException:
+            self._inner.release()
+            raise
+        if fd is None:
+            self._inner.release()
+            return False
+        self._fd = fd
+        self._owner = owner
+        self._depth = 1
+        return True
+
+    async def acquire_async(self, timeout=None):
+        """Як acquire, але очікує через asyncio.sleep, не блокуючи цикл подій"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+        while not self.try_acquire():
+            if timeout >= 0 and time.monotonic() - started >= timeout:
+                raise LockTimeout(f"Не вдалося заблокувати {self.path} за {timeout} с")
+            if not waited:
+                logger.info(f"⏳ Очікуємо на блокування {os.path.basename(self.path)} (асинхронно)")
+                waited = True
+            await asyncio.sleep(self.poll_interval)
+
+        if waited:
+            logger.info(f"🔓 Блокування отримано через {time.monotonic() - started:.2f} с")
+
+    def release(self):
+        if not self._depth:
+            return
+        self._depth -= 1
+        if self._depth:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._owner = None
+            self._inner.release()
+
+    @property
+    def locked(self):
+        return self._depth > 0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    @staticmethod
+    def _current_owner():
+        """(потік, asyncio-задача або None поза циклом подій)"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return threading.get_ident(), id(task) if task is not None else None
+
+    def _lock_file(self, timeout):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            return fd
+
+        started = time.monotonic()
+        waited = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if timeout >= 0 and time.monotonic() - started >= timeout:
+                    os.close(fd)
+                    raise LockTimeout(f"Не вдалося заблокувати {self.path} за {timeout} с")
+                if not waited:
+                    logger.info(f"⏳ Очікуємо на блокування {os.path.basename(self.path)} (інший процес)")
+                    waited = True
+                time.sleep(self.poll_interval)
+
+        if waited:
+            logger.info(f"🔓 Блокування отримано через {time.monotonic() - started:.2f} с")
+
+        self._mark_owner(fd)
+        return fd
+
+    def _try_lock_file(self):
+        """Дескриптор із взятим flock або None, якщо файл заблоковано іншим процесом"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            return fd
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        self._mark_owner(fd)
+        return fd
+
+    @staticmethod
+    def _mark_owner(fd):
+        # Для діагностики: хто тримає блокування
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode('ascii'))
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def get_file_lock(path, timeout=None):
+    """Спільний об'єкт блокування на шлях (повторний вхід у межах процесу)"""
+    path = os.path.abspath(str(path))
+    with _locks_guard:
+        if path not in _locks:
+            _locks[path] = FileLock(path, timeout)
+        return _locks[path]
+
+
+@contextmanager
+def data_lock(timeout=None):
+    """Блокування каталогу даних на час транзакції запису"""
+    lock = get_file_lock(Config.DATA_LOCK_FILE)
+    lock.acquire(timeout)
+    try:
+        yield lock
+    finally:
+        lock.release()
+
+
+@asynccontextmanager
+async def async_data_lock(timeout=None):
+    """data_lock для корутин: очікування блокування не зупиняє цикл подій"""
+    lock = get_file_lock(Config.DATA_LOCK_FILE)
+    await lock.acquire_async(timeout)
+    try:
+        yield lock
+    finally:
+        lock.release()
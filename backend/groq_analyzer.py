@@ -1,19 +1,89 @@
+import asyncio
 import json
 import logging
-from groq import Groq
+import math
+import time
+from collections import Counter
 from datetime import datetime
 from config import Config
+from publisher import atomic_write, dumps
+from rate_limiter import get_rate_limiter
+from local_scorer import LocalScorer
 
 logger = logging.getLogger("groq_analyzer")
 
+class ModelLatencyTracker:
+    """
+    Історія затримок моделей між запусками (для хеджування).
+    Скасовані (хедж переміг) і задовгі запити зберігаються як {'min': секунди}:
+    справжня затримка щонайменше така. У перцентилі вони стоять на своїй нижній
+    межі, тож повільна модель не виглядає швидкою лише тому, що її відповіді
+    не дочекалися.
+    """
+    
+    MAX_SAMPLES = 50
+    MIN_SAMPLES = 5
+
+    def __init__(self, path=None):
+        self.path = path or Config.MODEL_LATENCY_FILE
+        self.samples = {}
+        
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.samples = json.load(f)
+        except Exception as e:
+            logger.debug(f"Помилка читання історії затримок: {e}")
+
+    def record(self, model, latency, censored=False):
+        """Записати затримку запиту; censored — відома лише нижня межа"""
+        samples = self.samples.setdefault(model, [])
+        latency = round(latency, 3)
+        samples.append({'min': latency} if censored else latency)
+        del samples[:-self.MAX_SAMPLES]
+
+    def percentile(self, model, percentile):
+        """Перцентиль затримки моделі (оцінка знизу) або None, якщо замало даних"""
+        samples = sorted(
+            sample['min'] if isinstance(sample, dict) else sample
+            for sample in self.samples.get(model, [])
+        )
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def hedge_delay(self, step):
+        """Через скільки секунд запускати хедж-запит"""
+        delay = self.percentile(step['model'], Config.GROQ_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = step['deadline'] / 2  # Без історії — половина дедлайну
+        return min(delay, step['deadline'])
+
+    def save(self):
+        """Зберегти історію затримок"""
+        try:
+            atomic_write(self.path, dumps(self.samples).encode('utf-8'))
+        except Exception as e:
+            logger.debug(f"Не вдалося зберегти історію затримок: {e}")
+
+
 class GroqAnalyzer:
     def __init__(self):
+        self.latency_tracker = ModelLatencyTracker()
+        self.rate_limiter = get_rate_limiter()
+        self.local_scorer = LocalScorer()
+        self.last_run = {}
+        
         if not Config.GROQ_API_KEY:
             logger.error("❌ GROQ_API_KEY не налаштовано!")
             self.client = None
         else:
-            self.client = Groq(api_key=Config.GROQ_API_KEY)
-            logger.info(f"✅ Groq AI ініціалізовано (модель: {Config.GROQ_MODEL})")
+            from groq import AsyncGroq
+            self.client = AsyncGroq(api_key=Config.GROQ_API_KEY)
+            chain = ' → '.join(step['model'] for step in Config.get_model_chain())
+            logger.info(f"✅ Groq AI ініціалізовано (моделі: {chain})")
 
     async def generate_recommendations(self, news_data, economic_data, currency_impact, language='uk'):
         """
@@ -39,41 +109,245 @@ class GroqAnalyzer:
         else:
             prompt = self._create_ukrainian_prompt(news_summary, economic_summary, now_kyiv)
 
+        messages = [
+            {
+                "role": "system",
+                "content": self._get_system_prompt(language)
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
         try:
             logger.info("🧠 Генерація рекомендацій через AI...")
             
-            completion = self.client.chat.completions.create(
-                model=Config.GROQ_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt(language)
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.4,  # Нижча температура для більш консервативних рекомендацій
-                max_tokens=1500,
-                response_format={"type": "json_object"}
-            )
+            started = time.monotonic()
+            result = await self._run_model_chain(messages)
+            self.latency_tracker.save()
             
-            response_text = completion.choices[0].message.content
-            logger.debug(f"AI відповідь (перші 300 символів): {response_text[:300]}...")
+            if result is None:
+                raise RuntimeError("жодна модель з ланцюжка не дала валідної відповіді")
             
-            response = json.loads(response_text)
+            self.last_run = {
+                'model': result['model'],
+                'latency_ms': round(result['latency'] * 1000),
+                'total_ms': round((time.monotonic() - started) * 1000),
+                'hedged': result['hedged'],
+                'fallback': result['model'] != Config.GROQ_MODEL
+            }
+            if 'ensemble' in result['response']:
+                self.last_run['ensemble'] = result['response']['ensemble']
             
             # Валідація відповіді
-            recommendations = self._validate_recommendations(response.get('recommendations', []))
+            recommendations = self._validate_recommendations(result['response'].get('recommendations', []))
             
-            logger.info(f"✅ AI згенерував {len(recommendations)} рекомендацій")
+            logger.info(f"✅ AI ({result['model']}, {self.last_run['latency_ms']} мс) згенерував {len(recommendations)} рекомендацій")
             return recommendations
             
         except Exception as e:
             logger.error(f"❌ Помилка Groq AI: {e}")
+            self.last_run = {'model': 'rule_based', 'latency_ms': 0, 'total_ms': 0, 'hedged': False, 'fallback': True}
             # Резервні рекомендації на основі простих правил
-            return self._generate_fallback_recommendations(currency_impact, language)
+            return self._generate_fallback_recommendations(currency_impact, economic_data, language)
+
+    async def _request_model(self, step, messages):
+        """Один запит до моделі з власним дедлайном (очікування ліміту входить у дедлайн)"""
+        start = time.monotonic()
+        
+        try:
+            completion = await asyncio.wait_for(self._create_completion(step['model'], messages), timeout=step['deadline'])
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # Відповіді не дочекалися: затримка щонайменше стільки
+            self.latency_tracker.record(step['model'], time.monotonic() - start, censored=True)
+            raise
+        latency = time.monotonic() - start
+        
+        response_text = completion.choices[0].message.content
+        logger.debug(f"AI відповідь {step['model']} (перші 300 символів): {response_text[:300]}...")
+        
+        response = json.loads(response_text)
+        if not isinstance(response.get('recommendations'), list):
+            raise ValueError("у відповіді немає списку recommendations")
+        
+        self.latency_tracker.record(step['model'], latency)
+        return response, latency
+
+    async def _request_step(self, step, messages):
+        """Запит до моделі кроку ланцюжка: одиночний або ансамблем"""
+        if Config.GROQ_ENSEMBLE_SIZE > 1:
+            return await self._request_ensemble(step, messages)
+        return await self._request_model(step, messages)
+
+    async def _request_ensemble(self, step, messages):
+        """
+        N паралельних вибірок однієї моделі. Щойно кожен актив має
+        потрібну кількість однакових голосів, решта запитів скасовується.
+        """
+        size = Config.GROQ_ENSEMBLE_SIZE
+        needed = max(1, math.ceil(Config.GROQ_ENSEMBLE_CONSENSUS * size))
+        start = time.monotonic()
+        
+        tasks = [asyncio.create_task(self._request_model(step, messages)) for _ in range(size)]
+        samples = []
+        consensus = False
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    response, _ = await next_done
+                except Exception as e:
+                    logger.debug(f"Вибірка ансамблю {step['model']} не вдалася: {e}")
+                    continue
+                
+                samples.append(response)
+                if self._ensemble_consensus(samples, needed):
+                    consensus = True
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Дочекатися скасування, щоб їхні затримки потрапили в історію
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if not samples:
+            raise RuntimeError("жодна вибірка ансамблю не вдалася")
+        
+        logger.info(f"🗳️ Ансамбль {step['model']}: {len(samples)}/{size} вибірок, згода: {'так' if consensus else 'ні'}")
+        
+        response = self._aggregate_ensemble(samples)
+        response['ensemble'] = {'size': size, 'samples': len(samples), 'consensus': consensus}
+        return response, time.monotonic() - start
+
+    def _ensemble_votes(self, samples):
+        """Рекомендації з усіх вибірок, згруповані за активом"""
+        votes = {}
+        for response in samples:
+            seen = set()
+            for rec in response.get('recommendations', []):
+                asset = rec.get('asset') if isinstance(rec, dict) else None
+                if asset and asset not in seen:
+                    seen.add(asset)
+                    votes.setdefault(asset, []).append(rec)
+        return votes
+
+    def _ensemble_consensus(self, samples, needed):
+        """Чи має кожен актив щонайменше needed однакових дій"""
+        votes = self._ensemble_votes(samples)
+        if not votes:
+            return False
+        
+        return all(
+            Counter(rec.get('action') for rec in recs).most_common(1)[0][1] >= needed
+            for recs in votes.values()
+        )
+
+    def _aggregate_ensemble(self, samples):
+        """Агрегація: дія більшості та середня впевненість голосів більшості"""
+        recommendations = []
+        
+        for asset, recs in self._ensemble_votes(samples).items():
+            action, count = Counter(rec.get('action') for rec in recs).most_common(1)[0]
+            
+            # Актив, який підтримала менше ніж половина вибірок, вважаємо нестабільним
+            if count * 2 < len(samples):
+                continue
+            
+            majority = [rec for rec in recs if rec.get('action') == action]
+            confidences = []
+            for rec in majority:
+                try:
+                    confidences.append(float(rec.get('confidence', 0)))
+                except (TypeError, ValueError):
+                    confidences.append(0.0)
+            
+            merged = dict(majority[confidences.index(max(confidences))])
+            merged['confidence'] = round(sum(confidences) / len(confidences), 3)
+            merged['votes'] = count
+            recommendations.append(merged)
+        
+        response = dict(samples[0])
+        response['recommendations'] = recommendations
+        return response
+
+    async def _create_completion(self, model, messages, max_tokens=1500):
+        """Запит до Groq через спільний обмежувач; на 429 — чекаємо в черзі й повторюємо"""
+        from groq import RateLimitError
+        # Груба оцінка токенів: ~4 символи на токен + максимальна відповідь
+        estimated_tokens = sum(len(m['content']) for m in messages) // 4 + max_tokens
+        
+        for attempt in range(3):
+            await self.rate_limiter.acquire('groq', tokens=estimated_tokens)
+            try:
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.4,  # Нижча температура для більш консервативних рекомендацій
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"}
+                )
+            except RateLimitError as e:
+                self.rate_limiter.observe('groq', 429, e.response.headers)
+                if attempt == 2:
+                    raise
+                continue
+            
+            self.rate_limiter.observe('groq', raw.status_code, raw.headers)
+            return await raw.parse()
+
+    async def _run_model_chain(self, messages):
+        """
+        Проходження ланцюжка моделей: перша валідна відповідь перемагає.
+        Якщо основна модель повільніша за перцентиль затримки, паралельно
+        запускається наступна модель (хедж).
+        """
+        chain = Config.get_model_chain()
+        index = 0
+        
+        while index < len(chain):
+            primary = chain[index]
+            hedge = chain[index + 1] if Config.GROQ_HEDGE_ENABLED and index + 1 < len(chain) else None
+            hedge_delay = self.latency_tracker.hedge_delay(primary) if hedge else None
+            hedged = False
+            
+            tasks = {asyncio.create_task(self._request_step(primary, messages)): primary}
+            
+            try:
+                while tasks:
+                    timeout = hedge_delay if hedge and not hedged else None
+                    done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    
+                    if not done:
+                        logger.info(f"⏱️ {primary['model']} повільніша за {hedge_delay:.1f} с, хедж на {hedge['model']}")
+                        tasks[asyncio.create_task(self._request_step(hedge, messages))] = hedge
+                        hedged = True
+                        continue
+                    
+                    for task in done:
+                        step = tasks.pop(task)
+                        try:
+                            response, latency = task.result()
+                        except Exception as e:
+                            error = 'перевищено дедлайн' if isinstance(e, asyncio.TimeoutError) else e
+                            logger.warning(f"⚠️ Модель {step['model']}: {error}")
+                            continue
+                        
+                        return {
+                            'response': response,
+                            'model': step['model'],
+                            'latency': latency,
+                            'hedged': hedged
+                        }
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # Дочекатися скасування, щоб затримки програних запитів потрапили в історію
+                await asyncio.gather(*tasks, return_exceptions=True)
+            
+            index += 2 if hedged else 1
+        
+        return None
 
     def _prepare_news_summary(self, news_data, language):
         """Підготовка зведення новин для AI"""
@@ -119,6 +393,20 @@ class GroqAnalyzer:
             if rates_text:
                 summary.append(f"💱 Курси валют: {', '.join(rates_text[:4])}")
         
+        # Основні валютні пари (крос-курси НБУ)
+        pairs = indicators.get('cross_rates', {}).get('pairs', {})
+        if pairs:
+            pairs_text = []
+            for pair in ['EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'EUR/PLN']:
+                if pair in pairs:
+                    text = f"{pair}: {pairs[pair]['rate']}"
+                    if pairs[pair].get('change_pct') is not None:
+                        text += f" ({pairs[pair]['change_pct']:+.2f}%)"
+                    pairs_text.append(text)
+            
+            if pairs_text:
+                summary.append(f"🔀 Валютні пари: {', '.join(pairs_text)}")
+        
         # Криптовалюти
         crypto = indicators.get('crypto', {})
         if crypto:
@@ -131,6 +419,29 @@ class GroqAnalyzer:
             if crypto_text:
                 summary.append(f"🪙 Криптовалюти: {', '.join(crypto_text)}")
         
+        # Динаміка з історії показників: найбільші тижневі зміни
+        statistics = indicators.get('statistics', {})
+        moves = [
+            (asset, stats['return_7d'], stats.get('volatility_30d'))
+            for asset, stats in statistics.items()
+            if stats.get('return_7d') is not None
+        ]
+        if moves:
+            moves.sort(key=lambda x: abs(x[1]), reverse=True)
+            moves_text = []
+            for asset, change, volatility in moves[:6]:
+                text = f"{asset} {change:+.2f}%"
+                if volatility is not None:
+                    text += f" (волат. {volatility:.2f}%/день)"
+                moves_text.append(text)
+            summary.append(f"📈 Зміна за 7 днів: {', '.join(moves_text)}")
+        
+        # Найближчі важливі події календаря
+        upcoming = economic_data.get('calendar', {}).get('upcoming', [])
+        if upcoming:
+            events_text = [f"{e['date']} {e['time']} {e['currency'] or e['country']}: {e['event']}" for e in upcoming[:5]]
+            summary.append(f"📅 Важливі події: {'; '.join(events_text)}")
+        
         # Статус ринків
         market_status = economic_data.get('market_status', {})
         if market_status.get('overall') == 'ACTIVE':
@@ -285,53 +596,7 @@ class GroqAnalyzer:
         
         return valid_recommendations[:Config.MAX_RECOMMENDATIONS]
 
-    def _generate_fallback_recommendations(self, currency_impact, language):
-        """Резервні рекомендації на основі простих правил"""
+    def _generate_fallback_recommendations(self, currency_impact, economic_data, language):
+        """Резервні рекомендації через локальний скоринг"""
         logger.info("Генерація резервних рекомендацій...")
-        
-        recommendations = []
-        
-        # Аналізуємо вплив на валюти
-        for currency, data in currency_impact.items():
-            score = data['sentiment_score']
-            
-            if score >= 0.7:
-                action = 'BUY'
-                confidence = min(0.9, score)
-                reason_uk = f"Позитивний вплив новин ({data['positive_news']} позитивних)"
-                reason_ru = f"Позитивное влияние новостей ({data['positive_news']} позитивных)"
-            elif score >= 0.6:
-                action = 'BUY'
-                confidence = score
-                reason_uk = f"Переважно позитивний вплив новин"
-                reason_ru = f"Преимущественно позитивное влияние новостей"
-            elif score <= 0.4:
-                action = 'AVOID'
-                confidence = 1 - score
-                reason_uk = f"Негативний вплив новин ({data['negative_news']} негативних)"
-                reason_ru = f"Негативное влияние новостей ({data['negative_news']} негативных)"
-            elif score <= 0.3:
-                action = 'STRONG_AVOID'
-                confidence = 1 - score
-                reason_uk = f"Сильний негативний вплив новин"
-                reason_ru = f"Сильное негативное влияние новостей"
-            else:
-                continue  # Пропускаємо нейтральні
-            
-            reason = reason_uk if language == 'uk' else reason_ru
-            
-            recommendations.append({
-                'asset': currency,
-                'action': action,
-                'confidence': round(confidence, 3),
-                'reason': reason,
-                'timeframe': '1-2 дні' if language == 'uk' else '1-2 дня',
-                'risk_level': 'medium',
-                'id': f"{currency}_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                'generated_at': Config.get_kyiv_time().isoformat()
-            })
-        
-        # Сортуємо за впевненістю
-        recommendations.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        return recommendations[:5]
+        return self.local_scorer.recommend(currency_impact, economic_data, language)
@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from config import Config
+
+logger = logging.getLogger("history_stats")
+
+
+class HistoryStatistics:
+    """
+    Агрегати історії, що оновлюються при кожному збереженні: денні кошики
+    (кількість аналізів і рекомендацій, дії та сума впевненості по активах),
+    готові підсумки за ковзні вікна і поточні серії однакових сигналів.
+    Серія обривається, якщо актив відсутній у запуску або дія змінилася;
+    її довжина рахується по днях, тож у кожному вікні видно лише його частину.
+    Читання статистики не залежить від розміру історії і не змінює стан.
+    """
+
+    WINDOWS = (7, 30, 90)
+
+    def __init__(self, path=None, windows=None):
+        self.path = str(path or Config.HISTORY_STATS_FILE)
+        self.windows = tuple(windows or self.WINDOWS)
+        self.state = self._load()
+
+    @property
+    def empty(self):
+        return not self.state['buckets']
+
+    def reload(self):
+        """Перечитати агрегати з диска (їх могли оновити інші процеси)"""
+        self.state = self._load()
+
+    def add(self, entry, today=None):
+        """Врахувати один запис історії (усі рекомендації, а не лише топ-3)"""
+        timestamp = entry.get('timestamp') or Config.get_kyiv_time().isoformat()
+        day = self._day(timestamp)
+        recommendations = entry.get('recommendations') or entry.get('top_recommendations', [])
+
+        bucket = self.state['buckets'].setdefault(day, {'analyses': 0, 'recommendations': 0, 'assets': {}})
+        bucket['analyses'] += 1
+        bucket['recommendations'] += entry.get('recommendations_count', len(recommendations))
+
+        actions = {}
+        for rec in recommendations:
+            asset, action = rec.get('asset'), rec.get('action')
+            if not asset or not action:
+                continue
+            stats = bucket['assets'].setdefault(asset, {'actions': {}, 'confidence_sum': 0.0, 'count': 0})
+            stats['actions'][action] = stats['actions'].get(action, 0) + 1
+            stats['confidence_sum'] = round(stats['confidence_sum'] + float(rec.get('confidence', 0) or 0), 6)
+            stats['count'] += 1
+            actions[asset] = action
+
+        self._update_streaks(actions, day, timestamp)
+
+        self.state['last_analysis'] = max(self.state.get('last_analysis') or '', timestamp)
+        self._prune(today)
+        self._rebuild_windows(today)
+
+    def rebuild(self, entries, today=None):
+        """Перерахувати агрегати з записів історії (початкове заповнення)"""
+        self.state = self._empty_state()
+        for entry in sorted(entries, key=lambda e: e.get('timestamp') or ''):
+            self.add(entry, today)
+
+    def summary(self, window=30):
+        """Статистика за вікно у форматі DataHandler.get_statistics (стан не змінюється)"""
+        # Вікна зсуваються з датою: якщо збережені підсумки за інший день, рахуємо
+        # з денних кошиків (не більше max(windows)) без запису в стан
+        windows = self.state['windows']
+        if self.state.get('as_of') != Config.get_kyiv_time().date().isoformat():
+            windows = {str(w): self._window_totals(w) for w in self.windows}
+        
+        totals = windows.get(str(window)) or self._window_totals(window)
+        analyses = totals['analyses']
+        assets = totals['assets']
+
+        buys = {a: sum(n for action, n in s['actions'].items() if 'BUY' in action) for a, s in assets.items()}
+        avoids = {a: sum(n for action, n in s['actions'].items() if 'AVOID' in action) for a, s in assets.items()}
+
+        return {
+            'total_analyses': analyses,
+            'last_analysis': self.state.get('last_analysis'),
+            'avg_recommendations': round(totals['recommendations'] / analyses, 1) if analyses else 0,
+            'most_recommended': self._top(buys),
+            'least_recommended': self._top(avoids),
+            'assets': {
+                asset: {
+                    'actions': stats['actions'],
+                    'avg_confidence': round(stats['confidence_sum'] / stats['count'], 3) if stats['count'] else 0
+                }
+                for asset, stats in assets.items()
+            },
+            'windows': {
+                w: {'analyses': t['analyses'], 'recommendations': t['recommendations']}
+                for w, t in windows.items()
+            },
+            'streaks': self._window_streaks(window)
+        }
+
+    def save(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося зберегти агрегати історії: {e}")
+
+    def _update_streaks(self, actions, day, timestamp):
+        """Серії поспіль однакових дій по активах: {актив: {action, since, days: {день: запусків}}}"""
+        streaks = self.state['streaks']
+        # Актив, якого немає в цьому запуску, обриває свою серію
+        for asset in [a for a in streaks if a not in actions]:
+            del streaks[asset]
+
+        for asset, action in actions.items():
+            streak = streaks.get(asset)
+            if not streak or streak['action'] != action or 'days' not in streak:
+                streak = streaks[asset] = {'action': action, 'since': timestamp, 'days': {}}
+            streak['days'][day] = streak['days'].get(day, 0) + 1
+
+    def _window_streaks(self, window, today=None):
+        """Поточні серії в межах вікна: довжина — кількість запусків серії за вікно"""
+        cutoff = self._cutoff(window, today)
+        result = {}
+        for asset, streak in self.state['streaks'].items():
+            days = {day: n for day, n in streak.get('days', {}).items() if day > cutoff}
+            if not days:
+                continue
+            first = min(days)
+            result[asset] = {
+                'action': streak['action'],
+                'length': sum(days.values()),
+                'since': streak['since'] if self._day(streak['since']) == first else first
+            }
+        return result
+
+    def _prune(self, today=None):
+        oldest = self._cutoff(max(self.windows), today)
+        for day in [d for d in self.state['buckets'] if d <= oldest]:
+            del self.state['buckets'][day]
+        for streak in self.state['streaks'].values():
+            for day in [d for d in streak.get('days', {}) if d <= oldest]:
+                del streak['days'][day]
+
+    def _rebuild_windows(self, today=None):
+        self.state['windows'] = {str(w): self._window_totals(w, today) for w in self.windows}
+        self.state['as_of'] = (today or Config.get_kyiv_time().date()).isoformat()
+
+    def _window_totals(self, window, today=None):
+        cutoff = self._cutoff(window, today)
+        totals = {'analyses': 0, 'recommendations': 0, 'assets': {}}
+
+        for day, bucket in self.state['buckets'].items():
+            if day <= cutoff:
+                continue
+            totals['analyses'] += bucket['analyses']
+            totals['recommendations'] += bucket['recommendations']
+            for asset, stats in bucket['assets'].items():
+                target = totals['assets'].setdefault(asset, {'actions': {}, 'confidence_sum': 0.0, 'count': 0})
+                for action, n in stats['actions'].items():
+                    target['actions'][action] = target['actions'].get(action, 0) + n
+                target['confidence_sum'] = round(target['confidence_sum'] + stats['confidence_sum'], 6)
+                target['count'] += stats['count']
+
+        return totals
+
+    @staticmethod
+    def _top(counts, limit=5):
+        ranked = sorted(((a, n) for a, n in counts.items() if n), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+    @staticmethod
+    def _cutoff(days, today=None):
+        today = today or Config.get_kyiv_time().date()
+        return (today - timedelta(days=days)).isoformat()
+
+    @staticmethod
+    def _day(timestamp):
+        try:
+            moment = datetime.fromisoformat(timestamp)
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(Config.KYIV_TZ)
+            return moment.date().isoformat()
+        except (TypeError, ValueError):
+            return Config.get_kyiv_time().date().isoformat()
+
+    @staticmethod
+    def _empty_state():
+        return {'buckets': {}, 'windows': {}, 'streaks': {}, 'last_analysis': None, 'as_of': None}
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return {**self._empty_state(), **json.load(f)}
+        except Exception as e:
+            logger.debug(f"Помилка читання агрегатів історії: {e}")
+        return self._empty_state()
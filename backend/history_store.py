@@ -0,0 +1,243 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+import pytz
+from config import Config
+from publisher import atomic_write, dumps
+
+logger = logging.getLogger("history_store")
+
+
+class HistoryStore:
+    """
+    Історія аналізів, розбита на шарди за датою (тиждень або день): кожен шард —
+    журнал JSONL лише для дописування. Компактний index.json перелічує шарди з
+    діапазоном часу, першим/останнім analysis_id, кількістю записів, розміром і хешем.
+    Вибірка за діапазоном читає лише шарди, що перетинаються з ним, тож пам'ять
+    і обсяг завантаження залежать від вікна, а не від усієї історії.
+    Ті самі файли публікуються для фронтенду.
+    """
+
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, directory=None, shard_by=None, retention_days=None, clock=time.time):
+        self.directory = str(directory or Config.HISTORY_DIR)
+        self.shard_by = shard_by or Config.HISTORY_SHARD_BY
+        self.retention_days = retention_days or Config.HISTORY_RETENTION_DAYS
+        self.clock = clock
+        self.index_path = os.path.join(self.directory, self.INDEX_NAME)
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.index = self._load_index()
+
+    def append(self, entry):
+        """Дописати запис (словник з timestamp і analysis_id) у шард за його датою"""
+        timestamp = self._parse_time(entry.get('timestamp'))
+        name = self._shard_name(timestamp)
+        path = os.path.join(self.directory, f"{name}.jsonl")
+        line = (json.dumps(entry, ensure_ascii=False, default=str, sort_keys=True) + '\n').encode('utf-8')
+
+        with open(path, 'ab') as f:
+            f.write(line)
+
+        shard = self._shard(name)
+        analysis_id = str(entry.get('analysis_id') or '')
+        if not shard:
+            shard = {'name': name, 'path': f"{name}.jsonl", 'start': timestamp, 'end': timestamp,
+                     'first_id': analysis_id, 'last_id': analysis_id, 'count': 0}
+            self.index['shards'].append(shard)
+            self.index['shards'].sort(key=lambda s: s['start'])
+
+        shard['start'] = min(shard['start'], timestamp)
+        shard['end'] = max(shard['end'], timestamp)
+        shard['first_id'] = min(shard['first_id'] or analysis_id, analysis_id) if analysis_id else shard['first_id']
+        shard['last_id'] = max(shard['last_id'], analysis_id)
+        shard['count'] += 1
+        self._describe(shard)
+        self._save_index()
+
+        logger.debug(f"📚 Додано запис до історії: {entry.get('analysis_id')} → {name}")
+
+    def reload(self):
+        """Перечитати індекс з диска (його могли оновити інші процеси)"""
+        self.index = self._load_index()
+
+    def range(self, start=None, end=None):
+        """Записи з часом у [start, end] (datetime або секунди) від найстаршого"""
+        start = float('-inf') if start is None else self._to_seconds(start)
+        end = float('inf') if end is None else self._to_seconds(end)
+
+        entries = []
+        for shard in self.index['shards']:
+            if shard['end'] < start or shard['start'] > end:
+                continue
+            for entry in self._read(shard):
+                if start <= self._parse_time(entry.get('timestamp')) <= end:
+                    entries.append(entry)
+
+        entries.sort(key=lambda e: self._parse_time(e.get('timestamp')))
+        return entries
+
+    def since(self, days):
+        """Записи за останні days днів"""
+        return self.range(start=self.clock() - days * 86400)
+
+    def get(self, analysis_id):
+        """
+        Запис за analysis_id або None. Читаються лише шарди, чий діапазон
+        [first_id, last_id] з індексу містить id, тож новий id не читає жодного.
+        """
+        analysis_id = str(analysis_id)
+        for shard in self.index['shards']:
+            if not (shard['first_id'] <= analysis_id <= shard['last_id']):
+                continue
+            for entry in self._read(shard):
+                if entry.get('analysis_id') == analysis_id:
+                    return entry
+        return None
+
+    def last(self, count=1):
+        """Останні count записів (читаються лише найновіші шарди)"""
+        if count <= 0:
+            return []
+
+        entries = []
+        for shard in reversed(self.index['shards']):
+            entries = self._read(shard) + entries
+            if len(entries) >= count:
+                break
+
+        entries.sort(key=lambda e: self._parse_time(e.get('timestamp')))
+        return entries[-count:]
+
+    def __len__(self):
+        return sum(shard['count'] for shard in self.index['shards'])
+
+    def migrate_legacy(self, legacy_path=None):
+        """Одноразово перенести записи зі старого JSON-масиву history_recommendations.json"""
+        if self.index['shards']:
+            return 0
+
+        entries = self._read_legacy(str(legacy_path or Config.HISTORY_FILE))
+        for entry in entries:
+            self.append(entry)
+        migrated = len(entries)
+
+        if migrated:
+            logger.info(f"📦 Перенесено {migrated} записів зі старої історії")
+        return migrated
+
+    def maybe_compact(self):
+        """Видалити шарди, що повністю старші за retention_days"""
+        cutoff = self.clock() - self.retention_days * 86400
+        expired = [shard for shard in self.index['shards'] if shard['end'] < cutoff]
+        if not expired:
+            return 0
+
+        self.index['shards'] = [shard for shard in self.index['shards'] if shard['end'] >= cutoff]
+        self._save_index()
+        for shard in expired:
+            try:
+                os.remove(os.path.join(self.directory, shard['path']))
+            except OSError:
+                pass
+
+        logger.info(f"🧹 Видалено застарілих шардів історії: {len(expired)}")
+        return len(expired)
+
+    def _read(self, shard):
+        path = os.path.join(self.directory, shard['path'])
+        entries = []
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # Обірваний рядок
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _read_legacy(self, path):
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+                return legacy if isinstance(legacy, list) else []
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося прочитати стару історію {path}: {e}")
+            return []
+
+    def _shard(self, name):
+        for shard in self.index['shards']:
+            if shard['name'] == name:
+                return shard
+        return None
+
+    def _shard_name(self, timestamp):
+        moment = datetime.fromtimestamp(timestamp, Config.KYIV_TZ)
+        if self.shard_by == 'day':
+            return moment.strftime('%Y-%m-%d')
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+
+    def _describe(self, shard):
+        """Розмір, хеш і діапазон шарду в читабельному вигляді для клієнтів"""
+        path = os.path.join(self.directory, shard['path'])
+        with open(path, 'rb') as f:
+            payload = f.read()
+        shard['size'] = len(payload)
+        shard['sha256'] = hashlib.sha256(payload).hexdigest()
+        shard['from'] = datetime.fromtimestamp(shard['start'], Config.KYIV_TZ).isoformat()
+        shard['to'] = datetime.fromtimestamp(shard['end'], Config.KYIV_TZ).isoformat()
+
+    def _load_index(self):
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Індекс історії пошкоджено, відновлюємо з шардів: {e}")
+        return self._rebuild_index()
+
+    def _rebuild_index(self):
+        self.index = {'version': 1, 'shard_by': self.shard_by, 'shards': []}
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.jsonl'):
+                continue
+            shard = {'name': name[:-len('.jsonl')], 'path': name}
+            entries = self._read(shard)
+            if not entries:
+                continue
+            times = [self._parse_time(e.get('timestamp')) for e in entries]
+            ids = [str(e.get('analysis_id') or '') for e in entries]
+            shard.update({'start': min(times), 'end': max(times), 'first_id': min(ids),
+                          'last_id': max(ids), 'count': len(entries)})
+            self._describe(shard)
+            self.index['shards'].append(shard)
+        self.index['shards'].sort(key=lambda s: s['start'])
+        self._save_index()
+        return self.index
+
+    def _save_index(self):
+        self.index['updated'] = datetime.fromtimestamp(self.clock(), Config.KYIV_TZ).isoformat()
+        self.index['total'] = len(self)
+        atomic_write(self.index_path, dumps(self.index, indent=None).encode('utf-8'))
+
+    def _parse_time(self, value):
+        try:
+            moment = datetime.fromisoformat(value)
+            if moment.tzinfo is None:
+                moment = pytz.UTC.localize(moment)
+            return moment.timestamp()
+        except (TypeError, ValueError):
+            return self.clock()
+
+    @staticmethod
+    def _to_seconds(value):
+        return value.timestamp() if isinstance(value, datetime) else float(value)
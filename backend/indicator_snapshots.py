@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+from config import Config
+from file_lock import async_data_lock, data_lock
+
+logger = logging.getLogger("indicator_snapshots")
+
+
+class IndicatorSnapshots:
+    """
+    Знімок економічних показників останнього запуску (Config.ECONOMIC_INDICATORS_FILE)
+    і різниця з попереднім: які значення змінилися і наскільки.
+    Зміна вважається суттєвою, якщо перевищує поріг розділу з
+    Config.INDICATOR_CHANGE_THRESHOLDS — тоді подальші етапи мають що перераховувати.
+    """
+
+    # Похідні розділи перераховуються з інших показників — у порівнянні не беруть участі
+    DERIVED_SECTIONS = ('cross_rates', 'statistics')
+
+    # Службові та похідні поля всередині розділів
+    IGNORED_FIELDS = ('change_pct', 'volatility', 'updated', 'date', 'name', 'unit', 'currency', 'source')
+
+    def __init__(self, path=None, thresholds=None):
+        self.path = path or Config.ECONOMIC_INDICATORS_FILE
+        self.thresholds = thresholds or Config.INDICATOR_CHANGE_THRESHOLDS
+
+    def load(self):
+        """Останній збережений знімок або None"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                if snapshot.get('last_update'):
+                    return snapshot
+        except Exception as e:
+            logger.debug(f"Помилка читання знімка показників: {e}")
+        return None
+
+    def record(self, economic_data):
+        """Порівняти з попереднім знімком, зберегти новий і повернути різницю"""
+        with data_lock():
+            changes = self._replace(economic_data)
+        return self._report(changes)
+
+    async def record_async(self, economic_data):
+        """record для корутин: блокування каталогу даних очікується без зупинки циклу подій"""
+        async with async_data_lock():
+            changes = self._replace(economic_data)
+        return self._report(changes)
+
+    def _replace(self, economic_data):
+        """Записати новий знімок замість попереднього (під блокуванням) і повернути різницю"""
+        previous = self.load()
+        changes = self.diff(previous, economic_data)
+
+        snapshot = {
+            'last_update': economic_data.get('timestamp'),
+            'indicators': economic_data.get('indicators', {}),
+            'market_status': economic_data.get('market_status', {}),
+            'previous_update': previous.get('last_update') if previous else None,
+            'changes': changes
+        }
+        self._save(snapshot)
+        return changes
+
+    @staticmethod
+    def _report(changes):
+        if changes['material']:
+            logger.info(f"📊 Суттєвих змін показників: {len(changes['material_fields'])}")
+        else:
+            logger.info("📊 Показники без суттєвих змін від попереднього запуску")
+        return changes
+
+    def diff(self, previous, current):
+        """
+        Різниця між знімками: changed — {шлях: {old, new, change, change_pct}},
+        added/removed — шляхи, material — чи є зміни понад поріг.
+        """
+        old = self.flatten(previous) if previous else {}
+        new = self.flatten(current)
+
+        changed = {}
+        material_fields = []
+
+        for path, value in new.items():
+            if path not in old or old[path] == value:
+                continue
+            before = old[path]
+            entry = {'old': before, 'new': value}
+
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)):
+                entry['change'] = round(value - before, 6)
+                entry['change_pct'] = round((value / before - 1) * 100, 4) if before else None
+                pct = abs(entry['change_pct']) if entry['change_pct'] is not None else float('inf')
+                is_material = pct > self.thresholds.get(path.split('.', 1)[0], 0.0)
+            else:
+                is_material = True
+
+            changed[path] = entry
+            if is_material:
+                material_fields.append(path)
+
+        added = sorted(set(new) - set(old))
+        removed = sorted(set(old) - set(new))
+
+        return {
+            'previous_update': previous.get('last_update') if previous else None,
+            'changed': changed,
+            'added': added,
+            'removed': removed,
+            'material_fields': material_fields,
+            'material': bool(material_fields or added or removed)
+        }
+
+    @classmethod
+    def flatten(cls, snapshot):
+        """Плоский словник {розділ.актив.поле: значення} порівнюваних показників"""
+        flat = {}
+
+        for section, values in (snapshot.get('indicators') or {}).items():
+            if section not in cls.DERIVED_SECTIONS:
+                cls._flatten_into(flat, section, values)
+
+        for venue, status in (snapshot.get('market_status') or {}).items():
+            if isinstance(status, dict) and 'status' in status:
+                flat[f'market_status.{venue}'] = status['status']
+
+        return flat
+
+    @classmethod
+    def _flatten_into(cls, flat, prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key not in cls.IGNORED_FIELDS:
+                    cls._flatten_into(flat, f'{prefix}.{key}', item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix] = value
+
+    def _save(self, snapshot):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося зберегти знімок показників: {e}")
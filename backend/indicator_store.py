@@ -0,0 +1,125 @@
+import logging
+import time
+import warnings
+import numpy as np
+from config import Config
+from timeseries_store import ColumnarStore
+
+logger = logging.getLogger("indicator_store")
+
+DAY = 86400
+
+
+class IndicatorStore:
+    """
+    Історія зібраних показників по запусках: курси (UAH за одиницю),
+    крипта (USD) і товари (USD). Рядок — час запуску, колонка — актив.
+    Ковзні статистики рахуються векторно по всіх активах одразу.
+    """
+
+    def __init__(self, store=None, clock=time.time):
+        self.store = store or ColumnarStore(Config.TIMESERIES_DIR / 'indicators')
+        self.clock = clock
+
+    def record(self, indicators, timestamp=None):
+        """Записати значення показників одного запуску"""
+        values = self._extract_values(indicators)
+        if not values:
+            return 0
+
+        columns = sorted(values)
+        timestamp = int(timestamp if timestamp is not None else self.clock())
+        return self.store.upsert([timestamp], columns, [[values[c] for c in columns]])
+
+    def statistics(self, horizons=(1, 7, 30), window=30):
+        """
+        Для кожного активу: останнє значення, прибутковість за горизонтами (у %),
+        денна реалізована волатильність (у %) і z-score відносно вікна.
+        """
+        keys, columns, values = self.store.load()
+        if not len(keys):
+            return {}
+
+        keys = np.asarray(keys)
+        filled = self._forward_fill(np.asarray(values))
+        last_time = keys[-1]
+        last = filled[-1]
+
+        result = {}
+
+        returns = {}
+        for days in horizons:
+            past = self._values_at(keys, filled, last_time - days * DAY)
+            returns[days] = self._pct_change(last, past)
+
+        # Денна сітка за вікно: останнє відоме значення на кінець кожного дня
+        grid = last_time - np.arange(window, -1, -1) * DAY
+        daily = self._values_at(keys, filled, grid)
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            # Стовпці без даних дають NaN — попередження тут очікувані
+            warnings.simplefilter('ignore', RuntimeWarning)
+            log_returns = np.diff(np.log(daily), axis=0)
+            observed = np.isfinite(log_returns).sum(axis=0)
+            volatility = np.where(observed >= 2, np.nanstd(log_returns, axis=0) * 100, np.nan)
+            counted = np.isfinite(daily).sum(axis=0)
+            mean = np.nanmean(daily, axis=0)
+            std = np.nanstd(daily, axis=0)
+            zscore = np.where((counted >= 3) & (std > 0), (last - mean) / std, np.nan)
+
+        for j, asset in enumerate(columns):
+            if not np.isfinite(last[j]):
+                continue
+            stats = {'value': round(float(last[j]), 6)}
+            for days in horizons:
+                stats[f'return_{days}d'] = self._round(returns[days][j])
+            stats[f'volatility_{window}d'] = self._round(volatility[j])
+            stats[f'zscore_{window}d'] = self._round(zscore[j])
+            result[asset] = stats
+
+        return result
+
+    def _extract_values(self, indicators):
+        values = {}
+
+        for currency, info in indicators.get('exchange_rates', {}).items():
+            if currency != 'UAH' and isinstance(info, dict) and info.get('rate'):
+                values[currency] = float(info['rate'])
+
+        for coin, info in indicators.get('crypto', {}).items():
+            if isinstance(info, dict) and info.get('USD'):
+                values[coin] = float(info['USD'])
+
+        for commodity, info in indicators.get('commodities', {}).items():
+            if isinstance(info, dict) and info.get('price'):
+                values[commodity] = float(info['price'])
+
+        return values
+
+    @staticmethod
+    def _forward_fill(values):
+        """Заповнити пропуски останнім відомим значенням (по колонках)"""
+        if not values.size:
+            return values
+        rows = np.arange(len(values))[:, None]
+        index = np.where(np.isfinite(values), rows, 0)
+        np.maximum.accumulate(index, axis=0, out=index)
+        filled = np.take_along_axis(values, index, axis=0)
+        # До першого спостереження значень немає
+        seen = np.maximum.accumulate(np.isfinite(values), axis=0)
+        return np.where(seen, filled, np.nan)
+
+    @staticmethod
+    def _values_at(keys, filled, times):
+        """Значення на момент times (останній рядок не пізніше); NaN — якщо раніше історії"""
+        rows = np.searchsorted(keys, times, side='right') - 1
+        result = filled[np.clip(rows, 0, None)]
+        return np.where((np.asarray(rows) >= 0)[..., None], result, np.nan)
+
+    @staticmethod
+    def _pct_change(current, past):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(past > 0, (current / past - 1) * 100, np.nan)
+
+    @staticmethod
+    def _round(value):
+        return round(float(value), 3) if np.isfinite(value) else None
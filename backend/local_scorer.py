@@ -0,0 +1,287 @@
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+from config import Config
+from nbu_history import NbuRateHistory
+
+logger = logging.getLogger("local_scorer")
+
+
+class LocalScorer:
+    """
+    Локальний рушій рекомендацій без зовнішньої моделі.
+    Поєднує тональність новин, моментум курсів/крипти/товарів та різницю
+    відсоткових ставок в один векторний скоринг по всіх активах.
+    """
+
+    # Ваги факторів у композитному скорі
+    WEIGHTS = {
+        'sentiment': 0.5,
+        'momentum': 0.3,
+        'rate_differential': 0.2
+    }
+
+    # Масштаб "типового" руху для нормалізації моментуму (у відсотках)
+    MOMENTUM_SCALE = {
+        'currency': 1.0,
+        'crypto': 5.0,
+        'commodity': 2.0
+    }
+
+    RISK_LEVELS = {
+        'currency': 'medium',
+        'crypto': 'high',
+        'commodity': 'medium'
+    }
+
+    # Центральні банки -> валюта
+    CENTRAL_BANKS = {
+        'ФРС США': 'USD',
+        'ЄЦБ': 'EUR',
+        'Банк Англії': 'GBP',
+        'НБУ': 'UAH',
+        'Банк Японії': 'JPY',
+        'ШНБ': 'CHF'
+    }
+
+    ACTIONS = np.array(['STRONG_BUY', 'BUY', 'NEUTRAL', 'AVOID', 'STRONG_AVOID'])
+
+    # Горизонт моментуму з історії курсів НБУ (днів)
+    MOMENTUM_DAYS = 7
+
+    def __init__(self, rate_history=None):
+        # Історія курсів НБУ є в будь-якому режимі (на відміну від change_pct з потоку цін)
+        self.rate_history = rate_history or NbuRateHistory()
+        self.assets = list(Config.CURRENCIES) + list(Config.CRYPTO) + list(Config.COMMODITIES)
+        self.asset_classes = (
+            ['currency'] * len(Config.CURRENCIES) +
+            ['crypto'] * len(Config.CRYPTO) +
+            ['commodity'] * len(Config.COMMODITIES)
+        )
+        self.asset_index = {asset: i for i, asset in enumerate(self.assets)}
+
+        classes = np.array(self.asset_classes)
+        self.momentum_scale = np.array([self.MOMENTUM_SCALE[c] for c in classes])
+
+    def score(self, currency_impact, economic_data, momentum=None):
+        """
+        Композитний скор для всіх активів.
+        Повертає словник масивів: score (0..1), composite (-1..1), coverage та фактори.
+        """
+        n = len(self.assets)
+        indicators = (economic_data or {}).get('indicators', {})
+
+        # Фактори зі значенням NaN = "немає даних"
+        sentiment = np.full(n, np.nan)
+        news_weight = np.zeros(n)
+        for asset, data in (currency_impact or {}).items():
+            i = self.asset_index.get(asset)
+            if i is not None and data.get('total_news', 0) > 0:
+                sentiment[i] = data['sentiment_score'] * 2 - 1
+                news_weight[i] = min(1.0, data['total_news'] / 5)
+
+        momentum_pct = np.full(n, np.nan)
+        for asset, change in self._collect_momentum(indicators, momentum).items():
+            i = self.asset_index.get(asset)
+            if i is not None:
+                momentum_pct[i] = change
+
+        policy_rate = np.full(n, np.nan)
+        for bank, rate in indicators.get('interest_rates', {}).items():
+            i = self.asset_index.get(self.CENTRAL_BANKS.get(bank))
+            if i is not None:
+                policy_rate[i] = rate
+
+        factors = {
+            'sentiment': sentiment,
+            'momentum': np.tanh(momentum_pct / self.momentum_scale),
+            'rate_differential': np.tanh((policy_rate - np.nanmean(policy_rate)) / 5)
+            if np.isfinite(policy_rate).any() else policy_rate
+        }
+
+        # Зважуємо лише наявні фактори, щоб відсутні дані не "розмивали" скор
+        weights = np.array([self.WEIGHTS[name] for name in factors])
+        weights = np.broadcast_to(weights[:, None], (len(factors), n)).copy()
+        weights[0] *= np.where(news_weight > 0, news_weight, 1.0)
+        values = np.vstack(list(factors.values()))
+        present = np.isfinite(values)
+
+        weight_sum = np.where(present, weights, 0).sum(axis=0)
+        composite = np.divide(
+            np.where(present, values * weights, 0).sum(axis=0),
+            weight_sum,
+            out=np.zeros(n),
+            where=weight_sum > 0
+        )
+        # Частка ваги наявних факторів — лише інформативно: відсутні фактори вже виключені з середнього
+        coverage = np.where(present, self._base_weights()[:, None], 0).sum(axis=0)
+
+        return {
+            'score': (composite + 1) / 2,
+            'composite': composite,
+            'coverage': coverage,
+            'factors': factors
+        }
+
+    def recommend(self, currency_impact, economic_data, language='uk', momentum=None):
+        """Рекомендації в тому ж форматі, що й від AI"""
+        scored = self.score(currency_impact, economic_data, momentum)
+        score = scored['score']
+
+        action_idx = np.select(
+            [score >= 0.8, score >= 0.6, score <= 0.2, score <= 0.4],
+            [0, 1, 4, 3],
+            default=2
+        )
+        confidence = np.minimum(0.95, np.maximum(score, 1 - score))
+
+        # Нейтральні, без жодних даних і з упевненістю нижче порогу пропускаємо
+        selected = np.flatnonzero(
+            (action_idx != 2) & (scored['coverage'] > 0) & (confidence >= Config.MIN_CONFIDENCE)
+        )
+        selected = selected[np.argsort(-confidence[selected], kind='stable')][:Config.MAX_RECOMMENDATIONS]
+
+        now = datetime.now().strftime('%Y%m%d%H%M%S')
+        generated_at = Config.get_kyiv_time().isoformat()
+
+        recommendations = []
+        for i in selected:
+            asset = self.assets[i]
+            recommendations.append({
+                'asset': asset,
+                'action': str(self.ACTIONS[action_idx[i]]),
+                'confidence': round(float(confidence[i]), 3),
+                'reason': self._build_reason(i, scored['factors'], currency_impact, language),
+                'timeframe': '1-2 дні' if language == 'uk' else '1-2 дня',
+                'risk_level': self.RISK_LEVELS[self.asset_classes[i]],
+                'id': f"{asset}_{now}",
+                'generated_at': generated_at,
+                'source': 'local'
+            })
+
+        logger.info(f"⚡ Локальний скоринг: {len(recommendations)} рекомендацій з {len(self.assets)} активів")
+        return recommendations
+
+    def rank_with_ai(self, ai_recommendations, currency_impact, economic_data, momentum=None):
+        """
+        Локальний скор як тайбрейкер для рекомендацій AI:
+        при однаковій впевненості вище йде та, з якою згоден локальний скоринг.
+        """
+        if not ai_recommendations:
+            return ai_recommendations
+
+        composite = self.score(currency_impact, economic_data, momentum)['composite']
+        direction = {'STRONG_BUY': 1, 'BUY': 1, 'NEUTRAL': 0, 'AVOID': -1, 'STRONG_AVOID': -1}
+
+        for rec in ai_recommendations:
+            i = self.asset_index.get(rec.get('asset'))
+            local = float(composite[i]) if i is not None else 0.0
+            rec['local_score'] = round(local, 3)
+            rec['_agreement'] = direction.get(rec.get('action'), 0) * local
+
+        ai_recommendations.sort(key=lambda r: (r['confidence'], r['_agreement']), reverse=True)
+        for rec in ai_recommendations:
+            del rec['_agreement']
+
+        return ai_recommendations
+
+    def _base_weights(self):
+        return np.array(list(self.WEIGHTS.values()))
+
+    def _collect_momentum(self, indicators, momentum=None):
+        """Зміна ціни у відсотках по активах з наявних показників"""
+        changes = {}
+
+        for asset, info in indicators.get('commodities', {}).items():
+            change = str(info.get('change', '')).replace('%', '').replace('+', '')
+            try:
+                changes[asset] = float(change)
+            except ValueError:
+                continue
+
+        for asset, info in indicators.get('crypto', {}).items():
+            if isinstance(info, dict) and 'change_pct' in info:
+                changes[asset] = info['change_pct']
+
+        for asset, info in indicators.get('exchange_rates', {}).items():
+            if isinstance(info, dict) and 'change_pct' in info:
+                changes[asset] = info['change_pct']
+
+        # Моментум валют з історії курсів НБУ
+        changes.update(self._nbu_momentum())
+
+        # Ковзні статистики з історії показників: тижнева, інакше добова зміна
+        for asset, stats in indicators.get('statistics', {}).items():
+            change = stats.get('return_7d')
+            if change is None:
+                change = stats.get('return_1d')
+            if change is not None:
+                changes[asset] = change
+
+        # Зовнішній моментум (наприклад, з історії показників) має пріоритет
+        changes.update(momentum or {})
+        return changes
+
+    def _nbu_momentum(self, days=None):
+        """Зміна курсів НБУ (у %) за останні days днів; UAH — відносно долара"""
+        days = days or self.MOMENTUM_DAYS
+        try:
+            start = Config.get_kyiv_time().date() - timedelta(days=days + 10)
+            dates, columns, values = self.rate_history.load(start=start)
+        except Exception as e:
+            logger.debug(f"Історія курсів НБУ недоступна: {e}")
+            return {}
+        if len(dates) < 2:
+            return {}
+
+        values = np.asarray(values, dtype=np.float64)
+        days_index = dates.astype(np.int64)
+        past_row = int(np.searchsorted(days_index, days_index[-1] - days, side='right')) - 1
+        if past_row < 0:
+            past_row = 0
+
+        changes = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (values[-1] / values[past_row] - 1) * 100
+        for asset, value in zip(columns, change.tolist()):
+            if np.isfinite(value):
+                changes[asset] = round(value, 4)
+
+        # Гривня дорожчає, коли долар дешевшає
+        if 'USD' in changes:
+            changes['UAH'] = round((1 / (1 + changes['USD'] / 100) - 1) * 100, 4)
+        return changes
+
+    def _build_reason(self, i, factors, currency_impact, language):
+        """Текстове пояснення за найсильнішим фактором"""
+        asset = self.assets[i]
+        impact = (currency_impact or {}).get(asset, {})
+        parts = []
+
+        sentiment = factors['sentiment'][i]
+        if np.isfinite(sentiment) and sentiment != 0:
+            if language == 'uk':
+                parts.append(f"Тональність новин {'позитивна' if sentiment > 0 else 'негативна'} "
+                             f"({impact.get('positive_news', 0)}+/{impact.get('negative_news', 0)}-)")
+            else:
+                parts.append(f"Тональность новостей {'позитивная' if sentiment > 0 else 'негативная'} "
+                             f"({impact.get('positive_news', 0)}+/{impact.get('negative_news', 0)}-)")
+
+        momentum = factors['momentum'][i]
+        if np.isfinite(momentum) and abs(momentum) > 0.05:
+            if language == 'uk':
+                parts.append(f"цінова динаміка {'висхідна' if momentum > 0 else 'низхідна'}")
+            else:
+                parts.append(f"ценовая динамика {'восходящая' if momentum > 0 else 'нисходящая'}")
+
+        differential = factors['rate_differential'][i]
+        if np.isfinite(differential) and abs(differential) > 0.05:
+            if language == 'uk':
+                parts.append(f"ставка {'вища' if differential > 0 else 'нижча'} за середню")
+            else:
+                parts.append(f"ставка {'выше' if differential > 0 else 'ниже'} средней")
+
+        if not parts:
+            return 'Локальний скоринг' if language == 'uk' else 'Локальный скоринг'
+        reason = '; '.join(parts)
+        return reason[0].upper() + reason[1:]
@@ -0,0 +1,217 @@
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import pytz
+from config import Config
+
+logger = logging.getLogger("market_sessions")
+
+
+def _easter(year):
+    """Дата західного Великодня (алгоритм Гаусса/Мііза)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-й день тижня місяця (n = -1 — останній)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day, saturday_to_friday=True):
+    """
+    Свято у вихідний переноситься на найближчий робочий день (правило NYSE).
+    saturday_to_friday=False — суботу не переносити: Новий рік у суботу
+    не закриває біржу 31 грудня (останній торговий день звітного року).
+    """
+    if day.weekday() == 5:
+        if not saturday_to_friday:
+            return day
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _holidays_us(year):
+    return {
+        _observed(date(year, 1, 1), saturday_to_friday=False),
+        _nth_weekday(year, 1, 0, 3),            # День Мартіна Лютера Кінга
+        _nth_weekday(year, 2, 0, 3),            # День президентів
+        _easter(year) - timedelta(days=2),      # Страсна п'ятниця
+        _nth_weekday(year, 5, 0, -1),           # День пам'яті
+        _observed(date(year, 6, 19)),
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),            # День праці
+        _nth_weekday(year, 11, 3, 4),           # День подяки
+        _observed(date(year, 12, 25))
+    }
+
+
+def _holidays_eu(year):
+    easter = _easter(year)
+    return {
+        date(year, 1, 1), easter - timedelta(days=2), easter + timedelta(days=1),
+        date(year, 5, 1), date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)
+    }
+
+
+def _holidays_ua(year):
+    # Під час воєнного стану державні вихідні скасовано; біржа не працює на Новий рік і Різдво
+    return {date(year, 1, 1), date(year, 12, 25)}
+
+
+def _holidays_forex(year):
+    return {date(year, 1, 1), date(year, 12, 25)}
+
+
+class MarketSessionEngine:
+    """
+    Розклад торгових сесій: для кожного майданчика наперед розраховано
+    відсортований масив переходів (UTC, секунди) на рік уперед з урахуванням
+    переходу на літній час і свят. Парний індекс — відкриття, непарний — закриття.
+    Статус і наступна зміна — бінарний пошук; повторний запит у межах
+    тієї ж сесії відповідає з кешованого курсора за O(1).
+    """
+
+    VENUES = {
+        # Форекс: з неділі 17:00 до п'ятниці 17:00 за Нью-Йорком
+        'forex': {'tz': 'America/New_York', 'open': (17, 0), 'close': (17, 0),
+                  'days': (6, 0, 1, 2, 3), 'overnight': True, 'holidays': _holidays_forex},
+        'european_stocks': {'tz': 'Europe/Berlin', 'open': (9, 0), 'close': (17, 30),
+                            'days': (0, 1, 2, 3, 4), 'holidays': _holidays_eu},
+        'us_stocks': {'tz': 'America/New_York', 'open': (9, 30), 'close': (16, 0),
+                      'days': (0, 1, 2, 3, 4), 'holidays': _holidays_us},
+        'ukrainian_stocks': {'tz': 'Europe/Kiev', 'open': (10, 0), 'close': (18, 0),
+                             'days': (0, 1, 2, 3, 4), 'holidays': _holidays_ua},
+    }
+
+    ALWAYS_OPEN = ('crypto',)
+
+    def __init__(self, venues=None, horizon_days=366, clock=time.time):
+        self.venues = venues or self.VENUES
+        self.horizon_days = horizon_days
+        self.clock = clock
+        self.transitions = {}
+        self._cursor = {}
+        self._built_until = 0
+        self.build()
+
+    def build(self, start=None):
+        """Перерахувати переходи для всіх майданчиків на horizon_days уперед"""
+        start = start if start is not None else self.clock()
+        first_day = datetime.fromtimestamp(start, timezone.utc).date() - timedelta(days=7)
+
+        for name, venue in self.venues.items():
+            self.transitions[name] = self._build_venue(venue, first_day)
+            self._cursor.pop(name, None)
+
+        self._built_until = start + (self.horizon_days - 30) * 86400
+        logger.debug(f"🗓️ Розклад сесій побудовано для {len(self.venues)} майданчиків")
+
+    def status(self, venue, now=None):
+        """(відкрито?, час наступної зміни в UTC-секундах або None)"""
+        if venue in self.ALWAYS_OPEN:
+            return True, None
+
+        now = now if now is not None else self.clock()
+        if now >= self._built_until:
+            self.build(now)
+
+        transitions = self.transitions[venue]
+        index = self._cursor.get(venue)
+        if index is None or not self._in_segment(transitions, index, now):
+            index = int(np.searchsorted(transitions, now, side='right'))
+            self._cursor[venue] = index
+
+        next_change = float(transitions[index]) if index < len(transitions) else None
+        return index % 2 == 1, next_change
+
+    def market_status(self, now=None):
+        """Статус усіх майданчиків у форматі EconomicDataCollector._get_market_status"""
+        now = now if now is not None else self.clock()
+        status = {}
+
+        for venue in list(self.venues) + list(self.ALWAYS_OPEN):
+            is_open, next_change = self.status(venue, now)
+            status[venue] = {
+                'status': 'OPEN' if is_open else 'CLOSED',
+                'next_change': datetime.fromtimestamp(next_change, Config.KYIV_TZ).isoformat() if next_change else 'Немає'
+            }
+
+        status['overall'] = 'ACTIVE' if any(s['status'] == 'OPEN' for s in status.values()) else 'INACTIVE'
+        return status
+
+    def next_transition(self, now=None):
+        """Найближча зміна статусу будь-якого майданчика: (майданчик, UTC-секунди)"""
+        now = now if now is not None else self.clock()
+        upcoming = [(self.status(venue, now)[1], venue) for venue in self.venues]
+        upcoming = [(t, venue) for t, venue in upcoming if t is not None]
+        if not upcoming:
+            return None
+        moment, venue = min(upcoming)
+        return venue, moment
+
+    @staticmethod
+    def _in_segment(transitions, index, now):
+        lower = transitions[index - 1] if index > 0 else -np.inf
+        upper = transitions[index] if index < len(transitions) else np.inf
+        return lower <= now < upper
+
+    def _build_venue(self, venue, first_day):
+        tz = pytz.timezone(venue['tz'])
+        holidays = set()
+        for year in range(first_day.year, first_day.year + self.horizon_days // 365 + 2):
+            holidays |= venue['holidays'](year)
+
+        intervals = []
+        for offset in range(self.horizon_days + 7):
+            day = first_day + timedelta(days=offset)
+            if day.weekday() not in venue['days']:
+                continue
+
+            # Для нічної сесії свято визначається днем закриття
+            close_day = day + timedelta(days=1) if venue.get('overnight') else day
+            if day in holidays and not venue.get('overnight') or close_day in holidays:
+                continue
+
+            open_at = tz.localize(datetime.combine(day, datetime.min.time()).replace(
+                hour=venue['open'][0], minute=venue['open'][1]))
+            close_at = tz.localize(datetime.combine(close_day, datetime.min.time()).replace(
+                hour=venue['close'][0], minute=venue['close'][1]))
+            intervals.append((open_at.timestamp(), close_at.timestamp()))
+
+        # Суміжні сесії (форекс) зливаються в одну
+        merged = []
+        for open_at, close_at in intervals:
+            if merged and merged[-1][1] >= open_at:
+                merged[-1][1] = max(merged[-1][1], close_at)
+            else:
+                merged.append([open_at, close_at])
+
+        return np.array([t for interval in merged for t in interval], dtype=np.float64)
+
+
+_shared_sessions = None
+
+
+def get_market_sessions():
+    """Спільний розклад для всіх колекторів процесу (будується один раз)"""
+    global _shared_sessions
+    if _shared_sessions is None:
+        _shared_sessions = MarketSessionEngine()
+    return _shared_sessions
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+import numpy as np
+from config import Config
+from rate_limiter import get_rate_limiter
+from timeseries_store import ColumnarStore
+
+logger = logging.getLogger("nbu_history")
+
+
+class NbuRateHistory:
+    """
+    Історія офіційних курсів НБУ (гривень за одиницю валюти) по днях.
+    Ключ рядка — номер дня від 1970-01-01, колонки — коди валют.
+    """
+
+    URL = 'https://bank.gov.ua/NBUStatService/v1/statdirectory/exchange?date={date}&json'
+
+    def __init__(self, store=None):
+        self.store = store or ColumnarStore(Config.TIMESERIES_DIR / 'nbu_rates')
+        self.rate_limiter = get_rate_limiter()
+
+    @staticmethod
+    def day_number(day):
+        """Дата -> номер дня від епохи"""
+        return int(np.datetime64(day, 'D').astype(np.int64))
+
+    @staticmethod
+    def from_day_number(number):
+        return date(1970, 1, 1) + timedelta(days=int(number))
+
+    def append_snapshot(self, items):
+        """Додати повний список курсів НБУ (відповідь statdirectory/exchange)"""
+        rows = self._group_by_date(items)
+        for day, rates in rows.items():
+            columns = list(rates)
+            self.store.upsert([day], columns, [[rates[c] for c in columns]])
+        return len(rows)
+
+    async def backfill(self, start=None, end=None, concurrency=None, max_days=None):
+        """
+        Завантажити відсутні дні в [start, end] з обмеженою паралельністю.
+        Без start — останні NBU_BACKFILL_DAYS днів. max_days обмежує кількість
+        днів за виклик (спершу найновіші): пропуски визначаються за наявними
+        ключами сховища, тож наступний виклик продовжує з того, що лишилося.
+        """
+        end = end or datetime.now(Config.KYIV_TZ).date()
+        if start is None:
+            start = end - timedelta(days=Config.NBU_BACKFILL_DAYS)
+
+        keys, _, _ = self.store.load()
+        existing = set(np.asarray(keys).tolist())
+        days = [
+            start + timedelta(days=i)
+            for i in range((end - start).days + 1)
+            if self.day_number(start + timedelta(days=i)) not in existing
+        ]
+        if not days:
+            return 0
+        if max_days is not None and len(days) > max_days:
+            logger.info(f"📥 Курси НБУ: бракує {len(days)} днів, за цей запуск — {max_days} найновіших")
+            days = days[-max_days:]
+
+        logger.info(f"📥 Завантаження курсів НБУ за {len(days)} днів ({days[0]} — {days[-1]})")
+        semaphore = asyncio.Semaphore(concurrency or Config.NBU_BACKFILL_CONCURRENCY)
+
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            results = await asyncio.gather(
+                *(self._fetch_day(session, semaphore, day) for day in days),
+                return_exceptions=True
+            )
+
+        # Один запис у сховище на весь пакет
+        rows = {}
+        for result in results:
+            if isinstance(result, list):
+                rows.update(self._group_by_date(result))
+
+        if not rows:
+            return 0
+
+        columns = sorted({c for rates in rows.values() for c in rates})
+        keys = sorted(rows)
+        values = [[rows[k].get(c, np.nan) for c in columns] for k in keys]
+        self.store.upsert(keys, columns, values)
+
+        logger.info(f"✅ Збережено курси НБУ за {len(keys)} днів")
+        return len(keys)
+
+    def load(self, currencies=None, start=None, end=None):
+        """Дати (datetime64[D]), валюти та матриця курсів"""
+        start_key = self.day_number(start) if start else None
+        end_key = self.day_number(end) if end else None
+        keys, columns, values = self.store.select(currencies, start_key, end_key)
+        return np.asarray(keys).astype('datetime64[D]'), columns, values
+
+    async def _fetch_day(self, session, semaphore, day):
+        async with semaphore:
+            await self.rate_limiter.acquire('nbu')
+            url = self.URL.format(date=day.strftime('%Y%m%d'))
+            try:
+                async with session.get(url, timeout=15) as response:
+                    self.rate_limiter.observe('nbu', response.status, response.headers)
+                    if response.status == 200:
+                        return await response.json()
+            except Exception as e:
+                logger.debug(f"Помилка завантаження курсів за {day}: {e}")
+        return None
+
+    def _group_by_date(self, items):
+        """{номер дня: {валюта: курс}} зі списку НБУ"""
+        rows = {}
+        for item in items or []:
+            try:
+                day = datetime.strptime(item['exchangedate'], '%d.%m.%Y').date()
+                rows.setdefault(self.day_number(day), {})[item['cc']] = float(item['rate'])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Завантаження історії курсів НБУ")
+    parser.add_argument('--days', type=int, default=Config.NBU_BACKFILL_DAYS, help="Скільки днів назад")
+    parser.add_argument('--concurrency', type=int, default=Config.NBU_BACKFILL_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    today = datetime.now(Config.KYIV_TZ).date()
+    asyncio.run(NbuRateHistory().backfill(start=today - timedelta(days=args.days), end=today, concurrency=args.concurrency))
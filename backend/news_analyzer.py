@@ -1,6 +1,4 @@
-import aiohttp
 import asyncio
-import feedparser
 import json
 import logging
 from datetime import datetime, timedelta
@@ -8,12 +6,16 @@ import pytz
 import re
 from typing import List, Dict, Any
 from config import Config
+from single_flight import get_single_flight
+from news_archive import NewsArchive
 
 logger = logging.getLogger("news_analyzer")
 class NewsAnalyzer:
     def __init__(self):
         self.kyiv_tz = pytz.timezone('Europe/Kiev')
         self.session = None
+        self.flight = get_single_flight()
+        self.archive = NewsArchive()
         
         # Словник для перекладу днів/місяців в RSS
         self.ukrainian_months = {
@@ -45,7 +47,8 @@ class NewsAnalyzer:
         
         all_news = []
         
-        # Створюємо сесію aiohttp
+        # Створюємо сесію aiohttp (імпорт тут: важкий модуль потрібен лише етапу збору)
+        import aiohttp
         async with aiohttp.ClientSession() as session:
             self.session = session
             
@@ -53,11 +56,16 @@ class NewsAnalyzer:
             tasks = []
             for source in Config.NEWS_SOURCES:
                 if source['type'] == 'rss':
-                    tasks.append(self._fetch_rss_news(source, hours_back))
+                    # Одночасні аналізи ділять один запит до джерела
+                    tasks.append(self.flight.do(
+                        f"rss:{source['url']}:{hours_back}", self._fetch_rss_news, source, hours_back
+                    ))
                 elif source['type'] == 'api':
                     if source.get('requires_key', False) and not Config.NEWS_API_KEY:
                         continue
-                    tasks.append(self._fetch_api_news(source, hours_back))
+                    tasks.append(self.flight.do(
+                        f"api:{source['url']}:{hours_back}", self._fetch_api_news, source, hours_back
+                    ))
             
             # Виконуємо всі запити паралельно
             results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -73,6 +81,13 @@ class NewsAnalyzer:
         # Сортуємо за датою (новіші перші)
         unique_news.sort(key=lambda x: x.get('published_timestamp', ''), reverse=True)
         
+        # До обрізання всі новини йдуть в архів; блокування і запис — в окремому потоці,
+        # щоб очікування на інший процес не зупиняло цикл подій
+        try:
+            await asyncio.to_thread(self.archive.add, unique_news)
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося оновити архів новин: {e}")
+        
         # Обмежуємо кількість
         news_to_return = unique_news[:50]  # Беремо максимум 50 новин
         
@@ -99,6 +114,7 @@ class NewsAnalyzer:
                     content = await response.text()
                     
                     # Парсимо RSS
+                    import feedparser
                     feed = feedparser.parse(content)
                     
                     for entry in feed.entries[:20]:  # Беремо 20 останніх записів
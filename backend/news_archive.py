@@ -0,0 +1,317 @@
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from datetime import datetime
+import numpy as np
+from config import Config
+from file_lock import get_file_lock
+from publisher import atomic_write
+
+logger = logging.getLogger("news_archive")
+
+
+class NewsArchive:
+    """
+    Архів новин лише для дописування. Статті лежать у records.bin як записи
+    з префіксом довжини (4 байти + JSON) і читаються через mmap. docs.idx —
+    індекс фіксованої ширини: час публікації, зсув, довжина, тональність, id.
+    ids.npy — відсортовані id статей для дедуплікації через np.searchsorted
+    (без множини всіх id у пам'яті); статті, дописані в docs.idx після
+    останнього збереження ids.npy, доливаються в нього при наступному додаванні.
+    Інвертований індекс нормалізованих токенів зберігається сегментами .npy
+    (відсортовані токени, межі списків, номери статей), що відкриваються через
+    memory-map; дрібні сегменти періодично зливаються в один.
+    Запит "негативні новини про НБУ за 30 днів" читає лише списки потрібних
+    токенів, стовпці індексу і самі знайдені записи.
+    """
+
+    DOC_DTYPE = np.dtype([
+        ('published', '<f8'),
+        ('offset', '<i8'),
+        ('length', '<i4'),
+        ('sentiment', 'i1'),
+        ('id', 'S16')
+    ])
+
+    SENTIMENT = {'negative': -1, 'neutral': 0, 'positive': 1}
+    TOKEN_WIDTH = 32
+    MAX_SEGMENTS = 8
+
+    TOKEN_RE = re.compile(r"[\w'’]+", re.UNICODE)
+
+    def __init__(self, directory=None):
+        self.directory = str(directory or Config.NEWS_ARCHIVE_DIR)
+        self.records_path = os.path.join(self.directory, 'records.bin')
+        self.docs_path = os.path.join(self.directory, 'docs.idx')
+        self.segments_path = os.path.join(self.directory, 'segments.json')
+        self.ids_path = os.path.join(self.directory, 'ids.npy')
+        self.lock = get_file_lock(os.path.join(self.directory, '.lock'))
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def add(self, news_items):
+        """Дописати нові статті (дублікати за id пропускаються) і проіндексувати їх"""
+        with self.lock:
+            return self._add(news_items)
+
+    def _add(self, news_items):
+        # id читаються під блокуванням: інший процес міг дописати статті
+        ids = self._sorted_ids()
+        keys = [self.news_key(item) for item in news_items]
+        known = self._contains(ids, np.array([k.encode('utf-8') for k in keys], dtype='S16'))
+        rows = []
+        added = set()  # лише id з цього пакета
+
+        with open(self.records_path, 'ab') as f:
+            for item, news_id, is_known in zip(news_items, keys, known.tolist()):
+                if not news_id or is_known or news_id in added:
+                    continue
+                payload = json.dumps(item, ensure_ascii=False, default=str).encode('utf-8')
+                offset = f.tell()
+                f.write(struct.pack('<I', len(payload)))
+                f.write(payload)
+                rows.append((self._published(item), offset, len(payload),
+                             self.SENTIMENT.get(item.get('sentiment'), 0), news_id.encode('utf-8')))
+                added.add(news_id)
+
+        if rows:
+            docs = np.array(rows, dtype=self.DOC_DTYPE)
+            with open(self.docs_path, 'ab') as f:
+                docs.tofile(f)
+            self._save_ids(np.sort(np.concatenate([ids, docs['id']])))
+
+        self._index_pending()
+        if rows:
+            logger.info(f"🗄️ Архів новин: +{len(rows)}, всього {len(self)}")
+        return len(rows)
+
+    def search(self, text=None, sentiment=None, days=None, start=None, end=None, limit=None):
+        """
+        Статті, що містять усі токени text, з потрібною тональністю і часом
+        публікації в [start, end] (або за останні days днів). Новіші — першими.
+        """
+        docs = self._docs()
+        if not len(docs):
+            return []
+
+        mask = np.ones(len(docs), dtype=bool)
+        published = docs['published']
+        if days is not None:
+            start = Config.get_kyiv_time().timestamp() - days * 86400
+        if start is not None:
+            mask &= published >= self._to_seconds(start)
+        if end is not None:
+            mask &= published <= self._to_seconds(end)
+        if sentiment is not None:
+            mask &= docs['sentiment'] == self.SENTIMENT.get(sentiment, 0)
+
+        candidates = np.nonzero(mask)[0]
+        tokens = self.tokenize(text) if text else []
+        for token in dict.fromkeys(tokens):
+            candidates = np.intersect1d(candidates, self._postings(token), assume_unique=True)
+            if not len(candidates):
+                return []
+
+        # Новіші першими
+        order = np.argsort(-published[candidates], kind='stable')
+        candidates = candidates[order][:limit]
+        return self._read(docs[candidates])
+
+    def __len__(self):
+        return len(self._docs())
+
+    @staticmethod
+    def news_key(item):
+        """Ключ дедуплікації: хеш повного id, посилання або заголовка (16 hex-символів)"""
+        key = str(item.get('id') or item.get('link') or item.get('title') or '')
+        if not key:
+            return ''
+        return hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def tokenize(cls, text):
+        """Нормалізовані токени: NFKC, нижній регістр, без апострофів, довжина від 2"""
+        text = unicodedata.normalize('NFKC', str(text)).casefold()
+        tokens = []
+        for token in cls.TOKEN_RE.findall(text):
+            token = token.replace("'", '').replace('’', '')
+            if len(token) >= 2:
+                tokens.append(token[:cls.TOKEN_WIDTH])
+        return tokens
+
+    def _postings(self, token):
+        """Номери статей з токеном з усіх сегментів"""
+        parts = []
+        for segment in self._segments()['segments']:
+            tokens, starts, docs = self._open_segment(segment)
+            i = int(np.searchsorted(tokens, token))
+            if i < len(tokens) and tokens[i] == token:
+                parts.append(np.asarray(docs[starts[i]:starts[i + 1]]))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts)).astype(np.int64)
+
+    def _index_pending(self):
+        """Проіндексувати статті, яких ще немає в сегментах, і за потреби злити сегменти"""
+        state = self._segments()
+        docs = self._docs()
+        if state['indexed'] >= len(docs):
+            return
+
+        postings = {}
+        rows = docs[state['indexed']:]
+        for doc_id, item in zip(range(state['indexed'], len(docs)), self._read(rows)):
+            text = f"{item.get('title', '')} {item.get('summary', '')} {item.get('source', '')}"
+            for token in set(self.tokenize(text)):
+                postings.setdefault(token, []).append(doc_id)
+
+        name = f"seg_{state['next']:06d}"
+        self._write_segment(name, postings)
+        state['segments'].append(name)
+        state['next'] += 1
+        state['indexed'] = len(docs)
+
+        if len(state['segments']) > self.MAX_SEGMENTS:
+            state = self._merge_segments(state)
+
+        atomic_write(self.segments_path, json.dumps(state).encode('utf-8'))
+
+    def _merge_segments(self, state):
+        """Злити всі сегменти в один"""
+        postings = {}
+        for segment in state['segments']:
+            tokens, starts, docs = self._open_segment(segment)
+            for i, token in enumerate(tokens):
+                postings.setdefault(str(token), []).append(np.asarray(docs[starts[i]:starts[i + 1]]))
+
+        name = f"seg_{state['next']:06d}"
+        self._write_segment(name, {t: np.concatenate(p) for t, p in postings.items()})
+        old = state['segments']
+        state['segments'] = [name]
+        state['next'] += 1
+
+        # Старі файли видаляються після запису нового стану
+        atomic_write(self.segments_path, json.dumps(state).encode('utf-8'))
+        for segment in old:
+            for suffix in ('tokens', 'starts', 'docs'):
+                try:
+                    os.remove(os.path.join(self.directory, f"{segment}.{suffix}.npy"))
+                except OSError:
+                    pass
+
+        logger.info(f"🧹 Архів новин: злито {len(old)} сегментів індексу")
+        return state
+
+    def _write_segment(self, name, postings):
+        tokens = sorted(postings)
+        lists = [np.unique(np.asarray(postings[t], dtype=np.uint32)) for t in tokens]
+        starts = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l in lists], out=starts[1:])
+        docs = np.concatenate(lists) if lists else np.empty(0, dtype=np.uint32)
+
+        base = os.path.join(self.directory, name)
+        np.save(f"{base}.tokens.npy", np.array(tokens, dtype=f'<U{self.TOKEN_WIDTH}'))
+        np.save(f"{base}.starts.npy", starts)
+        np.save(f"{base}.docs.npy", docs)
+
+    def _open_segment(self, name):
+        base = os.path.join(self.directory, name)
+        return (
+            np.load(f"{base}.tokens.npy", mmap_mode='r'),
+            np.load(f"{base}.starts.npy", mmap_mode='r'),
+            np.load(f"{base}.docs.npy", mmap_mode='r')
+        )
+
+    def _segments(self):
+        try:
+            if os.path.exists(self.segments_path):
+                with open(self.segments_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Стан індексу архіву пошкоджено, індексуємо заново: {e}")
+        return {'segments': [], 'indexed': 0, 'next': 0}
+
+    def _docs(self):
+        """Індекс статей через memory-map (лише повні записи)"""
+        if not os.path.exists(self.docs_path):
+            return np.empty(0, dtype=self.DOC_DTYPE)
+        count = os.path.getsize(self.docs_path) // self.DOC_DTYPE.itemsize
+        if not count:
+            return np.empty(0, dtype=self.DOC_DTYPE)
+        return np.memmap(self.docs_path, dtype=self.DOC_DTYPE, mode='r', shape=(count,))
+
+    def _read(self, rows):
+        if not len(rows) or not os.path.getsize(self.records_path):
+            return []
+
+        items = []
+        with open(self.records_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset, length in zip(rows['offset'].tolist(), rows['length'].tolist()):
+                start = offset + 4
+                try:
+                    items.append(json.loads(data[start:start + length]))
+                except ValueError:
+                    continue
+        return items
+
+    def _sorted_ids(self):
+        """Відсортовані id усіх статей docs.idx (ids.npy, за потреби доповнений)"""
+        docs = self._docs()
+        try:
+            ids = np.load(self.ids_path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            ids = np.empty(0, dtype='S16')
+
+        if len(ids) > len(docs):
+            ids = np.sort(docs['id'])  # ids.npy новіший за docs.idx — перебудова
+            self._save_ids(ids)
+        elif len(ids) < len(docs):
+            ids = np.sort(np.concatenate([ids, docs['id'][len(ids):]]))
+            self._save_ids(ids)
+        return ids
+
+    def _save_ids(self, ids):
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(ids, dtype='S16'))
+        atomic_write(self.ids_path, buffer.getvalue())
+
+    @staticmethod
+    def _contains(sorted_ids, candidates):
+        """Маска: які candidates є у відсортованому масиві id"""
+        if not len(sorted_ids):
+            return np.zeros(len(candidates), dtype=bool)
+        positions = np.minimum(np.searchsorted(sorted_ids, candidates), len(sorted_ids) - 1)
+        return sorted_ids[positions] == candidates
+
+    @staticmethod
+    def _published(item):
+        if item.get('published_timestamp'):
+            return float(item['published_timestamp'])
+        try:
+            return datetime.fromisoformat(item.get('published')).timestamp()
+        except (TypeError, ValueError):
+            return Config.get_kyiv_time().timestamp()
+
+    @staticmethod
+    def _to_seconds(value):
+        return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Пошук в архіві новин")
+    parser.add_argument('text', nargs='?', default=None, help="Слова для пошуку")
+    parser.add_argument('--sentiment', choices=['positive', 'negative', 'neutral'])
+    parser.add_argument('--days', type=int, default=None)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    for item in NewsArchive().search(args.text, args.sentiment, args.days, limit=args.limit):
+        print(f"{item.get('published', '')[:16]}  [{item.get('sentiment', '')}]  {item.get('source', '')}: {item.get('title', '')}")
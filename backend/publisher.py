@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # без brotli публікуються лише gzip-варіанти
+    brotli = None
+
+logger = logging.getLogger("publisher")
+
+
+def dumps(obj, indent=2):
+    """
+    Серіалізація в JSON. indent=None — мініфікований. Ключі відсортовані,
+    а серіалізатор один (стандартний json): незмінений вміст завжди дає
+    ті самі байти незалежно від встановлених пакетів, тож хеші в маніфесті стабільні.
+    """
+    separators = (',', ':') if indent is None else None
+    return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators, sort_keys=True, default=str)
+
+
+class Serialized:
+    """
+    Об'єкт разом з його серіалізацією: відформатований і мініфікований JSON
+    обчислюються не більше одного разу і перевикористовуються всіма, хто їх читає
+    (вибір дельта/знімок, публікація, стиснуті варіанти).
+    """
+
+    def __init__(self, obj):
+        self.obj = obj
+        self._pretty = None
+        self._minified = None
+
+    @property
+    def pretty(self):
+        if self._pretty is None:
+            self._pretty = dumps(self.obj).encode('utf-8')
+        return self._pretty
+
+    @property
+    def minified(self):
+        if self._minified is None:
+            self._minified = dumps(self.obj, indent=None).encode('utf-8')
+        return self._minified
+
+
+def compressed_variants(payload):
+    """Попередньо стиснуті варіанти мініфікованого вмісту: {розширення: байти}"""
+    # mtime=0: однаковий вміст дає однакові байти архіву
+    variants = {'gz': gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(payload, quality=11)
+    return variants
+
+
+def atomic_write(path, payload):
+    """
+    Записати байти в тимчасовий файл, fsync і перейменувати поверх path.
+    Ім'я тимчасового файлу унікальне (mkstemp у тому ж каталозі), тож
+    одночасні записи одного шляху не пишуть в один .tmp.
+    """
+    path = str(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        os.fchmod(fd, 0o644)  # mkstemp створює 0600; опубліковані файли читає вебсервер
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(os.path.dirname(path))
+
+
+def _fsync_dir(directory):
+    # Перейменування стає стійким лише після fsync каталогу (POSIX)
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class ArtifactPublisher:
+    """
+    Публікація пов'язаних артефактів однією версією: кожен артефакт серіалізується
+    рівно один раз, усі записуються в тимчасові файли з fsync, потім перейменовуються,
+    і останнім оновлюється маніфест з номером версії та хешами файлів.
+    Для артефактів, що читає фронтенд, додатково публікуються мініфікований
+    і попередньо стиснуті (gzip, brotli) варіанти. Маніфест мініфікований і малий —
+    клієнт опитує його і завантажує дані лише при зміні хешу.
+    """
+
+    def __init__(self, manifest_path=None):
+        self.manifest_path = str(manifest_path or Config.MANIFEST_FILE)
+
+    def load_manifest(self):
+        """Поточний маніфест або порожній"""
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.debug(f"Помилка читання маніфесту: {e}")
+        return {'version': 0, 'artifacts': {}}
+
+    def publish(self, artifacts, generated_at=None, extra=None, compact=()):
+        """
+        artifacts — {назва: (шлях, об'єкт або Serialized)}; compact — назви артефактів, для яких
+        публікуються варіанти .min.json, .min.json.gz і .min.json.br. Повертає новий маніфест.
+        Маніфест зберігає записи про артефакти, не включені в цю публікацію.
+        """
+        manifest = self.load_manifest()
+        files = {}
+        entries = {}
+
+        for name, (path, obj) in artifacts.items():
+            path = str(path)
+            serialized = obj if isinstance(obj, Serialized) else Serialized(obj)
+            payload = serialized.pretty
+            files[path] = payload
+            entries[name] = {
+                'path': os.path.basename(path),
+                'sha256': hashlib.sha256(payload).hexdigest(),
+                'size': len(payload)
+            }
+
+            if name in compact:
+                minified = serialized.minified
+                min_path = f"{os.path.splitext(path)[0]}.min.json"
+                files[min_path] = minified
+                variants = {'min': {'path': os.path.basename(min_path), 'size': len(minified)}}
+                for ext, data in compressed_variants(minified).items():
+                    files[f"{min_path}.{ext}"] = data
+                    variants[ext] = {'path': f"{os.path.basename(min_path)}.{ext}", 'size': len(data)}
+                entries[name]['variants'] = variants
+
+        # 1. Усі файли в тимчасові
+        for path, payload in files.items():
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+        # 2. Перейменування — після того, як усі дані вже на диску
+        for path in files:
+            os.replace(f"{path}.tmp", path)
+        for directory in {os.path.dirname(path) for path in files}:
+            _fsync_dir(directory)
+
+        # 3. Маніфест — останнім
+        manifest['artifacts'].update(entries)
+        manifest['version'] = manifest.get('version', 0) + 1
+        manifest['generated_at'] = generated_at or Config.get_kyiv_time().isoformat()
+        manifest['hash'] = self._content_hash(manifest['artifacts'])
+        manifest.update(extra or {})
+        atomic_write(self.manifest_path, dumps(manifest, indent=None).encode('utf-8'))
+
+        logger.debug(f"📦 Опубліковано версію {manifest['version']}: {', '.join(entries)}")
+        return manifest
+
+    @staticmethod
+    def _content_hash(artifacts):
+        """Спільний хеш усіх опублікованих артефактів"""
+        digest = hashlib.sha256()
+        for name in sorted(artifacts):
+            digest.update(f"{name}:{artifacts[name]['sha256']};".encode('utf-8'))
+        return digest.hexdigest()[:16]
@@ -0,0 +1,218 @@
+import asyncio
+import atexit
+import json
+import logging
+import re
+import time
+from config import Config
+from file_lock import data_lock
+from publisher import atomic_write, dumps
+
+logger = logging.getLogger("rate_limiter")
+
+
+class TokenBucket:
+    """Відро токенів: поповнюється рівномірно, може йти в мінус (черга)"""
+
+    def __init__(self, capacity, refill_per_second, tokens=None, updated=None, blocked_until=0.0):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = self.capacity if tokens is None else float(tokens)
+        self.updated = time.time() if updated is None else float(updated)
+        self.blocked_until = float(blocked_until)
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated = now
+
+    def reserve(self, amount, now):
+        """Зарезервувати токени; повертає, скільки секунд чекати"""
+        self._refill(now)
+        self.tokens -= amount
+
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.refill_per_second)
+        return wait
+
+    def sync(self, remaining=None, reset_seconds=None, now=None):
+        """Синхронізація зі станом провайдера (з заголовків відповіді)"""
+        now = time.time() if now is None else now
+        self._refill(now)
+
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0 and reset_seconds:
+                self.block(reset_seconds, now)
+
+    def block(self, seconds, now=None):
+        """Заблокувати відро на вказаний час (наприклад, після 429)"""
+        now = time.time() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = now
+
+    def to_dict(self):
+        return {
+            'tokens': round(self.tokens, 3),
+            'updated': self.updated,
+            'blocked_until': self.blocked_until
+        }
+
+
+class RateLimiter:
+    """
+    Спільний обмежувач запитів до зовнішніх API.
+    Для кожного провайдера — відра запитів і (опційно) токенів за хвилину,
+    які підлаштовуються під заголовки x-ratelimit-* та retry-after.
+    Стан зберігається між запусками, щоб послідовні запуски не перевищували ліміт:
+    відповіді лише позначають його зміненим, а записується він один раз при
+    завершенні процесу (атомарно, під блокуванням каталогу даних, зливаючись
+    із тим, що встигли зберегти паралельні запуски).
+    """
+
+    BUCKET_LIMITS = {
+        'requests': 'requests_per_minute',
+        'tokens': 'tokens_per_minute'
+    }
+
+    def __init__(self, limits=None, state_file=None, clock=time.time):
+        self.limits = limits or Config.RATE_LIMITS
+        self.state_file = state_file or Config.RATE_LIMITS_FILE
+        self.clock = clock
+        self.buckets = {}
+        self.dirty = False
+
+        state = self._load_state()
+
+        for provider, provider_limits in self.limits.items():
+            self.buckets[provider] = {}
+            for bucket_name, limit_key in self.BUCKET_LIMITS.items():
+                per_minute = provider_limits.get(limit_key)
+                if not per_minute:
+                    continue
+
+                saved = state.get(provider, {}).get(bucket_name, {})
+                self.buckets[provider][bucket_name] = TokenBucket(
+                    capacity=per_minute,
+                    refill_per_second=per_minute / 60.0,
+                    tokens=saved.get('tokens'),
+                    updated=saved.get('updated', self.clock()),
+                    blocked_until=saved.get('blocked_until', 0.0)
+                )
+
+    async def acquire(self, provider, requests=1, tokens=0):
+        """Дочекатися дозволу на запит (замість помилки 429)"""
+        buckets = self.buckets.get(provider)
+        if not buckets:
+            return 0.0
+
+        now = self.clock()
+        wait = 0.0
+
+        if 'requests' in buckets:
+            wait = max(wait, buckets['requests'].reserve(requests, now))
+        if tokens and 'tokens' in buckets:
+            wait = max(wait, buckets['tokens'].reserve(tokens, now))
+
+        if wait > 0:
+            logger.info(f"⏳ {provider}: очікування {wait:.1f} с через ліміт запитів")
+            await asyncio.sleep(wait)
+
+        return wait
+
+    def observe(self, provider, status, headers):
+        """Оновити відра за відповіддю провайдера"""
+        buckets = self.buckets.get(provider)
+        if not buckets or headers is None:
+            return
+
+        now = self.clock()
+
+        for bucket_name, bucket in buckets.items():
+            remaining = self._parse_number(headers.get(f'x-ratelimit-remaining-{bucket_name}'))
+            reset = self._parse_duration(headers.get(f'x-ratelimit-reset-{bucket_name}'))
+            bucket.sync(remaining, reset, now)
+
+        if status == 429:
+            retry_after = self._parse_duration(headers.get('retry-after')) or 60.0
+            logger.warning(f"⚠️ {provider}: 429, пауза {retry_after:.1f} с")
+            for bucket in buckets.values():
+                bucket.block(retry_after, now)
+
+        self.dirty = True
+
+    def save(self):
+        """Зберегти стан відер, якщо він змінився (викликається при завершенні процесу)"""
+        if not self.dirty:
+            return
+
+        try:
+            with data_lock():
+                state = self._load_state()
+                for provider, buckets in self.buckets.items():
+                    saved = state.setdefault(provider, {})
+                    for name, bucket in buckets.items():
+                        saved[name] = self._merge(saved.get(name), bucket.to_dict())
+                atomic_write(self.state_file, dumps(state).encode('utf-8'))
+            self.dirty = False
+        except Exception as e:
+            logger.debug(f"Не вдалося зберегти стан лімітів: {e}")
+
+    @staticmethod
+    def _merge(saved, current):
+        """Обережніший з двох станів відра: менше токенів, довше блокування"""
+        if not saved:
+            return current
+        return {
+            'tokens': min(saved.get('tokens', current['tokens']), current['tokens']),
+            'updated': max(saved.get('updated', current['updated']), current['updated']),
+            'blocked_until': max(saved.get('blocked_until', 0.0), current['blocked_until'])
+        }
+
+    def _load_state(self):
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.debug(f"Помилка читання стану лімітів: {e}")
+        return {}
+
+    @staticmethod
+    def _parse_number(value):
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _parse_duration(value):
+        """Тривалість у секундах: '7.66s', '2m59.56s', '1h2m', '120ms' або просто число"""
+        if value is None:
+            return None
+
+        value = str(value).strip()
+        try:
+            return float(value)
+        except ValueError:
+            pass
+
+        units = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+        parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+        if not parts:
+            return None
+        return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+_shared_limiter = None
+
+
+def get_rate_limiter():
+    """Спільний обмежувач для всіх колекторів процесу"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = RateLimiter()
+        atexit.register(_shared_limiter.save)
+    return _shared_limiter
@@ -0,0 +1,136 @@
+import logging
+
+logger = logging.getLogger("recommendation_delta")
+
+# Поля, що змінюються з кожним запуском; передаються окремо в meta і не порівнюються
+META_FIELDS = ('analysis_id', 'last_update', 'last_update_display', 'next_analysis')
+
+
+def merge_diff(old, new, nulls=None, path=()):
+    """
+    Патч у форматі JSON Merge Patch (RFC 7386): лише змінені ключі,
+    вкладені словники — рекурсивно, видалений ключ — None.
+    У RFC 7386 null означає видалення, тому поля, що стали None, до патча
+    не потрапляють: їхні шляхи (списки ключів) дописуються в nulls.
+    """
+    patch = {}
+    for key, value in new.items():
+        if value is None:
+            if key not in old or old[key] is not None:
+                if nulls is not None:
+                    nulls.append(list(path) + [key])
+        elif key not in old:
+            patch[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested = merge_diff(old[key], value, nulls, path + (key,))
+            if nested:
+                patch[key] = nested
+        elif old[key] != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+def merge_apply(target, patch, nulls=()):
+    """Застосувати Merge Patch до копії target, потім встановити None за шляхами nulls"""
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge_apply(result[key], value)
+        else:
+            result[key] = value
+
+    for path in nulls:
+        node = result
+        for key in path[:-1]:
+            child = node.get(key)
+            node[key] = dict(child) if isinstance(child, dict) else {}
+            node = node[key]
+        node[path[-1]] = None
+    return result
+
+
+def compute_delta(base, current):
+    """
+    Дельта поточних рекомендацій відносно базового знімка: нові, видалені
+    і змінені (по полях) рекомендації за активом, патч решти полів і meta.
+    Повертає None, якщо дельту побудувати не можна (повтор активу в списку).
+    """
+    base_recs = _by_asset(base.get('recommendations', []))
+    current_recs = _by_asset(current.get('recommendations', []))
+    if base_recs is None or current_recs is None:
+        return None
+
+    added, changed = [], {}
+    for asset, rec in current_recs.items():
+        if asset not in base_recs:
+            added.append(rec)
+            continue
+        nulls = []
+        patch = merge_diff(base_recs[asset], rec, nulls)
+        if nulls or any(value is None for value in patch.values()):
+            # Видалене або обнулене поле в рекомендації — передаємо її повністю
+            added.append(rec)
+        elif patch:
+            changed[asset] = patch
+
+    nulls = []
+    patch = merge_diff(_without_meta(base), _without_meta(current), nulls)
+
+    return {
+        'base': base.get('analysis_id'),
+        'meta': {k: current.get(k) for k in META_FIELDS},
+        'patch': patch,
+        'nulls': nulls,
+        'recommendations': {
+            'order': list(current_recs),
+            'added': added,
+            'removed': [asset for asset in base_recs if asset not in current_recs],
+            'changed': changed
+        }
+    }
+
+
+def apply_delta(base, delta):
+    """Відновити поточні рекомендації з базового знімка і дельти"""
+    data = merge_apply({k: v for k, v in base.items() if k != 'recommendations'},
+                       delta.get('patch', {}), delta.get('nulls', []))
+    data.update(delta.get('meta', {}))
+
+    recs = _by_asset(base.get('recommendations', [])) or {}
+    section = delta.get('recommendations', {})
+    for asset in section.get('removed', []):
+        recs.pop(asset, None)
+    for asset, patch in section.get('changed', {}).items():
+        recs[asset] = merge_apply(recs.get(asset, {}), patch)
+    for rec in section.get('added', []):
+        recs[rec['asset']] = rec
+
+    data['recommendations'] = [recs[asset] for asset in section.get('order', recs) if asset in recs]
+    return data
+
+
+def is_empty(delta):
+    """Чи немає змін, крім meta"""
+    section = delta.get('recommendations', {})
+    return not (delta.get('patch') or delta.get('nulls') or section.get('added')
+                or section.get('removed') or section.get('changed'))
+
+
+def _without_meta(data):
+    """Поля верхнього рівня, крім meta і списку рекомендацій"""
+    return {k: v for k, v in data.items() if k not in META_FIELDS and k != 'recommendations'}
+
+
+def _by_asset(recommendations):
+    result = {}
+    for rec in recommendations:
+        asset = rec.get('asset')
+        if asset is None or asset in result:
+            return None
+        result[asset] = rec
+    return result
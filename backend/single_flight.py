@@ -0,0 +1,50 @@
+import asyncio
+import logging
+
+logger = logging.getLogger("single_flight")
+
+
+class SingleFlight:
+    """
+    Об'єднання одночасних запитів до одного ресурсу: поки запит за ключем
+    виконується, інші виклики з тим самим ключем чекають на той самий результат.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Виконати fn(*args, **kwargs) або приєднатися до вже запущеного виклику"""
+        future = self._calls.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            logger.debug(f"🔗 Приєднано до запиту в дорозі: {key}")
+
+        # shield: скасування одного очікувача не скасовує спільний запит
+        return await asyncio.shield(future)
+
+    def in_flight(self, key):
+        """Чи виконується зараз запит за ключем"""
+        return key in self._calls
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Позначаємо виняток як отриманий, якщо всі очікувачі вже пішли
+        if not future.cancelled():
+            future.exception()
+
+
+_shared_flight = None
+
+
+def get_single_flight():
+    """Спільна група для всіх колекторів процесу"""
+    global _shared_flight
+    if _shared_flight is None:
+        _shared_flight = SingleFlight()
+    return _shared_flight
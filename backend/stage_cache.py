@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from config import Config
+from publisher import atomic_write, dumps
+
+logger = logging.getLogger("stage_cache")
+
+
+class StageCache:
+    """
+    Версіоновані проміжні результати етапів конвеєра (новини, показники, скоринг,
+    генерація). Кожен результат зберігається в data/stages/<етап>/<версія>.json,
+    де версія — хеш вмісту, разом з версіями вхідних етапів; latest.json вказує
+    на останню версію. Наступні етапи беруть вхід звідси, тож окремий етап можна
+    перезапустити (або виконати на іншій машині) без повторного збору даних.
+    """
+
+    SCHEMA = 1
+    LATEST = 'latest.json'
+
+    def __init__(self, directory=None, keep=None):
+        self.directory = str(directory or Config.STAGES_DIR)
+        self.keep = keep or Config.STAGE_KEEP_VERSIONS
+
+    def write(self, stage, data, inputs=None):
+        """Зберегти результат етапу; повертає метадані нової версії"""
+        payload = dumps(data, indent=None)
+        version = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+        meta = {
+            'schema': self.SCHEMA,
+            'stage': stage,
+            'version': version,
+            'created_at': Config.get_kyiv_time().isoformat(),
+            'inputs': dict(inputs or {}),
+            'input_key': self.input_key(inputs)
+        }
+
+        directory = self._stage_dir(stage)
+        os.makedirs(directory, exist_ok=True)
+        atomic_write(os.path.join(directory, f"{version}.json"),
+                     ('{"data":' + payload + ',"meta":' + dumps(meta, indent=None) + '}').encode('utf-8'))
+        atomic_write(os.path.join(directory, self.LATEST), dumps(meta).encode('utf-8'))
+        self._prune(stage)
+
+        logger.info(f"📦 Етап {stage}: версія {version}")
+        return meta
+
+    def read(self, stage, version=None):
+        """(метадані, дані) вказаної або останньої версії; None, якщо немає"""
+        version = version or (self.latest(stage) or {}).get('version')
+        if not version:
+            return None
+        try:
+            with open(os.path.join(self._stage_dir(stage), f"{version}.json"), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Не вдалося прочитати етап {stage}@{version}: {e}")
+            return None
+        if record.get('meta', {}).get('schema') != self.SCHEMA:
+            logger.warning(f"⚠️ Етап {stage}@{version} має застарілу схему")
+            return None
+        return record['meta'], record['data']
+
+    def latest(self, stage):
+        """Метадані останньої версії етапу або None"""
+        try:
+            with open(os.path.join(self._stage_dir(stage), self.LATEST), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def find(self, stage, inputs):
+        """Остання версія етапу, обчислена з тих самих вхідних версій, або None"""
+        latest = self.latest(stage)
+        if latest and latest.get('input_key') == self.input_key(inputs):
+            return self.read(stage, latest['version'])
+        return None
+
+    def age_minutes(self, stage):
+        """Вік останньої версії у хвилинах (None, якщо етап ще не виконувався)"""
+        latest = self.latest(stage)
+        if not latest:
+            return None
+        created = datetime.fromisoformat(latest['created_at'])
+        return (Config.get_kyiv_time() - created).total_seconds() / 60
+
+    def versions(self, stage):
+        """Збережені версії етапу від найновішої"""
+        directory = self._stage_dir(stage)
+        if not os.path.isdir(directory):
+            return []
+        files = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.endswith('.json') and name != self.LATEST
+        ]
+        files.sort(key=os.path.getmtime, reverse=True)
+        return [os.path.basename(path)[:-len('.json')] for path in files]
+
+    @staticmethod
+    def input_key(inputs):
+        return ','.join(f"{stage}@{version}" for stage, version in sorted((inputs or {}).items()))
+
+    def _stage_dir(self, stage):
+        return os.path.join(self.directory, stage)
+
+    def _prune(self, stage):
+        for version in self.versions(stage)[self.keep:]:
+            try:
+                os.remove(os.path.join(self._stage_dir(stage), f"{version}.json"))
+            except OSError:
+                pass
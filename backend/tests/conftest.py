@@ -0,0 +1,20 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Каталог даних у тимчасовій теці: усі шляхи Config під DATA_DIR переносяться туди"""
+    base = Config.DATA_DIR
+    for name, value in list(vars(Config).items()):
+        if name != 'DATA_DIR' and isinstance(value, Path) and str(value).startswith(str(base)):
+            monkeypatch.setattr(Config, name, tmp_path / value.relative_to(base))
+    monkeypatch.setattr(Config, 'DATA_DIR', tmp_path)
+    return tmp_path
@@ -0,0 +1,69 @@
+import os
+
+import data_handler
+from config import Config
+from data_handler import DataHandler
+
+
+def result(analysis_id, confidence=0.7):
+    return {
+        'analysis_id': analysis_id,
+        'market_overview': {'overall_sentiment': 'NEUTRAL'},
+        'recommendations': [{'asset': 'USD', 'action': 'BUY', 'confidence': confidence, 'reason': 'тест'}]
+    }
+
+
+def test_republishing_same_analysis_does_not_duplicate_history(data_dir):
+    handler = DataHandler()
+
+    assert handler.save_recommendations(result('analysis_1'))
+    assert handler.save_recommendations(result('analysis_1'))
+    assert handler.save_recommendations(result('analysis_2', 0.4))
+
+    assert [e['analysis_id'] for e in handler.history.since(1)] == ['analysis_1', 'analysis_2']
+    assert handler.get_statistics()['total_analyses'] == 2
+    assert handler.load_recommendations()['recommendations'][0]['confidence'] == 0.4
+
+
+def test_reading_statistics_does_not_migrate_or_write(data_dir, monkeypatch):
+    writer = DataHandler()
+    assert writer.save_recommendations(result('analysis_1'))
+    os.remove(Config.HISTORY_STATS_FILE)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("шлях читання не повинен брати блокування")
+
+    monkeypatch.setattr(data_handler, 'data_lock', fail)
+    reader = DataHandler()
+
+    # Агрегати рахуються в пам'яті з історії, файл не створюється
+    assert reader.get_statistics()['total_analyses'] == 1
+    assert not os.path.exists(Config.HISTORY_STATS_FILE)
+
+
+def test_refresh_next_analysis_updates_only_the_manifest(data_dir):
+    handler = DataHandler()
+    assert handler.save_recommendations(result('analysis_1'))
+    before = handler.publisher.load_manifest()
+    handler.publisher.publish({}, extra={'next_analysis': 'застарілий'})
+
+    next_analysis = handler.refresh_next_analysis()
+
+    after = handler.publisher.load_manifest()
+    assert after['next_analysis'] == next_analysis != 'застарілий'
+    assert after['hash'] == before['hash'] and after['artifacts'] == before['artifacts']
+
+
+def test_unchanged_recommendations_do_not_advance_snapshot_counter(data_dir):
+    handler = DataHandler()
+    recommendations = [
+        {'asset': asset, 'action': 'BUY', 'confidence': 0.7, 'reason': 'довге обґрунтування ' * 20}
+        for asset in ('USD', 'EUR', 'GBP', 'PLN')
+    ]
+    for analysis_id in ('analysis_1', 'analysis_2', 'analysis_3'):
+        assert handler.save_recommendations(dict(result(analysis_id), recommendations=recommendations))
+
+    # Дельти без змін не наближають новий повний знімок
+    manifest = handler.publisher.load_manifest()
+    assert manifest['delta_base'] == 'analysis_1'
+    assert manifest['deltas_since_snapshot'] == 0
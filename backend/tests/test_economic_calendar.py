@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+import pytest
+
+from config import Config
+from economic_calendar import CalendarSource, CalendarStore, FileCalendarSource
+
+
+def event(moment, name):
+    return {'datetime': moment.isoformat(), 'country': 'USA', 'event': name, 'importance': 'high'}
+
+
+def test_calendar_source_is_abstract():
+    with pytest.raises(TypeError):
+        CalendarSource()
+
+
+def test_past_events_are_pruned(tmp_path):
+    now = Config.get_kyiv_time()
+    store = CalendarStore(tmp_path / 'calendar.json')
+
+    added = store.ingest([
+        event(now - timedelta(hours=Config.CALENDAR_KEEP_PAST_HOURS + 1), 'old'),
+        event(now - timedelta(hours=1), 'recent'),
+        event(now + timedelta(hours=2), 'upcoming')
+    ])
+
+    assert added == 2
+    assert [e['event'] for e in CalendarStore(tmp_path / 'calendar.json').events] == ['recent', 'upcoming']
+
+
+def test_default_source_ships_with_repo(tmp_path):
+    events = FileCalendarSource().fetch()
+    store = CalendarStore(tmp_path / 'calendar.json')
+    assert events
+    assert all(store._normalize(raw) for raw in events)
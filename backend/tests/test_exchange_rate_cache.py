@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime
+
+import pytz
+import pytest
+
+from config import Config
+from disk_cache import DiskCache
+
+
+KYIV = pytz.timezone('Europe/Kiev')
+HOUR = 3600
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def rates(day):
+    return {
+        'USD': {'rate': 41.0, 'date': day.strftime('%d.%m.%Y'), 'name': 'Долар США'},
+        'UAH': {'rate': 1.0, 'date': day.strftime('%d.%m.%Y'), 'name': 'Українська гривня'}
+    }
+
+
+@pytest.fixture
+def clock():
+    return Clock(KYIV.localize(datetime(2026, 10, 19, 10, 0)).timestamp())
+
+
+@pytest.fixture
+def collector(data_dir, clock):
+    from economic_data import EconomicDataCollector
+    return EconomicDataCollector(cache=DiskCache(data_dir / 'cache', clock=clock))
+
+
+def run(collector, fetch):
+    async def scenario():
+        data = await collector._get_cached('exchange_rates', fetch)
+        await collector.drain()
+        return data
+    return asyncio.run(scenario())
+
+
+def fetcher(value):
+    calls = []
+
+    async def fetch(session):
+        calls.append(session)
+        return value
+    return fetch, calls
+
+
+def test_fresh_rates_are_served_without_fetch(collector, clock):
+    cached = rates(datetime(2026, 10, 19))
+    collector.cache.set('exchange_rates', cached)
+    clock.now += HOUR
+
+    fetch, calls = fetcher(rates(datetime(2026, 10, 19)))
+    assert run(collector, fetch) == cached
+    assert calls == []
+
+
+def test_stale_rates_are_served_and_refreshed_in_background(collector, clock):
+    cached = rates(datetime(2026, 10, 19))
+    collector.cache.set('exchange_rates', cached)
+    clock.now += Config.CACHE_TTL['exchange_rates']['ttl'] + HOUR
+
+    fresh = dict(cached, USD=dict(cached['USD'], rate=41.5))
+    fetch, calls = fetcher(fresh)
+    assert run(collector, fetch) == cached
+    assert len(calls) == 1
+    assert collector.cache.get('exchange_rates') == fresh
+
+
+def test_expired_rates_are_fetched_synchronously(collector, clock):
+    collector.cache.set('exchange_rates', rates(datetime(2026, 10, 19)))
+    clock.now += Config.CACHE_TTL['exchange_rates']['max_stale'] + HOUR
+
+    fresh = rates(datetime(2026, 10, 20))
+    fetch, calls = fetcher(fresh)
+    assert run(collector, fetch) == fresh
+    assert len(calls) == 1
+
+
+def test_rates_older_than_nbu_date_are_fetched_synchronously(collector, clock):
+    # Запис свіжий за TTL, але НБУ вже опублікував курс на новий день
+    collector.cache.set('exchange_rates', rates(datetime(2026, 10, 18)))
+    clock.now += HOUR
+
+    fresh = rates(datetime(2026, 10, 19))
+    fetch, calls = fetcher(fresh)
+    assert run(collector, fetch) == fresh
+    assert len(calls) == 1
+
+
+def test_expired_rates_are_kept_when_fetch_fails(collector, clock):
+    cached = rates(datetime(2026, 10, 19))
+    collector.cache.set('exchange_rates', cached)
+    clock.now += Config.CACHE_TTL['exchange_rates']['max_stale'] + HOUR
+
+    fetch, calls = fetcher({})
+    assert run(collector, fetch) == cached
+    assert len(calls) == 1
+
+
+def test_max_stale_is_at_most_one_day():
+    assert Config.CACHE_TTL['exchange_rates']['max_stale'] <= 24 * HOUR
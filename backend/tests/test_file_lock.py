@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from file_lock import FileLock
+
+
+def test_coroutines_on_one_thread_exclude_each_other(tmp_path):
+    lock = FileLock(tmp_path / '.lock', poll_interval=0.01)
+    events = []
+
+    async def worker(name):
+        await lock.acquire_async()
+        try:
+            # Повторний вхід тією самою задачею не блокується
+            await lock.acquire_async()
+            lock.release()
+            events.append(f'{name}:in')
+            await asyncio.sleep(0.03)
+            events.append(f'{name}:out')
+        finally:
+            lock.release()
+
+    async def scenario():
+        await asyncio.gather(worker('a'), worker('b'))
+
+    asyncio.run(scenario())
+    assert events in (['a:in', 'a:out', 'b:in', 'b:out'], ['b:in', 'b:out', 'a:in', 'a:out'])
+    assert not lock.locked
+
+
+def test_lock_is_reentrant_within_a_thread_and_exclusive_across_threads(tmp_path):
+    lock = FileLock(tmp_path / '.lock', timeout=0.1)
+    with lock:
+        with lock:
+            assert lock.locked
+        result = []
+        thread = threading.Thread(target=lambda: result.append(lock.try_acquire()))
+        thread.start()
+        thread.join()
+        assert result == [False]
+    assert not lock.locked
@@ -0,0 +1,47 @@
+import copy
+from datetime import timedelta
+
+from config import Config
+from history_stats import HistoryStatistics
+
+
+def entry(moment, *recs):
+    return {
+        'timestamp': moment.isoformat(),
+        'recommendations': [{'asset': asset, 'action': action, 'confidence': 0.5} for asset, action in recs]
+    }
+
+
+def test_streak_resets_when_asset_is_absent(tmp_path):
+    stats = HistoryStatistics(tmp_path / 'stats.json')
+    now = Config.get_kyiv_time()
+
+    stats.add(entry(now - timedelta(hours=3), ('USD', 'BUY'), ('EUR', 'HOLD')))
+    stats.add(entry(now - timedelta(hours=2), ('EUR', 'HOLD')))
+    stats.add(entry(now - timedelta(hours=1), ('USD', 'BUY'), ('EUR', 'HOLD')))
+
+    streaks = stats.summary(7)['streaks']
+    assert streaks['USD']['length'] == 1
+    assert streaks['EUR']['length'] == 3
+
+
+def test_streak_length_is_limited_to_window(tmp_path):
+    stats = HistoryStatistics(tmp_path / 'stats.json')
+    now = Config.get_kyiv_time()
+
+    for days_ago in (20, 10, 5, 0):
+        stats.add(entry(now - timedelta(days=days_ago), ('USD', 'BUY')))
+
+    assert stats.summary(7)['streaks']['USD']['length'] == 2
+    assert stats.summary(30)['streaks']['USD']['length'] == 4
+
+
+def test_summary_does_not_change_state(tmp_path):
+    stats = HistoryStatistics(tmp_path / 'stats.json')
+    stats.add(entry(Config.get_kyiv_time(), ('USD', 'BUY')))
+    stats.state['as_of'] = '2000-01-01'
+    before = copy.deepcopy(stats.state)
+
+    stats.summary(30)
+
+    assert stats.state == before
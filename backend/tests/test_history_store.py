@@ -0,0 +1,21 @@
+from history_store import HistoryStore
+
+
+def entry(analysis_id, timestamp):
+    return {'analysis_id': analysis_id, 'timestamp': timestamp, 'recommendations': []}
+
+
+def test_get_reads_only_shards_covering_the_id(tmp_path, monkeypatch):
+    store = HistoryStore(tmp_path, shard_by='day')
+    store.append(entry('analysis_20261001080000', '2026-10-01T08:00:00+03:00'))
+    store.append(entry('analysis_20261002080000', '2026-10-02T08:00:00+03:00'))
+
+    reads = []
+    original = store._read
+    monkeypatch.setattr(store, '_read', lambda shard: reads.append(shard['name']) or original(shard))
+
+    assert store.get('analysis_20261019080000') is None
+    assert reads == []
+
+    assert store.get('analysis_20261002080000')['timestamp'] == '2026-10-02T08:00:00+03:00'
+    assert reads == ['2026-10-02']
@@ -0,0 +1,38 @@
+import asyncio
+import json
+
+import pytest
+
+from groq_analyzer import GroqAnalyzer, ModelLatencyTracker
+
+
+def test_censored_samples_keep_percentile_from_looking_fast(tmp_path):
+    tracker = ModelLatencyTracker(tmp_path / 'latency.json')
+    for _ in range(5):
+        tracker.record('m', 1.0)
+    for _ in range(5):
+        tracker.record('m', 8.0, censored=True)
+
+    # Скасовані запити — нижня межа: перцентиль не менший за неї
+    assert tracker.percentile('m', 90) == 8.0
+
+    tracker.save()
+    saved = json.loads((tmp_path / 'latency.json').read_text(encoding='utf-8'))
+    assert saved['m'][-1] == {'min': 8.0}
+    assert ModelLatencyTracker(tmp_path / 'latency.json').percentile('m', 90) == 8.0
+
+
+def test_timed_out_request_is_recorded_as_censored(tmp_path):
+    analyzer = object.__new__(GroqAnalyzer)
+    analyzer.latency_tracker = ModelLatencyTracker(tmp_path / 'latency.json')
+
+    async def slow_completion(model, messages):
+        await asyncio.sleep(1)
+
+    analyzer._create_completion = slow_completion
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(analyzer._request_model({'model': 'm', 'deadline': 0.05}, []))
+
+    [sample] = analyzer.latency_tracker.samples['m']
+    assert sample['min'] >= 0.05
@@ -0,0 +1,22 @@
+from datetime import date, datetime
+
+import pytz
+
+from market_sessions import MarketSessionEngine, _holidays_us
+
+NEW_YORK = pytz.timezone('America/New_York')
+
+
+def at(*args):
+    return NEW_YORK.localize(datetime(*args)).timestamp()
+
+
+def test_saturday_new_year_is_not_observed_on_friday():
+    # 1 січня 2022 — субота: 31 грудня 2021 NYSE працювала
+    assert date(2021, 12, 31) not in _holidays_us(2022)
+    # Інші свята в суботу, як і раніше, переносяться на п'ятницю (4 липня 2020)
+    assert date(2020, 7, 3) in _holidays_us(2020)
+
+    engine = MarketSessionEngine(horizon_days=60, clock=lambda: at(2021, 12, 20, 12, 0))
+    assert engine.status('us_stocks', at(2021, 12, 31, 12, 0))[0]
+    assert not engine.status('us_stocks', at(2021, 12, 24, 12, 0))[0]  # Різдво в суботу -> п'ятниця
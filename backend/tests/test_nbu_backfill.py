@@ -0,0 +1,63 @@
+import asyncio
+from datetime import date, timedelta
+
+from nbu_history import NbuRateHistory
+from timeseries_store import ColumnarStore
+
+
+TODAY = date(2026, 10, 19)
+
+
+def history(tmp_path, monkeypatch):
+    rates = NbuRateHistory(ColumnarStore(tmp_path / 'nbu_rates'))
+    fetched = []
+
+    async def fetch_day(session, semaphore, day):
+        fetched.append(day)
+        return [{'cc': 'USD', 'rate': 41.0, 'exchangedate': day.strftime('%d.%m.%Y')}]
+
+    monkeypatch.setattr(rates, '_fetch_day', fetch_day)
+    return rates, fetched
+
+
+def test_backfill_is_capped_and_resumes_from_missing_days(tmp_path, monkeypatch):
+    rates, fetched = history(tmp_path, monkeypatch)
+    start = TODAY - timedelta(days=9)
+    # Сьогоднішній знімок уже є — пропуск перед ним не має загубитися
+    rates.append_snapshot([{'cc': 'USD', 'rate': 41.0, 'exchangedate': TODAY.strftime('%d.%m.%Y')}])
+
+    assert asyncio.run(rates.backfill(start=start, end=TODAY, max_days=4)) == 4
+    assert fetched == [TODAY - timedelta(days=d) for d in (4, 3, 2, 1)]
+
+    fetched.clear()
+    assert asyncio.run(rates.backfill(start=start, end=TODAY, max_days=4)) == 4
+    assert fetched == [TODAY - timedelta(days=d) for d in (8, 7, 6, 5)]
+
+    fetched.clear()
+    assert asyncio.run(rates.backfill(start=start, end=TODAY, max_days=4)) == 1
+    assert fetched == [start]
+    assert len(rates.store.load()[0]) == 10
+
+
+def test_drain_waits_for_tasks_started_by_background_refresh(data_dir):
+    from economic_data import EconomicDataCollector
+    collector = EconomicDataCollector()
+    done = []
+
+    async def backfill():
+        await asyncio.sleep(0.01)
+        done.append('backfill')
+
+    async def refresh():
+        await asyncio.sleep(0.01)
+        # Оновлення курсів запускає дозавантаження вже після того, як drain() зібрав задачі
+        collector._refresh_tasks['nbu_history'] = asyncio.create_task(backfill())
+        done.append('refresh')
+
+    async def scenario():
+        collector._refresh_tasks['exchange_rates'] = asyncio.create_task(refresh())
+        await collector.drain()
+
+    asyncio.run(scenario())
+    assert done == ['refresh', 'backfill']
+    assert collector._refresh_tasks == {}
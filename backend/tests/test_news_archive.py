@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+
+from news_archive import NewsArchive
+
+
+def news(i):
+    return {'id': f'n{i}', 'title': f'Новина {i} про НБУ', 'sentiment': 'negative', 'published_timestamp': 1000.0 + i}
+
+
+def test_duplicates_are_found_in_sorted_id_array(tmp_path):
+    archive = NewsArchive(tmp_path)
+    assert archive.add([news(3), news(1), news(1)]) == 2
+    assert archive.add([news(1), news(2), news(3)]) == 1
+    assert len(archive) == 3
+
+    ids = np.load(os.path.join(tmp_path, 'ids.npy'))
+    assert list(ids) == sorted(ids) and len(ids) == 3
+
+
+def test_missing_id_array_is_rebuilt_from_docs(tmp_path):
+    archive = NewsArchive(tmp_path)
+    archive.add([news(1), news(2)])
+    os.remove(os.path.join(tmp_path, 'ids.npy'))
+
+    # Статті з docs.idx доливаються в ids.npy, дублікати і далі пропускаються
+    assert archive.add([news(2), news(4)]) == 1
+    assert len(np.load(os.path.join(tmp_path, 'ids.npy'))) == 3
+    assert [item['id'] for item in archive.search('нбу')] == ['n4', 'n2', 'n1']
@@ -0,0 +1,36 @@
+import json
+import threading
+
+from publisher import ArtifactPublisher, atomic_write, dumps
+
+
+DATA = {'b': [1, 2.5, {}], 'a': 'http://x/y', 'f': 1e-07, 'h': 'гривня'}
+
+
+def test_dumps_matches_standard_json():
+    assert dumps(DATA) == json.dumps(DATA, ensure_ascii=False, indent=2, sort_keys=True)
+    assert dumps(DATA, indent=None) == json.dumps(DATA, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def test_same_content_gives_same_hash(tmp_path):
+    publisher = ArtifactPublisher(tmp_path / 'manifest.json')
+    first = publisher.publish({'data': (tmp_path / 'data.json', DATA)}, compact=('data',))
+    second = publisher.publish({'data': (tmp_path / 'data.json', dict(reversed(list(DATA.items()))))},
+                               compact=('data',))
+    assert first['hash'] == second['hash']
+    assert second['version'] == first['version'] + 1
+
+
+def test_concurrent_atomic_writes_use_distinct_temp_files(tmp_path):
+    path = tmp_path / 'entry.json'
+    payloads = [f'{{"writer": {i}}}'.encode('utf-8') * 2000 for i in range(8)]
+
+    threads = [threading.Thread(target=atomic_write, args=(path, p)) for p in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Файл цілий — рівно одна з записаних версій; тимчасових не лишилося
+    assert path.read_bytes() in payloads
+    assert [p.name for p in tmp_path.iterdir()] == ['entry.json']
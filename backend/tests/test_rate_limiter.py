@@ -0,0 +1,24 @@
+import json
+
+from rate_limiter import RateLimiter
+
+LIMITS = {'nbu': {'requests_per_minute': 60}}
+
+
+def test_observe_defers_save_and_merges_concurrent_state(data_dir):
+    state_file = data_dir / 'rate_limits.json'
+    first = RateLimiter(LIMITS, state_file, clock=lambda: 1000.0)
+    second = RateLimiter(LIMITS, state_file, clock=lambda: 1000.0)
+
+    first.observe('nbu', 429, {'retry-after': '30'})
+    second.observe('nbu', 200, {})
+    # Відповідь лише позначає стан зміненим: файл пишеться при завершенні
+    assert not state_file.exists()
+
+    first.save()
+    second.save()
+
+    saved = json.loads(state_file.read_text(encoding='utf-8'))['nbu']['requests']
+    # Блокування першого запуску не затерте пізнішим збереженням другого
+    assert saved['blocked_until'] >= 1030.0
+    assert not first.dirty and not second.dirty
@@ -0,0 +1,39 @@
+from recommendation_delta import apply_delta, compute_delta, is_empty
+
+
+def snapshot(analysis_id, **fields):
+    data = {
+        'analysis_id': analysis_id,
+        'last_update': None,
+        'last_update_display': None,
+        'next_analysis': None,
+        'news_fingerprint': 'abc',
+        'market_overview': {'sentiment': 'neutral', 'risk': 'low'},
+        'recommendations': [{'asset': 'USD', 'action': 'BUY', 'confidence': 0.7}]
+    }
+    data.update(fields)
+    return data
+
+
+def test_delta_roundtrip_keeps_fields_set_to_none():
+    base = snapshot('a')
+    current = snapshot('b', news_fingerprint=None, market_overview={'sentiment': None, 'risk': 'high'})
+
+    delta = compute_delta(base, current)
+
+    assert None not in delta['patch'].values()
+    assert apply_delta(base, delta) == current
+
+
+def test_delta_roundtrip_removes_deleted_fields():
+    base = snapshot('a')
+    current = snapshot('b')
+    del current['news_fingerprint']
+    current['recommendations'] = [{'asset': 'USD', 'action': 'HOLD', 'confidence': None}]
+
+    assert apply_delta(base, compute_delta(base, current)) == current
+
+
+def test_unchanged_snapshot_gives_empty_delta():
+    base = snapshot('a', news_fingerprint=None)
+    assert is_empty(compute_delta(base, snapshot('b', news_fingerprint=None)))
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+
+from timeseries_store import ColumnarStore
+
+
+def test_newer_rows_are_appended_without_rewriting_the_base(tmp_path):
+    store = ColumnarStore(tmp_path)
+    store.upsert([1, 2], ['USD'], [[40.0], [41.0]])
+    base = os.path.join(tmp_path, 'v000001', 'values.npy')
+    written = os.stat(base).st_mtime_ns
+
+    store.upsert([3], ['USD'], [[42.0]])
+    store.upsert([4], ['USD'], [[43.0]])
+
+    assert sorted(os.listdir(tmp_path)) == ['current.json', 'v000001']
+    assert os.stat(base).st_mtime_ns == written
+    keys, columns, values = store.load()
+    assert keys.tolist() == [1, 2, 3, 4]
+    assert values[:, 0].tolist() == [40.0, 41.0, 42.0, 43.0]
+    assert store.last_key() == 4
+    assert store.select(['USD'], 2, 3)[2][:, 0].tolist() == [41.0, 42.0]
+
+
+def test_inserts_and_new_columns_create_a_merged_version(tmp_path):
+    store = ColumnarStore(tmp_path)
+    store.upsert([1, 3], ['USD'], [[40.0], [42.0]])
+    store.upsert([4], ['USD'], [[43.0]])
+
+    store.upsert([2], ['USD', 'EUR'], [[41.0, 45.0]])
+
+    keys, columns, values = store.load(mmap=False)
+    assert keys.tolist() == [1, 2, 3, 4]
+    assert columns == ['USD', 'EUR']
+    assert values[1].tolist() == [41.0, 45.0]
+    assert np.isnan(values[3, 1])
+    assert store.select(['EUR', 'GBP'])[2].shape == (4, 2)
+
+
+def test_torn_tail_write_is_invisible_and_overwritten(tmp_path):
+    store = ColumnarStore(tmp_path)
+    store.upsert([1], ['USD'], [[40.0]])
+    store.upsert([2], ['USD'], [[41.0]])
+
+    # Обірване дописування: байти в хвості є, current.json не оновлено
+    with open(os.path.join(tmp_path, 'v000001', 'tail.keys.bin'), 'ab') as f:
+        f.write(np.array([99], dtype=np.int64).tobytes())
+    assert store.load()[0].tolist() == [1, 2]
+
+    store.upsert([3], ['USD'], [[42.0]])
+    assert store.load()[0].tolist() == [1, 2, 3]
+
+
+def test_repeated_snapshot_of_existing_rows_writes_nothing(tmp_path):
+    store = ColumnarStore(tmp_path)
+    store.upsert([1, 2], ['USD', 'EUR'], [[40.0, 44.0], [41.0, 45.0]])
+    pointer = os.stat(os.path.join(tmp_path, 'current.json')).st_mtime_ns
+
+    assert store.upsert([2], ['USD'], [[41.0]]) == 0
+    assert store.upsert([2], ['EUR', 'USD'], [[np.nan, 41.0]]) == 0
+    assert os.stat(os.path.join(tmp_path, 'current.json')).st_mtime_ns == pointer
+
+    assert store.upsert([2], ['USD'], [[41.5]]) == 1
+    assert store.load()[2][1].tolist() == [41.5, 45.0]
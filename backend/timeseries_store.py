@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+import shutil
+import numpy as np
+from publisher import atomic_write
+
+logger = logging.getLogger("timeseries_store")
+
+
+class ColumnarStore:
+    """
+    Колонкове сховище часових рядів: відсортовані ключі (int64) × колонки (float64).
+    Основна частина лежить у .npy і читається через memory-map, тож вибірка
+    діапазону — це зріз без копіювання. Відсутні значення — NaN.
+
+    Дані версіоновані: каталог vNNNNNN містить основу (keys.npy, values.npy)
+    і хвіст (tail.keys.bin, tail.values.bin) — сирі рядки, дописані після неї.
+    current.json (версія, колонки, кількість рядків основи і хвоста) атомарно
+    оновлюється останнім, тож читач бачить лише повністю записані рядки.
+    Рядки з новішими ключами дописуються в хвіст без переписування основи;
+    вставка в середину, нові колонки або задовгий хвіст створюють нову версію
+    (основа + хвіст злиті). Попередня версія лишається для читачів, що вже
+    відкрили її; старіші видаляються.
+    """
+
+    POINTER = 'current.json'
+    KEEP_VERSIONS = 2
+    TAIL_MAX_ROWS = 256
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self.pointer_path = os.path.join(self.directory, self.POINTER)
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self, mmap=True):
+        """Ключі, назви колонок і матриця значень (з хвостом — копія)"""
+        parts = self._parts(mmap)
+        if parts is None:
+            return np.empty(0, dtype=np.int64), [], np.empty((0, 0))
+        columns, (base_keys, base_values), (tail_keys, tail_values) = parts
+        if not len(tail_keys):
+            return base_keys, columns, base_values
+        return np.concatenate([base_keys, tail_keys]), columns, np.vstack([base_values, tail_values])
+
+    def select(self, columns=None, start=None, end=None):
+        """Рядки з ключами в [start, end] для вибраних колонок"""
+        parts = self._parts()
+        if parts is None:
+            width = len(columns) if columns is not None else 0
+            return np.empty(0, dtype=np.int64), list(columns or []), np.empty((0, width))
+        all_columns, *segments = parts
+
+        # Зріз кожної частини окремо: копіюються лише вибрані рядки
+        keys, values = [], []
+        for segment_keys, segment_values in segments:
+            lo = 0 if start is None else int(np.searchsorted(segment_keys, start, side='left'))
+            hi = len(segment_keys) if end is None else int(np.searchsorted(segment_keys, end, side='right'))
+            if hi > lo:
+                keys.append(segment_keys[lo:hi])
+                values.append(segment_values[lo:hi])
+        if len(keys) == 1:
+            keys, values = keys[0], values[0]
+        elif keys:
+            keys, values = np.concatenate(keys), np.vstack(values)
+        else:
+            keys, values = np.empty(0, dtype=np.int64), np.empty((0, len(all_columns)))
+
+        if columns is None:
+            return keys, all_columns, values
+
+        index = {name: i for i, name in enumerate(all_columns)}
+        result = np.full((len(keys), len(columns)), np.nan)
+        for j, name in enumerate(columns):
+            if name in index:
+                result[:, j] = values[:, index[name]]
+        return keys, list(columns), result
+
+    def last_key(self):
+        """Останній ключ або None (з current.json, без читання даних)"""
+        state = self._state()
+        return state.get('last_key') if state else None
+
+    def upsert(self, keys, columns, values):
+        """Додати/замінити рядки; нові колонки додаються автоматично"""
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(keys), len(columns))
+        if not len(keys):
+            return 0
+
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+
+        state = self._state()
+        if state and self._unchanged(state, keys, columns, values):
+            return 0
+        if state and self._can_append(state, keys, columns):
+            self._append(state, keys, columns, values)
+        else:
+            self._merge(keys, columns, values)
+        return len(keys)
+
+    def _unchanged(self, state, keys, columns, values):
+        """Усі рядки вже є з тими самими значеннями (повторний знімок того самого дня)"""
+        if state.get('last_key') is None or keys[-1] > state['last_key'] or not set(columns) <= set(state['columns']):
+            return False
+        existing_keys, _, existing = self.select(columns, int(keys[0]), int(keys[-1]))
+        if not np.array_equal(existing_keys, keys):
+            return False
+        merged = np.where(np.isnan(values), existing, values)
+        return bool(np.array_equal(merged, existing, equal_nan=True))
+
+    def _can_append(self, state, keys, columns):
+        """Нові ключі строго після останнього, колонки вже відомі, хвіст не задовгий"""
+        return (
+            state.get('last_key') is not None
+            and keys[0] > state['last_key']
+            and bool(np.all(np.diff(keys) > 0))
+            and set(columns) <= set(state['columns'])
+            and state['tail_rows'] + len(keys) <= self.TAIL_MAX_ROWS
+        )
+
+    def _append(self, state, keys, columns, values):
+        """Дописати рядки в хвіст поточної версії; current.json — останнім"""
+        index = {name: i for i, name in enumerate(state['columns'])}
+        rows = np.full((len(keys), len(state['columns'])), np.nan)
+        rows[:, [index[c] for c in columns]] = values
+
+        directory = self._version_dir(state['version'])
+        tail_rows = state['tail_rows']
+        # Запис з позиції, відомої current.json: обірване раніше дописування перезаписується
+        for name, array in (('tail.keys.bin', keys), ('tail.values.bin', rows)):
+            offset = tail_rows * array.itemsize * (array.shape[1] if array.ndim == 2 else 1)
+            fd = os.open(os.path.join(directory, name), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.lseek(fd, offset, os.SEEK_SET)
+                os.write(fd, np.ascontiguousarray(array).tobytes())
+                os.ftruncate(fd, offset + array.nbytes)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        self._save_state(dict(state, tail_rows=tail_rows + len(keys), last_key=int(keys[-1])))
+
+    def _merge(self, keys, columns, values):
+        """Злити основу, хвіст і нові рядки в нову версію"""
+        old_keys, old_columns, old_values = self.load(mmap=False)
+
+        merged_columns = list(old_columns) + [c for c in columns if c not in old_columns]
+        column_index = {name: i for i, name in enumerate(merged_columns)}
+        merged_keys = np.union1d(old_keys, keys)
+
+        merged = np.full((len(merged_keys), len(merged_columns)), np.nan)
+        if len(old_keys):
+            rows = np.searchsorted(merged_keys, old_keys)
+            merged[np.ix_(rows, np.arange(len(old_columns)))] = old_values
+
+        # Нові значення перекривають старі, але NaN не затирає наявні дані
+        rows = np.searchsorted(merged_keys, keys)
+        cols = np.array([column_index[c] for c in columns])
+        block = merged[np.ix_(rows, cols)]
+        merged[np.ix_(rows, cols)] = np.where(np.isnan(values), block, values)
+
+        self._write(merged_keys, merged_columns, merged)
+
+    def _write(self, keys, columns, values):
+        # Нова версія в окремому каталозі, вказівник — останнім
+        state = self._state()
+        version = (state['version'] if state else 0) + 1
+        directory = self._version_dir(version)
+        os.makedirs(directory, exist_ok=True)
+
+        for name, array in (('keys.npy', keys), ('values.npy', values)):
+            with open(os.path.join(directory, name), 'wb') as f:
+                np.save(f, array)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._save_state({
+            'version': version,
+            'columns': list(columns),
+            'base_rows': len(keys),
+            'tail_rows': 0,
+            'last_key': int(keys[-1]) if len(keys) else None
+        })
+        self._prune(version)
+
+    def _parts(self, mmap=True):
+        """(колонки, (ключі, значення) основи, (ключі, значення) хвоста) або None"""
+        mode = 'r' if mmap else None
+        # Повтор: версію могли видалити між читанням вказівника і відкриттям файлів
+        for attempt in range(3):
+            state = self._state()
+            if state is None:
+                return None
+            try:
+                return state['columns'], self._load_base(state, mode), self._load_tail(state, mode)
+            except FileNotFoundError:
+                if attempt == 2:
+                    raise
+
+    def _load_base(self, state, mode):
+        directory = self._version_dir(state['version'])
+        keys = np.load(os.path.join(directory, 'keys.npy'), mmap_mode=mode)
+        values = np.load(os.path.join(directory, 'values.npy'), mmap_mode=mode)
+        return keys, values
+
+    def _load_tail(self, state, mode):
+        """Лише tail_rows рядків з current.json: недописані байти читач не бачить"""
+        rows, width = state['tail_rows'], len(state['columns'])
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, width))
+
+        directory = self._version_dir(state['version'])
+        keys_path = os.path.join(directory, 'tail.keys.bin')
+        values_path = os.path.join(directory, 'tail.values.bin')
+        if mode:
+            keys = np.memmap(keys_path, dtype=np.int64, mode='r', shape=(rows,))
+            values = np.memmap(values_path, dtype=np.float64, mode='r', shape=(rows, width))
+            return keys, values
+        keys = np.fromfile(keys_path, dtype=np.int64, count=rows)
+        values = np.fromfile(values_path, dtype=np.float64, count=rows * width).reshape(rows, width)
+        return keys, values
+
+    def _state(self):
+        try:
+            with open(self.pointer_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"⚠️ Вказівник версії {self.pointer_path} пошкоджено: {e}")
+            return None
+
+    def _save_state(self, state):
+        atomic_write(self.pointer_path, json.dumps(state).encode('utf-8'))
+
+    def _version_dir(self, version):
+        return os.path.join(self.directory, f"v{version:06d}")
+
+    def _prune(self, version):
+        """Видалити версії, старіші за KEEP_VERSIONS останніх"""
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('v') and name[1:].isdigit() and os.path.isdir(path):
+                if int(name[1:]) <= version - self.KEEP_VERSIONS:
+                    shutil.rmtree(path, ignore_errors=True)
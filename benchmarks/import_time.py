@@ -0,0 +1,118 @@
+"""
+Профіль часу імпорту модулів бекенду на основі `python -X importtime`.
+
+Кожен модуль імпортується в окремому процесі (кілька повторів, береться мінімум):
+звіт містить сумарний час імпорту, найважчі вкладені імпорти та перелік важких
+залежностей (aiohttp, feedparser, groq, numpy, dotenv), що потрапили в процес.
+Легкі модулі не мають тягнути важкі залежності — інакше код виходу 1.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --modules config data_handler --top 5 --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+MODULES = ('config', 'data_handler', 'currency_advisor', 'cli', 'history_store', 'publisher',
+           'news_analyzer', 'economic_data', 'groq_analyzer', 'local_scorer')
+
+# Модулі, що імпортуються в легких командах (статистика, перевірка конфігурації)
+LIGHT_MODULES = ('config', 'data_handler', 'currency_advisor', 'cli')
+
+HEAVY = ('aiohttp', 'feedparser', 'groq', 'numpy', 'dotenv')
+
+# Команди, для яких міряється повний час запуску процесу (без запису в каталог даних)
+COMMANDS = (
+    ('currency_advisor --check-config', ['currency_advisor.py', '--check-config']),
+    ('cli --help', ['cli.py', '--help']),
+)
+
+
+def profile_import(module):
+    """Один запуск -X importtime: {назва: (власний, сумарний)} у мікросекундах"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module}: {result.stderr.strip().splitlines()[-1]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_module(module, repeat=3, top=5):
+    runs = [profile_import(module) for _ in range(repeat)]
+    best = min(runs, key=lambda t: t.get(module, (0, 0))[1])
+    heaviest = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'module': module,
+        'total_ms': round(best.get(module, (0, 0))[1] / 1000, 1),
+        'heavy': sorted(name for name in best if name in HEAVY),
+        'top_self_ms': [(name, round(self_us / 1000, 1)) for name, (self_us, _) in heaviest]
+    }
+
+
+def measure_command(args, repeat=3):
+    """Мінімальний час запуску команди від старту інтерпретатора до виходу, мс"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=BACKEND_DIR, capture_output=True)
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Профіль часу імпорту модулів бекенду")
+    parser.add_argument('--modules', nargs='+', default=list(MODULES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5, help="Скільки найважчих імпортів показати")
+    parser.add_argument('--no-commands', action='store_true', help="Не міряти запуск команд")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    baseline = measure_command(['-c', 'pass'], args.repeat)
+    report = {'interpreter_ms': baseline, 'modules': [], 'commands': {}, 'violations': []}
+
+    for module in args.modules:
+        stats = measure_module(module, args.repeat, args.top)
+        report['modules'].append(stats)
+        if module in LIGHT_MODULES and set(stats['heavy']) - {'dotenv'}:
+            report['violations'].append(f"{module} імпортує {', '.join(stats['heavy'])}")
+
+    if not args.no_commands:
+        for label, command in COMMANDS:
+            report['commands'][label] = measure_command(command, args.repeat)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"Інтерпретатор без імпортів: {baseline} мс\n")
+        print(f"{'модуль':<20}{'імпорт, мс':>12}  важкі залежності")
+        for stats in report['modules']:
+            print(f"{stats['module']:<20}{stats['total_ms']:>12}  {', '.join(stats['heavy']) or '—'}")
+            for name, self_ms in stats['top_self_ms']:
+                print(f"{'':<22}{self_ms:>8} мс  {name}")
+        if report['commands']:
+            print()
+            for label, elapsed in report['commands'].items():
+                print(f"{label:<36}{elapsed:>8} мс")
+        for violation in report['violations']:
+            print(f"❌ {violation}")
+
+    return 1 if report['violations'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,11 @@ class RecommendationsDisplay {
             this.recommendationsUrl = `/${repoName}/data/recommendations.json`;
         }
         
+        // Маленький маніфест: опитується часто, дані завантажуються лише при зміні хешу
+        this.manifestUrl = this.recommendationsUrl.replace('recommendations.json', 'manifest.json');
+        this.lastHash = null;
+        this.baseSnapshot = null;  // Повний знімок, до якого застосовуються дельти
+        
         this.kyivTZ = 'Europe/Kiev';
         this.language = localStorage.getItem('language') || 'uk';
         this.updateInterval = null;
@@ -161,7 +166,7 @@ class RecommendationsDisplay {
         // Перше завантаження через 2 секунди
         setTimeout(() => {
             console.log("📥 Перше завантаження рекомендацій...");
-            this.loadRecommendations();
+            this.checkForUpdates();
             this.startAutoUpdate();
         }, 2000);
     }
@@ -183,32 +188,160 @@ class RecommendationsDisplay {
     }
 
     startAutoUpdate() {
-        // Автоматичне оновлення кожні 5 хвилин
+        // Автоматична перевірка маніфесту кожні 5 хвилин
         this.updateInterval = setInterval(() => {
             console.log("🔄 Автоматична перевірка оновлень...");
-            this.loadRecommendations();
+            this.checkForUpdates();
         }, 5 * 60 * 1000); // 5 хвилин
         
         console.log("✅ Автооновлення активоване: кожні 5 хвилин");
     }
 
-    async loadRecommendations(force = false) {
+    async checkForUpdates() {
+        let manifest = null;
         try {
-            // Показуємо індикатор завантаження
-            this.showLoadingState();
-            
-            const timestamp = force ? Date.now() : new Date().setMinutes(0, 0, 0);
-            const url = `${this.recommendationsUrl}?t=${timestamp}`;
+            const response = await fetch(`${this.manifestUrl}?t=${Date.now()}`, { cache: 'no-store' });
+            if (response.ok) {
+                manifest = await response.json();
+            }
+        } catch (error) {
+            console.warn('⚠️ Маніфест недоступний, завантажуємо повні дані:', error);
+        }
+        
+        if (manifest?.hash && manifest.hash === this.lastHash) {
+            console.log("✅ Дані не змінилися (версія", manifest.version + ")");
+            return;
+        }
+        
+        await this.loadRecommendations(false, manifest);
+    }
+
+    async fetchRecommendationsData(force, manifest) {
+        const snapshot = await this.fetchSnapshot(force, manifest);
+        return await this.withDelta(snapshot, manifest);
+    }
+
+    async fetchSnapshot(force, manifest) {
+        const artifact = manifest?.artifacts?.recommendations;
+        const variants = artifact?.variants;
+        
+        // Знімок не змінився — дані вже є
+        if (artifact && this.baseSnapshot?.sha256 === artifact.sha256) {
+            return this.baseSnapshot.data;
+        }
+        
+        const remember = (data) => {
+            this.baseSnapshot = artifact ? { sha256: artifact.sha256, data } : null;
+            return data;
+        };
+        
+        if (variants?.min) {
+            const base = this.recommendationsUrl.replace(/[^/]*$/, '');
             
-            console.log("📥 Запит до:", url);
+            // gzip-варіант розпаковується в браузері, якщо є DecompressionStream
+            if (variants.gz && 'DecompressionStream' in window) {
+                try {
+                    const response = await fetch(`${base}${variants.gz.path}?v=${manifest.hash}`);
+                    if (response.ok) {
+                        const stream = response.body.pipeThrough(new DecompressionStream('gzip'));
+                        return remember(await new Response(stream).json());
+                    }
+                } catch (error) {
+                    console.warn('⚠️ Не вдалося розпакувати gzip-варіант:', error);
+                }
+            }
             
+            const response = await fetch(`${base}${variants.min.path}?v=${manifest.hash}`);
+            if (response.ok) {
+                return remember(await response.json());
+            }
+        }
+        
+        const timestamp = force ? Date.now() : new Date().setMinutes(0, 0, 0);
+        const url = `${this.recommendationsUrl}?t=${timestamp}`;
+        
+        console.log("📥 Запит до:", url);
+        
+        const response = await fetch(url);
+        
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        
+        return remember(await response.json());
+    }
+
+    async withDelta(snapshot, manifest) {
+        // Між повними знімками публікується лише delta.json зі змінами
+        const base = this.recommendationsUrl.replace(/[^/]*$/, '');
+        const artifact = manifest?.artifacts?.delta;
+        const url = artifact ? `${base}${artifact.path}?v=${manifest.hash}` : `${base}delta.json?t=${Date.now()}`;
+        
+        try {
             const response = await fetch(url);
-            
             if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                return snapshot;
+            }
+            const delta = await response.json();
+            return delta.base && delta.base === snapshot.analysis_id ? this.applyDelta(snapshot, delta) : snapshot;
+        } catch (error) {
+            console.warn('⚠️ Дельту не застосовано:', error);
+            return snapshot;
+        }
+    }
+
+    applyDelta(snapshot, delta) {
+        const { recommendations: baseRecs = [], ...rest } = snapshot;
+        const data = { ...this.setNulls(this.mergePatch(rest, delta.patch || {}), delta.nulls || []), ...(delta.meta || {}) };
+        
+        const recs = new Map(baseRecs.map(rec => [rec.asset, rec]));
+        const section = delta.recommendations || {};
+        (section.removed || []).forEach(asset => recs.delete(asset));
+        Object.entries(section.changed || {}).forEach(([asset, patch]) => {
+            recs.set(asset, this.mergePatch(recs.get(asset) || {}, patch));
+        });
+        (section.added || []).forEach(rec => recs.set(rec.asset, rec));
+        
+        const order = section.order || [...recs.keys()];
+        data.recommendations = order.filter(asset => recs.has(asset)).map(asset => recs.get(asset));
+        return data;
+    }
+
+    setNulls(target, paths) {
+        // Поля, що стали null, передаються окремо: у Merge Patch null означає видалення
+        paths.forEach(path => {
+            let node = target;
+            path.slice(0, -1).forEach(key => {
+                node[key] = (typeof node[key] === 'object' && node[key] !== null) ? { ...node[key] } : {};
+                node = node[key];
+            });
+            node[path[path.length - 1]] = null;
+        });
+        return target;
+    }
+
+    mergePatch(target, patch) {
+        // JSON Merge Patch (RFC 7386): null — видалити ключ, об'єкти — рекурсивно
+        const result = { ...target };
+        Object.entries(patch).forEach(([key, value]) => {
+            if (value === null) {
+                delete result[key];
+            } else if (typeof value === 'object' && !Array.isArray(value) &&
+                       typeof result[key] === 'object' && result[key] !== null && !Array.isArray(result[key])) {
+                result[key] = this.mergePatch(result[key], value);
+            } else {
+                result[key] = value;
             }
+        });
+        return result;
+    }
+
+    async loadRecommendations(force = false, manifest = null) {
+        try {
+            // Показуємо індикатор завантаження
+            this.showLoadingState();
             
-            const data = await response.json();
+            const data = await this.fetchRecommendationsData(force, manifest);
             
             console.log("✅ Дані завантажені успішно!");
             console.log("📊 Статистика:", {
@@ -218,6 +351,7 @@ class RecommendationsDisplay {
             });
             
             this.processData(data);
+            this.lastHash = manifest?.hash || null;
             
             // Оновлюємо час наступного оновлення
             this.updateNextUpdateTimer(data.next_analysis);
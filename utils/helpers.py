@@ -1,68 +1,365 @@
-
 import json
+import math
 from datetime import datetime, timedelta
+import numpy as np
 import pytz
 
+
+class CandleSeries:
+    """
+    Свічки в стовпцях NumPy (timestamp, open, high, low, close) з фіксованою
+    ємністю. Кожен рядок пишеться двічі — у позицію pos і pos + capacity, тож
+    останні count свічок завжди лежать в пам'яті суцільно: стовпці і зрізи —
+    це представлення (view) без копіювання, а append не зсуває дані.
+    timestamp — секунди Unix; tz — часовий пояс вихідних свічок (None для
+    наївних datetime і чисел), за яким час відновлюється для відображення.
+    """
+
+    FIELDS = ('timestamp', 'open', 'high', 'low', 'close')
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._data = np.full((len(self.FIELDS), 2 * capacity), np.nan)
+        self.count = 0
+        self.pos = 0
+        self.tz = None
+        self._readonly = False
+
+    @classmethod
+    def from_candles(cls, candles, capacity=None):
+        """З об'єктів свічок (атрибути timestamp/open/high/low/close) або словників"""
+        rows = []
+        tz = None
+        for candle in candles:
+            get = candle.get if isinstance(candle, dict) else lambda name, c=candle: getattr(c, name)
+            timestamp = get('timestamp')
+            if isinstance(timestamp, datetime):
+                tz = timestamp.tzinfo
+                timestamp = timestamp.timestamp()
+            rows.append((timestamp, get('open'), get('high'), get('low'), get('close')))
+
+        series = cls(capacity or max(len(rows), 1))
+        series.tz = tz
+        if rows:
+            series.extend(np.array(rows, dtype=np.float64).T)
+        return series
+
+    @classmethod
+    def from_arrays(cls, timestamp, open, high, low, close, capacity=None, tz=None):
+        columns = np.vstack([np.asarray(c, dtype=np.float64) for c in (timestamp, open, high, low, close)])
+        series = cls(capacity or max(columns.shape[1], 1))
+        series.tz = tz
+        series.extend(columns)
+        return series
+
+    def append(self, timestamp, open, high, low, close):
+        """Додати свічку; найстаріша витісняється, коли буфер заповнено"""
+        if self._readonly:
+            raise ValueError("Зріз CandleSeries доступний лише для читання")
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        row = (timestamp, open, high, low, close)
+        self._data[:, self.pos] = row
+        self._data[:, self.pos + self.capacity] = row
+        self.pos = (self.pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, columns):
+        """Додати багато свічок одним записом: масив форми (5, n)"""
+        if self._readonly:
+            raise ValueError("Зріз CandleSeries доступний лише для читання")
+        columns = np.asarray(columns, dtype=np.float64)[:, -self.capacity:]
+        n = columns.shape[1]
+        if not n:
+            return
+
+        # Позиції в кільці для кожної нової свічки, обидві копії одразу
+        slots = (self.pos + np.arange(n)) % self.capacity
+        self._data[:, slots] = columns
+        self._data[:, slots + self.capacity] = columns
+        self.pos = (self.pos + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    @property
+    def values(self):
+        """Усі свічки (5, count) від найстарішої до найновішої, без копіювання"""
+        if self._readonly:
+            return self._data
+        start = (self.pos - self.count) % self.capacity
+        if self.count == self.capacity:
+            start = self.pos
+        return self._data[:, start:start + self.count]
+
+    @property
+    def timestamp(self):
+        return self.values[0]
+
+    @property
+    def open(self):
+        return self.values[1]
+
+    @property
+    def high(self):
+        return self.values[2]
+
+    @property
+    def low(self):
+        return self.values[3]
+
+    @property
+    def close(self):
+        return self.values[4]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        """Зріз (наприклад, series[-50:]) — нова серія над тією самою пам'яттю"""
+        if not isinstance(key, slice):
+            return self.values[:, key]
+        view = CandleSeries.__new__(CandleSeries)
+        view._data = self.values[:, key]
+        view.capacity = view.count = view._data.shape[1]
+        view.pos = 0
+        view.tz = self.tz
+        view._readonly = True
+        return view
+
+
+def _rolling_windows(values, window):
+    return np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+
+
+def _pad_front(values, total):
+    """Доповнити по осі часу NaN спереду до довжини total"""
+    missing = total - values.shape[-1]
+    if missing <= 0:
+        return values
+    pad = np.full(values.shape[:-1] + (missing,), np.nan)
+    return np.concatenate((pad, values), axis=-1)
+
+
+def sma(values, window):
+    """Проста ковзна середня по останній осі (NaN, доки вікно не заповнене)"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[-1] < window:
+        return np.full(values.shape, np.nan)
+    # Зсув на перше значення зменшує похибку cumsum на довгих рядах
+    base = values[..., :1]
+    cumsum = np.cumsum(values - base, axis=-1)
+    sums = cumsum[..., window - 1:].copy()
+    sums[..., 1:] -= cumsum[..., :-window]
+    return _pad_front(sums / window + base, values.shape[-1])
+
+
+def ewm(values, alpha, min_periods=1):
+    """
+    Експоненційне згладжування y[t] = alpha*x[t] + (1-alpha)*y[t-1], y[0] = x[0],
+    по останній осі. Рахується блоками через cumsum зі зваженими членами: довжина
+    блоку обмежує діапазон ваг до 1e12, тож точність не страждає, а цикл
+    Python іде по блоках, а не по свічках.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.empty_like(values)
+    n = values.shape[-1]
+    if not n:
+        return result
+    if alpha >= 1:
+        result[...] = values
+    else:
+        decay = 1.0 - alpha
+        block = max(1, min(n, int(math.log(1e12) / -math.log(decay))))
+        # Попереднє значення перед першою свічкою — x[0]: тоді y[0] = x[0]
+        carry = values[..., :1]
+        start = 0
+        while start < n:
+            chunk = values[..., start:start + block]
+            powers = decay ** np.arange(chunk.shape[-1])     # (1-a)^j
+            weighted = np.cumsum(chunk / powers, axis=-1)    # Σ x_k (1-a)^-k
+            # y_j = (1-a)^(j+1) * carry + a * (1-a)^j * Σ x_k (1-a)^-k
+            chunk_result = powers * (decay * carry + alpha * weighted)
+            result[..., start:start + chunk.shape[-1]] = chunk_result
+            carry = chunk_result[..., -1:]
+            start += chunk.shape[-1]
+    if min_periods > 1:
+        result[..., :min_periods - 1] = np.nan
+    return result
+
+
+def ema(values, span):
+    """Експоненційна ковзна середня з alpha = 2 / (span + 1)"""
+    return ewm(values, 2.0 / (span + 1), min_periods=span)
+
+
+def rsi(close, period=14):
+    """RSI за Вайлдером (згладжування alpha = 1/period)"""
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] <= period:
+        return np.full(close.shape, np.nan)
+    change = np.diff(close, axis=-1)
+    gain = ewm(np.clip(change, 0, None), 1.0 / period, min_periods=period)
+    loss = ewm(np.clip(-change, 0, None), 1.0 / period, min_periods=period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    value = np.where(np.isnan(gain) | np.isnan(loss), np.nan, value)
+    return _pad_front(value, close.shape[-1])
+
+
+def true_range(high, low, close):
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    previous = np.concatenate((close[..., :1], close[..., :-1]), axis=-1)
+    return np.maximum(high - low, np.maximum(np.abs(high - previous), np.abs(low - previous)))
+
+
+def atr(high, low, close, period=14):
+    """Середній істинний діапазон за Вайлдером"""
+    return ewm(true_range(high, low, close), 1.0 / period, min_periods=period)
+
+
+def bollinger(close, window=20, k=2.0):
+    """Смуги Боллінджера: (середня, верхня, нижня), стандартне відхилення генеральної сукупності"""
+    close = np.asarray(close, dtype=np.float64)
+    middle = sma(close, window)
+    if close.shape[-1] < window:
+        return middle, middle.copy(), middle.copy()
+    deviation = _pad_front(_rolling_windows(close, window).std(axis=-1), close.shape[-1])
+    return middle, middle + k * deviation, middle - k * deviation
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD: (лінія, сигнальна, гістограма)"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(line.shape, np.nan)
+    valid = slow - 1
+    if line.shape[-1] > valid:
+        signal_line[..., valid:] = ema(line[..., valid:], signal)
+    return line, signal_line, line - signal_line
+
+
+def rolling_range(values, window):
+    """Максимум мінус мінімум у ковзному вікні"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[-1] < window:
+        return np.full(values.shape, np.nan)
+    windows = _rolling_windows(values, window)
+    return _pad_front(windows.max(axis=-1) - windows.min(axis=-1), values.shape[-1])
+
+
+def compute_indicators(high, low, close):
+    """
+    Усі індикатори для матриць (активи × свічки) одним викликом;
+    одномірні масиви — як один актив. Повертає словник рядів тієї ж форми.
+    """
+    middle, upper, lower = bollinger(close)
+    line, signal_line, histogram = macd(close)
+    return {
+        'sma_5': sma(close, 5),
+        'sma_10': sma(close, 10),
+        'ema_12': ema(close, 12),
+        'ema_26': ema(close, 26),
+        'rsi_14': rsi(close),
+        'atr_14': atr(high, low, close),
+        'bb_middle': middle,
+        'bb_upper': upper,
+        'bb_lower': lower,
+        'macd': line,
+        'macd_signal': signal_line,
+        'macd_hist': histogram,
+        'volatility': rolling_range(close, 10)
+    }
+
+
 class Helpers:
     @staticmethod
-    def format_candles_for_ai(candles):
+    def format_candles_for_ai(candles, limit=20, tz=None):
         """Форматує свічки для AI аналізу"""
-        if not candles:
+        if not len(candles):
             return "Немає даних"
-        
-        formatted = []
-        for i, candle in enumerate(candles[-20:]):  # Беремо останні 20 свічок
-            time = candle.timestamp.strftime('%H:%M')
-            formatted.append(
-                f"{i+1}. {time} | O:{candle.open:.5f} H:{candle.high:.5f} "
-                f"L:{candle.low:.5f} C:{candle.close:.5f}"
+
+        series = candles if isinstance(candles, CandleSeries) else CandleSeries.from_candles(candles)
+        recent = series[-limit:]  # Беремо останні 20 свічок
+        # Час у поясі самих свічок (наївні — як є), якщо пояс не задано явно
+        tz = tz or recent.tz
+
+        times = [datetime.fromtimestamp(t, tz).strftime('%H:%M') for t in recent.timestamp.tolist()]
+        return "\n".join(
+            f"{i}. {time} | O:{o:.5f} H:{h:.5f} L:{l:.5f} C:{c:.5f}"
+            for i, (time, o, h, l, c) in enumerate(
+                zip(times, recent.open.tolist(), recent.high.tolist(), recent.low.tolist(), recent.close.tolist()), 1
             )
-        return "\n".join(formatted)
-    
+        )
+
     @staticmethod
     def calculate_indicators(candles):
-        """Розрахунок простих технічних індикаторів"""
+        """Розрахунок технічних індикаторів (останні значення) для списку свічок або CandleSeries"""
         if len(candles) < 10:
             return {}
-        
-        closes = [c.close for c in candles]
-        
-        # Проста середня (SMA)
-        sma_5 = sum(closes[-5:]) / 5 if len(closes) >= 5 else 0
-        sma_10 = sum(closes[-10:]) / 10 if len(closes) >= 10 else 0
-        
+
+        series = candles if isinstance(candles, CandleSeries) else CandleSeries.from_candles(candles)
+        return Helpers._latest(compute_indicators(series.high, series.low, series.close), series.close)
+
+    @staticmethod
+    def calculate_indicators_batch(series_by_asset):
+        """
+        Індикатори для багатьох активів: {актив: CandleSeries} -> {актив: словник}.
+        Активи з однаковою кількістю свічок рахуються разом однією матрицею.
+        """
+        groups = {}
+        for asset, series in series_by_asset.items():
+            if len(series) >= 10:
+                groups.setdefault(len(series), []).append(asset)
+
+        results = {}
+        for assets in groups.values():
+            stacked = {
+                name: np.vstack([getattr(series_by_asset[a], name) for a in assets])
+                for name in ('high', 'low', 'close')
+            }
+            indicators = compute_indicators(stacked['high'], stacked['low'], stacked['close'])
+            for row, asset in enumerate(assets):
+                results[asset] = Helpers._latest(
+                    {name: values[row] for name, values in indicators.items()}, stacked['close'][row]
+                )
+        return results
+
+    @staticmethod
+    def _latest(indicators, closes):
+        """Останні значення індикаторів у форматі попередньої версії (+ нові поля)"""
+        latest = {
+            name: (None if np.isnan(values[-1]) else float(values[-1]))
+            for name, values in indicators.items()
+        }
+        sma_5, sma_10 = latest['sma_5'] or 0, latest['sma_10'] or 0
+
         # Визначення тренду
         trend = "NEUTRAL"
         if sma_5 > sma_10:
             trend = "UP"
         elif sma_5 < sma_10:
             trend = "DOWN"
-        
-        # Волатильність
-        recent_closes = closes[-10:]
-        volatility = max(recent_closes) - min(recent_closes) if recent_closes else 0
-        
-        return {
-            "sma_5": sma_5,
-            "sma_10": sma_10,
-            "trend": trend,
-            "volatility": volatility,
-            "current_price": closes[-1] if closes else 0
-        }
-    
+
+        latest.update({
+            'sma_5': sma_5,
+            'sma_10': sma_10,
+            'trend': trend,
+            'volatility': latest['volatility'] or 0,
+            'current_price': float(closes[-1])
+        })
+        return latest
+
     @staticmethod
     def get_ukraine_time():
         """Отримання поточного часу в Україні"""
         ukraine_tz = pytz.timezone('Europe/Kiev')
         return datetime.now(ukraine_tz)
-    
+
     @staticmethod
     def time_until_next_signal():
         """Час до наступного сигналу"""
         now = Helpers.get_ukraine_time()
         next_run = now + timedelta(minutes=5 - (now.minute % 5))
         return (next_run - now).seconds
-    
+
     @staticmethod
     def create_signal_id(asset, timestamp):
         """Створення унікального ID для сигналу"""